@@ -0,0 +1,470 @@
+import argparse
+import calendar
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from metricas import METRICAS
+
+# Chaves de ordenação aceitas em --prioridade
+PRIORIDADES = ('novos', 'menores', 'maiores', 'ordem')
+# livre: usa toda a cota restante; uniforme: divide o restante do mês pelos dias que faltam
+RITMOS = ('livre', 'uniforme')
+LIMITES = ('palavras_dia', 'palavras_mes', 'requisicoes_dia', 'requisicoes_mes')
+DETECTORES = {'gptzero': 'GPTZero', 'zerogpt': 'ZeroGPT'}
+
+MAX_DIAS_PROJECAO = 400
+PESO_EXECUCAO_VAZAO = 0.3  # peso da execução atual na média de segundos por requisição
+
+Custo = Tuple[float, float]  # (palavras, requisições)
+
+def interpretar_limite(valor: str) -> Tuple[str, str, Optional[float]]:
+    """
+    Tipo do argparse para --cota DETECTOR:LIMITE=VALOR (ex.: gptzero:palavras_mes=300000).
+    O valor 'nenhum' remove o limite.
+    """
+    try:
+        alvo, numero = valor.split('=', 1)
+        detector, limite = alvo.split(':', 1)
+        detector = DETECTORES[detector.strip().lower()]
+    except (ValueError, KeyError):
+        raise argparse.ArgumentTypeError(
+            f"cota inválida: {valor!r} (use DETECTOR:LIMITE=VALOR, com DETECTOR em {', '.join(DETECTORES)})"
+        )
+    limite = limite.strip().lower()
+    if limite not in LIMITES:
+        raise argparse.ArgumentTypeError(f"limite inválido: {limite!r} (use {', '.join(LIMITES)})")
+    if numero.strip().lower() == 'nenhum':
+        return detector, limite, None
+    try:
+        quantidade = float(numero)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inválido em {valor!r}")
+    if quantidade < 0:
+        raise argparse.ArgumentTypeError(f"valor negativo em {valor!r}")
+    return detector, limite, quantidade
+
+def interpretar_prioridade(valor: str) -> List[str]:
+    """
+    Tipo do argparse para --prioridade: chaves separadas por vírgula, aplicadas em ordem
+    """
+    chaves = [chave.strip().lower() for chave in valor.split(',') if chave.strip()]
+    invalidas = [chave for chave in chaves if chave not in PRIORIDADES]
+    if not chaves or invalidas:
+        raise argparse.ArgumentTypeError(
+            f"prioridade inválida: {valor!r} (use uma ou mais de {', '.join(PRIORIDADES)}, separadas por vírgula)"
+        )
+    return chaves
+
+def _virar_periodos(usado: Dict[str, float], periodo: Dict[str, str], hoje: date):
+    """
+    Zera os contadores do dia e do mês quando a data muda
+    """
+    if periodo.get('dia') != hoje.isoformat():
+        periodo['dia'] = hoje.isoformat()
+        usado['palavras_dia'] = usado['requisicoes_dia'] = 0
+    if periodo.get('mes') != hoje.strftime('%Y-%m'):
+        periodo['mes'] = hoje.strftime('%Y-%m')
+        usado['palavras_mes'] = usado['requisicoes_mes'] = 0
+
+class CotaDetector:
+    """
+    Limites de um detector (palavras e requisições por dia e por mês, None sem limite) e o consumo
+    nos períodos atuais. Os contadores do dia e do mês são zerados na virada da data local.
+    O consumo é registrado pelo próprio detector a cada resposta bem sucedida da API.
+    """
+
+    def __init__(self, nome: str, limites: Optional[Dict] = None, consumo: Optional[Dict] = None):
+        self.nome = nome
+        self.limites: Dict[str, Optional[float]] = {limite: None for limite in LIMITES}
+        self.limites.update({k: v for k, v in (limites or {}).items() if k in LIMITES})
+        consumo = consumo or {}
+        self.periodo = {'dia': consumo.get('dia', ''), 'mes': consumo.get('mes', '')}
+        self.usado = {limite: float(consumo.get(limite, 0)) for limite in LIMITES}
+        self.palavras_execucao = 0
+        self.requisicoes_execucao = 0
+        self._lock = threading.Lock()
+
+    def limitado(self) -> bool:
+        return any(valor is not None for valor in self.limites.values())
+
+    def consumir(self, palavras: int, requisicoes: int = 1):
+        with self._lock:
+            _virar_periodos(self.usado, self.periodo, date.today())
+            for periodo in ('dia', 'mes'):
+                self.usado[f'palavras_{periodo}'] += palavras
+                self.usado[f'requisicoes_{periodo}'] += requisicoes
+            self.palavras_execucao += palavras
+            self.requisicoes_execucao += requisicoes
+        METRICAS.incrementar('cota_palavras_total', palavras, detector=self.nome)
+
+    def estado(self, hoje: date) -> Dict[str, float]:
+        """
+        Cópia do consumo nos períodos de `hoje`
+        """
+        with self._lock:
+            _virar_periodos(self.usado, self.periodo, hoje)
+            return dict(self.usado)
+
+    def orcamento(self, hoje: date, usado: Dict[str, float], ritmo: str = 'livre') -> Tuple[Optional[float], Optional[float]]:
+        """
+        Palavras e requisições que ainda podem ser gastas em `hoje` (None: sem limite).
+        No ritmo uniforme, o restante do mês é dividido igualmente pelos dias que faltam.
+        """
+        restantes = []
+        for tipo in ('palavras', 'requisicoes'):
+            valores = []
+            limite_dia = self.limites[f'{tipo}_dia']
+            limite_mes = self.limites[f'{tipo}_mes']
+            usado_dia = usado[f'{tipo}_dia']
+            if limite_dia is not None:
+                valores.append(limite_dia - usado_dia)
+            if limite_mes is not None:
+                valores.append(limite_mes - usado[f'{tipo}_mes'])
+                if ritmo == 'uniforme':
+                    dias = calendar.monthrange(hoje.year, hoje.month)[1] - hoje.day + 1
+                    inicio_dia = limite_mes - usado[f'{tipo}_mes'] + usado_dia
+                    valores.append(inicio_dia / dias - usado_dia)
+            restantes.append(max(0.0, min(valores)) if valores else None)
+        return restantes[0], restantes[1]
+
+    def cabe_em_um_periodo(self, custo: Custo) -> bool:
+        """
+        False se o custo passa de algum limite mesmo com a cota zerada (nunca poderá ser enviado)
+        """
+        palavras, requisicoes = custo
+        for limite, valor in self.limites.items():
+            if valor is not None and (palavras if limite.startswith('palavras') else requisicoes) > valor:
+                return False
+        return True
+
+    def para_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'limites': {limite: valor for limite, valor in self.limites.items() if valor is not None},
+                'consumo': dict(self.periodo, **self.usado),
+            }
+
+class UnidadeAgenda:
+    """
+    Textos planejados juntos: por padrão um participante inteiro (junto com os participantes com quem
+    divide resenhas duplicadas), para que nenhum fique com parte das resenhas analisadas; com
+    por_resenha, cada texto enviado é uma unidade.
+    """
+
+    def __init__(self, nome: str, itens: List[int], custos: Dict[str, Custo], nova: bool = False,
+                 ordem: int = 0):
+        self.nome = nome
+        self.itens = itens
+        self.custos = custos
+        self.nova = nova
+        self.ordem = ordem
+
+    @property
+    def palavras(self) -> float:
+        return sum(palavras for palavras, _ in self.custos.values())
+
+def montar_unidades(grupos: List, participantes: List[str], custos: List[Dict[str, Custo]],
+                    novos: Set[str], por_resenha: bool = False) -> List[UnidadeAgenda]:
+    """
+    Monta as unidades de planejamento a partir dos grupos de duplicatas (ver GrupoDuplicatas):
+    participantes[i] é o participante da resenha i e custos[g] o custo por detector do grupo g.
+    Participantes ligados por um grupo ficam na mesma unidade.
+    """
+    def somar(indices: Iterable[int]) -> Dict[str, Custo]:
+        total: Dict[str, List[float]] = {}
+        for indice in indices:
+            for detector, (palavras, requisicoes) in custos[indice].items():
+                soma = total.setdefault(detector, [0.0, 0.0])
+                soma[0] += palavras
+                soma[1] += requisicoes
+        return {detector: (palavras, requisicoes) for detector, (palavras, requisicoes) in total.items()}
+
+    if por_resenha:
+        return [
+            UnidadeAgenda(participantes[grupo.representante], [indice], somar([indice]),
+                          any(participantes[m] in novos for m in grupo.membros), indice)
+            for indice, grupo in enumerate(grupos)
+        ]
+
+    # Union-find dos participantes que compartilham algum grupo
+    pais: Dict[str, str] = {}
+    def raiz(participante: str) -> str:
+        pais.setdefault(participante, participante)
+        while pais[participante] != participante:
+            pais[participante] = pais[pais[participante]]
+            participante = pais[participante]
+        return participante
+    for grupo in grupos:
+        primeiro = raiz(participantes[grupo.membros[0]])
+        for membro in grupo.membros[1:]:
+            pais[raiz(participantes[membro])] = primeiro
+
+    por_raiz: Dict[str, List[int]] = {}
+    for indice, grupo in enumerate(grupos):
+        por_raiz.setdefault(raiz(participantes[grupo.representante]), []).append(indice)
+    unidades = []
+    for ordem, indices in enumerate(por_raiz.values()):
+        nomes = list(dict.fromkeys(participantes[m] for i in indices for m in grupos[i].membros))
+        unidades.append(UnidadeAgenda(', '.join(nomes), indices, somar(indices),
+                                      any(nome in novos for nome in nomes), ordem))
+    return unidades
+
+class PlanoCota:
+    """
+    Resultado do planejamento: o que vai nesta execução, o que fica para depois e a previsão de conclusão
+    """
+
+    def __init__(self):
+        self.admitidas: List[UnidadeAgenda] = []
+        self.adiadas: List[UnidadeAgenda] = []
+        self.impossiveis: List[UnidadeAgenda] = []  # não cabem na cota nem de um dia/mês inteiro
+        self.custo_admitido: Dict[str, Custo] = {}
+        self.duracao_segundos = 0.0
+        self.conclusao: Optional[datetime] = None  # None: há unidades que nunca cabem na cota
+        self.dias_adicionais = 0
+
+    @property
+    def itens(self) -> List[int]:
+        """
+        Índices dos textos desta execução, na ordem de envio
+        """
+        return [item for unidade in self.admitidas for item in unidade.itens]
+
+    def para_dict(self) -> Dict:
+        return {
+            'criado_em': datetime.now().isoformat(timespec='seconds'),
+            'textos_agora': len(self.itens),
+            'textos_adiados': sum(len(u.itens) for u in self.adiadas + self.impossiveis),
+            'custo_agora': {nome: {'palavras': p, 'requisicoes': r} for nome, (p, r) in self.custo_admitido.items()},
+            'duracao_prevista_segundos': round(self.duracao_segundos, 1),
+            'conclusao_prevista': self.conclusao.isoformat(timespec='minutes') if self.conclusao else None,
+            'adiados': [u.nome for u in self.adiadas],
+            'fora_da_cota': [u.nome for u in self.impossiveis],
+        }
+
+class AgendadorCota:
+    """
+    Planeja uma execução contra a cota de palavras e requisições de cada detector.
+
+    O custo de cada texto é estimado antes do envio (palavras e requisições que iriam às APIs;
+    textos em cache ou resolvidos pela pré-triagem não custam nada). As unidades de trabalho são
+    ordenadas pelas chaves de prioridade e admitidas enquanto couberem no orçamento de hoje; as
+    demais ficam para as próximas execuções, sem deixar participantes pela metade. A previsão de
+    conclusão supõe uma execução por dia e usa os segundos por requisição medidos nas execuções
+    anteriores. Limites, consumo e o último plano ficam em Resumos/cotas.json.
+    """
+
+    def __init__(self, caminho: Path, prioridade: Optional[List[str]] = None, ritmo: str = 'livre'):
+        self.caminho = Path(caminho)
+        self.prioridade = prioridade or ['ordem']
+        self.ritmo = ritmo
+        self.logger = logging.getLogger('detector_ia')
+        self.cotas: Dict[str, CotaDetector] = {}
+        self.segundos_por_requisicao: Dict[str, float] = {}
+        self.ultimo_plano: Optional[Dict] = None
+        self._carregar()
+
+    def _carregar(self):
+        if not self.caminho.exists():
+            return
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Arquivo de cotas ilegível ({str(e)}); começando sem limites nem consumo")
+            return
+        for nome, detector in dados.get('detectores', {}).items():
+            self.cotas[nome] = CotaDetector(nome, detector.get('limites'), detector.get('consumo'))
+            if detector.get('segundos_por_requisicao'):
+                self.segundos_por_requisicao[nome] = detector['segundos_por_requisicao']
+        self.ultimo_plano = dados.get('ultimo_plano')
+
+    def cota(self, nome: str) -> CotaDetector:
+        if nome not in self.cotas:
+            self.cotas[nome] = CotaDetector(nome)
+        return self.cotas[nome]
+
+    def definir_limite(self, nome: str, limite: str, valor: Optional[float]):
+        """
+        Altera um limite (None remove); fica gravado para as próximas execuções
+        """
+        self.cota(nome).limites[limite] = valor
+
+    def limitado(self) -> bool:
+        return any(cota.limitado() for cota in self.cotas.values())
+
+    def _chave(self, unidade: UnidadeAgenda) -> Tuple:
+        valores = []
+        for chave in self.prioridade:
+            if chave == 'novos':
+                valores.append(0 if unidade.nova else 1)
+            elif chave == 'menores':
+                valores.append(unidade.palavras)
+            elif chave == 'maiores':
+                valores.append(-unidade.palavras)
+            else:
+                valores.append(unidade.ordem)
+        valores.append(unidade.ordem)
+        return tuple(valores)
+
+    def _encaixar(self, unidades: List[UnidadeAgenda], dia: date,
+                  usados: Dict[str, Dict[str, float]]) -> Tuple[List[UnidadeAgenda], List[UnidadeAgenda]]:
+        """
+        Admite, em ordem, as unidades que cabem no orçamento do dia (atualiza `usados`);
+        retorna (admitidas, restantes)
+        """
+        orcamentos = {nome: list(cota.orcamento(dia, usados[nome], self.ritmo)) for nome, cota in self.cotas.items()}
+        admitidas, restantes = [], []
+        for unidade in unidades:
+            cabe = all(
+                restante is None or gasto <= restante + 1e-9
+                for nome, orcamento in orcamentos.items()
+                for gasto, restante in zip(unidade.custos.get(nome, (0, 0)), orcamento)
+            )
+            if not cabe:
+                restantes.append(unidade)
+                continue
+            admitidas.append(unidade)
+            for nome, (palavras, requisicoes) in unidade.custos.items():
+                if nome not in orcamentos:
+                    continue
+                for posicao, gasto in enumerate((palavras, requisicoes)):
+                    if orcamentos[nome][posicao] is not None:
+                        orcamentos[nome][posicao] -= gasto
+                for periodo in ('dia', 'mes'):
+                    usados[nome][f'palavras_{periodo}'] += palavras
+                    usados[nome][f'requisicoes_{periodo}'] += requisicoes
+        return admitidas, restantes
+
+    def _duracao(self, unidades: List[UnidadeAgenda], padrao: Dict[str, float]) -> float:
+        """
+        Segundos previstos para analisar as unidades (os detectores trabalham em paralelo)
+        """
+        requisicoes: Dict[str, float] = {}
+        for unidade in unidades:
+            for nome, (_, quantidade) in unidade.custos.items():
+                requisicoes[nome] = requisicoes.get(nome, 0) + quantidade
+        return max((quantidade * self.segundos_por_requisicao.get(nome, padrao.get(nome, 1.0))
+                    for nome, quantidade in requisicoes.items()), default=0.0)
+
+    def planejar(self, unidades: List[UnidadeAgenda],
+                 segundos_por_requisicao_padrao: Optional[Dict[str, float]] = None) -> PlanoCota:
+        """
+        Ordena as unidades pela prioridade, escolhe as que cabem na cota de hoje e projeta
+        em que dia as demais terminam. `segundos_por_requisicao_padrao` vale para detectores
+        ainda sem medição (ex.: 1 / taxa do limitador).
+        """
+        padrao = segundos_por_requisicao_padrao or {}
+        agora = datetime.now()
+        hoje = agora.date()
+        plano = PlanoCota()
+        ordenadas = sorted(unidades, key=self._chave)
+        usados = {nome: cota.estado(hoje) for nome, cota in self.cotas.items()}
+
+        possiveis = []
+        for unidade in ordenadas:
+            if all(cota.cabe_em_um_periodo(unidade.custos.get(nome, (0, 0))) for nome, cota in self.cotas.items()):
+                possiveis.append(unidade)
+            else:
+                plano.impossiveis.append(unidade)
+
+        plano.admitidas, pendentes = self._encaixar(possiveis, hoje, usados)
+        plano.adiadas = list(pendentes)
+        for unidade in plano.admitidas:
+            for nome, (palavras, requisicoes) in unidade.custos.items():
+                gasto = plano.custo_admitido.get(nome, (0, 0))
+                plano.custo_admitido[nome] = (gasto[0] + palavras, gasto[1] + requisicoes)
+        plano.duracao_segundos = self._duracao(plano.admitidas, padrao)
+        plano.conclusao = agora + timedelta(seconds=plano.duracao_segundos)
+
+        # Próximos dias: a cota diária (e a mensal, na virada do mês) é renovada
+        dia = hoje
+        periodos = {nome: {'dia': hoje.isoformat(), 'mes': hoje.strftime('%Y-%m')} for nome in usados}
+        while pendentes and (dia - hoje).days < MAX_DIAS_PROJECAO:
+            dia += timedelta(days=1)
+            for nome in usados:
+                _virar_periodos(usados[nome], periodos[nome], dia)
+            encaixadas, pendentes = self._encaixar(pendentes, dia, usados)
+            if encaixadas:
+                plano.conclusao = datetime.combine(dia, time()) + timedelta(seconds=self._duracao(encaixadas, padrao))
+                plano.dias_adicionais = (dia - hoje).days
+        if pendentes or plano.impossiveis:
+            plano.adiadas = [unidade for unidade in plano.adiadas if all(unidade is not p for p in pendentes)]
+            plano.impossiveis.extend(pendentes)
+            plano.conclusao = None
+        self.ultimo_plano = plano.para_dict()
+        return plano
+
+    def registrar_plano(self, plano: PlanoCota):
+        """
+        Registra no log e nas métricas o que foi admitido, o que ficou para depois e a previsão
+        """
+        for nome, cota in self.cotas.items():
+            palavras, requisicoes = cota.orcamento(date.today(), cota.estado(date.today()), self.ritmo)
+            gasto = plano.custo_admitido.get(nome, (0, 0))
+            self.logger.info(
+                f"Cota {nome}: {gasto[0]:.0f} palavras e {gasto[1]:.0f} requisições previstas nesta execução "
+                f"(disponível hoje: {'sem limite' if palavras is None else f'{palavras:.0f}'} palavras, "
+                f"{'sem limite' if requisicoes is None else f'{requisicoes:.0f}'} requisições)"
+            )
+        adiados = sum(len(unidade.itens) for unidade in plano.adiadas + plano.impossiveis)
+        METRICAS.incrementar('cota_textos_total', len(plano.itens), destino='agora')
+        METRICAS.incrementar('cota_textos_total', adiados, destino='adiado')
+        if adiados:
+            self.logger.warning(
+                f"Cota: {adiados} textos de {len(plano.adiadas) + len(plano.impossiveis)} unidades ficam para "
+                f"as próximas execuções ({', '.join(unidade.nome for unidade in plano.adiadas[:5])}"
+                f"{', ...' if len(plano.adiadas) > 5 else ''})"
+            )
+        if plano.impossiveis:
+            self.logger.warning(
+                f"Cota: {', '.join(unidade.nome for unidade in plano.impossiveis)} não cabem nos limites "
+                f"configurados; aumente a cota ou use --cota-por-resenha / --max-palavras-trecho"
+            )
+        if plano.conclusao is None:
+            self.logger.warning("Cota: conclusão não prevista (há textos que não cabem na cota)")
+        elif plano.dias_adicionais:
+            self.logger.info(
+                f"Cota: conclusão prevista em {plano.conclusao:%d/%m/%Y %H:%M}, com uma execução por dia "
+                f"(daqui a {plano.dias_adicionais} dia(s))"
+            )
+        else:
+            self.logger.info(
+                f"Cota: tudo cabe nesta execução; conclusão prevista às {plano.conclusao:%H:%M} "
+                f"(~{plano.duracao_segundos / 60:.1f} min)"
+            )
+
+    def registrar_execucao(self, segundos: float):
+        """
+        Atualiza os segundos por requisição de cada detector com a duração da análise desta execução
+        """
+        for nome, cota in self.cotas.items():
+            if cota.requisicoes_execucao and segundos > 0:
+                medido = segundos / cota.requisicoes_execucao
+                anterior = self.segundos_por_requisicao.get(nome)
+                self.segundos_por_requisicao[nome] = medido if anterior is None else \
+                    PESO_EXECUCAO_VAZAO * medido + (1 - PESO_EXECUCAO_VAZAO) * anterior
+
+    def salvar(self):
+        """
+        Grava limites, consumo, vazão medida e o último plano (escrita atômica)
+        """
+        dados = {
+            'detectores': {
+                nome: dict(cota.para_dict(), segundos_por_requisicao=self.segundos_por_requisicao.get(nome))
+                for nome, cota in self.cotas.items()
+            },
+            'ultimo_plano': self.ultimo_plano,
+        }
+        try:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            temporario = self.caminho.with_suffix(self.caminho.suffix + '.tmp')
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(dados, f, ensure_ascii=False, indent=1)
+            os.replace(temporario, self.caminho)
+        except OSError as e:
+            self.logger.warning(f"Cotas não gravadas: {str(e)}")
@@ -2,78 +2,135 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 import logging
+from typing import Dict, List, Tuple
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment
 import openpyxl
+from armazem_resultados import ArmazemResultados, abrir_armazem
+from metricas import METRICAS, etapa
+from pretriagem import CAMINHOS_LOCAIS
+
+# Colunas lidas do armazenamento para a consolidação
+COLUNAS_ENTRADA = ['GPTZero_Prob_IA', 'ZeroGPT_Porcentagem_IA', 'Triagem_Caminho']
+
+# Colunas do relatório consolidado, na ordem da planilha
+COLUNAS_CONSOLIDADO = [
+    'Participante', 'Total_Resenhas', 'Total_GPTZero_80', 'Total_ZeroGPT_80', 'Total_GPTZero_60',
+    'Total_ZeroGPT_60', 'Total_GPTZero_40', 'Total_ZeroGPT_40', 'Total_Marcadas_IA',
+    'Percentual_Marcadas_>40', 'Media_GPTZero', 'Media_ZeroGPT'
+]
 
 class AnalisadorConsolidado:
-    def __init__(self, pasta_relatorios: Path):
+    def __init__(self, pasta_relatorios: Path, armazem: ArmazemResultados = None):
         self.pasta_relatorios = pasta_relatorios
+        self.armazem = armazem
         self.logger = logging.getLogger('detector_ia')
 
-    def gerar_relatorio_consolidado(self):
+    def calcular_consolidado(self, armazem: ArmazemResultados) -> pd.DataFrame:
+        """
+        Métricas de cada participante, ordenadas pelo percentual de resenhas marcadas.
+        Lê as duas colunas de pontuação de todos os participantes de uma vez.
+        """
+        df = armazem.carregar(COLUNAS_ENTRADA)
+        return self.consolidar(df, armazem.participantes())
+
+    def calcular_consolidado_incremental(self, armazem: ArmazemResultados) -> Tuple[pd.DataFrame, Dict, bool]:
+        """
+        Como calcular_consolidado, mas reaproveita as linhas guardadas no armazenamento:
+        só participantes cuja impressão mudou desde o último relatório são lidos e agregados.
+        Retorna o DataFrame ordenado, as linhas recalculadas ({participante: (impressão, métricas)},
+        a gravar com armazem.gravar_resumos_consolidados depois do relatório escrito) e se
+        algo mudou em relação ao último relatório.
+        """
+        impressoes = armazem.impressoes()
+        resumos = armazem.resumos_consolidados()
+        alterados = [p for p, impressao in impressoes.items()
+                     if p not in resumos or resumos[p][0] != impressao]
+        
+        novos = {}
+        if alterados:
+            df = armazem.carregar(COLUNAS_ENTRADA, participantes=alterados)
+            for linha in self.consolidar(df, alterados).to_dict('records'):
+                novos[linha['Participante']] = (impressoes[linha['Participante']], linha)
+            resumos.update(novos)
+        self.logger.info(f"Consolidado: {len(alterados)} de {len(impressoes)} participantes recalculados")
+        METRICAS.incrementar('consolidado_participantes_total', len(alterados), situacao='recalculado')
+        METRICAS.incrementar('consolidado_participantes_total', len(impressoes) - len(alterados),
+                             situacao='reaproveitado')
+        
+        # Mesma ordem de entrada do cálculo completo, para que empates fiquem na mesma posição
+        df_consolidado = pd.DataFrame([resumos[p][1] for p in impressoes], columns=COLUNAS_CONSOLIDADO)
+        df_consolidado = df_consolidado.sort_values('Percentual_Marcadas_>40', ascending=False)
+        houve_alteracao = bool(alterados) or len(resumos) != len(impressoes)
+        return df_consolidado, novos, houve_alteracao
+
+    def consolidar(self, df: pd.DataFrame, participantes: List[str]) -> pd.DataFrame:
+        """
+        Agrega, com um único groupby, as resenhas já carregadas (colunas Participante,
+        GPTZero_Prob_IA, ZeroGPT_Porcentagem_IA e, se houver, Triagem_Caminho). Participantes
+        sem resenhas aparecem com totais zerados. Resenhas resolvidas pela pré-triagem contam
+        no total, mas não nas contagens e médias dos detectores, que não as analisaram.
+        """
+        gptzero = df['GPTZero_Prob_IA']
+        zerogpt = df['ZeroGPT_Porcentagem_IA']
+        if 'Triagem_Caminho' in df.columns:
+            locais = df['Triagem_Caminho'].isin(CAMINHOS_LOCAIS)
+            gptzero, zerogpt = gptzero.mask(locais), zerogpt.mask(locais)
+        
+        # Um indicador por resenha; somados por participante viram as contagens
+        indicadores = pd.DataFrame({
+            'Participante': df['Participante'],
+            'Total_Resenhas': 1,
+            'Total_GPTZero_80': gptzero >= 0.80,
+            'Total_ZeroGPT_80': zerogpt >= 80,
+            'Total_GPTZero_60': gptzero >= 0.60,
+            'Total_ZeroGPT_60': zerogpt >= 60,
+            'Total_GPTZero_40': gptzero >= 0.40,
+            'Total_ZeroGPT_40': zerogpt >= 40,
+            # Total de resenhas marcadas por qualquer detector (>=40)
+            'Total_Marcadas_IA': (gptzero >= 0.40) | (zerogpt >= 40),
+            'Media_GPTZero': gptzero,
+            'Media_ZeroGPT': zerogpt
+        })
+        colunas_total = [coluna for coluna in indicadores.columns if coluna.startswith('Total_')]
+        agregacoes = {coluna: 'sum' for coluna in colunas_total}
+        agregacoes.update({'Media_GPTZero': 'mean', 'Media_ZeroGPT': 'mean'})
+        
+        df_consolidado = indicadores.groupby('Participante').agg(agregacoes)
+        df_consolidado = df_consolidado.reindex(pd.Index(participantes, name='Participante'))
+        df_consolidado[colunas_total] = df_consolidado[colunas_total].fillna(0).astype('int64')
+        
+        # Percentual de resenhas marcadas
+        total_resenhas = df_consolidado['Total_Resenhas']
+        df_consolidado.insert(
+            colunas_total.index('Total_Marcadas_IA') + 1, 'Percentual_Marcadas_>40',
+            (df_consolidado['Total_Marcadas_IA'] / total_resenhas * 100).where(total_resenhas > 0, 0.0)
+        )
+        df_consolidado = df_consolidado.reset_index()
+        
+        # Ordena por percentual de resenhas marcadas
+        df_consolidado = df_consolidado.sort_values('Percentual_Marcadas_>40', ascending=False)
+        return df_consolidado
+
+    @etapa('consolidacao')
+    def gerar_relatorio_consolidado(self, forcar: bool = False):
         """
-        Gera relatório consolidado de todos os participantes
+        Gera relatório consolidado de todos os participantes, a partir do armazenamento de resultados.
+        Só participantes alterados são recalculados; sem nenhuma alteração, a planilha existente é mantida
+        (com forcar, é reescrita mesmo assim).
         """
+        armazem = self.armazem or abrir_armazem(self.pasta_relatorios)
         try:
-            # Lista todos os arquivos Excel na pasta de relatórios
-            arquivos_excel = list(self.pasta_relatorios.glob('relatório_*.xlsx'))
-            
-            resultados = []
-            for arquivo in arquivos_excel:
-                # Extrai nome do participante do nome do arquivo
-                participante = arquivo.stem.replace('relatório_', '')
-                
-                # Lê o arquivo Excel
-                df = pd.read_excel(arquivo)
-                
-                # Calcula as métricas existentes
-                total_resenhas = len(df)
-                total_gptzero_80 = len(df[df['GPTZero_Prob_IA'] >= 0.80])
-                total_zerogpt_80 = len(df[df['ZeroGPT_Porcentagem_IA'] >= 80])
-                total_gptzero_60 = len(df[df['GPTZero_Prob_IA'] >= 0.60])
-                total_zerogpt_60 = len(df[df['ZeroGPT_Porcentagem_IA'] >= 60])
-                media_gptzero = df['GPTZero_Prob_IA'].mean()
-                media_zerogpt = df['ZeroGPT_Porcentagem_IA'].mean()
-                
-                # Novas métricas
-                total_gptzero_40 = len(df[df['GPTZero_Prob_IA'] >= 0.40])
-                total_zerogpt_40 = len(df[df['ZeroGPT_Porcentagem_IA'] >= 40])
-                
-                # Total de resenhas marcadas por qualquer detector (>=40)
-                marcadas_ia = df[(df['GPTZero_Prob_IA'] >= 0.40) | 
-                               (df['ZeroGPT_Porcentagem_IA'] >= 40)]
-                total_marcadas_ia = len(marcadas_ia)
-                
-                # Percentual de resenhas marcadas
-                percentual_marcadas = (total_marcadas_ia / total_resenhas * 100) if total_resenhas > 0 else 0
-                
-                resultados.append({
-                    'Participante': participante,
-                    'Total_Resenhas': total_resenhas,
-                    'Total_GPTZero_80': total_gptzero_80,
-                    'Total_ZeroGPT_80': total_zerogpt_80,
-                    'Total_GPTZero_60': total_gptzero_60,
-                    'Total_ZeroGPT_60': total_zerogpt_60,
-                    'Total_GPTZero_40': total_gptzero_40,
-                    'Total_ZeroGPT_40': total_zerogpt_40,
-                    'Total_Marcadas_IA': total_marcadas_ia,
-                    'Percentual_Marcadas_>40': percentual_marcadas,
-                    'Media_GPTZero': media_gptzero,
-                    'Media_ZeroGPT': media_zerogpt
-                })
-            
-            # Cria DataFrame consolidado
-            df_consolidado = pd.DataFrame(resultados)
-            
-            # Ordena por percentual de resenhas marcadas
-            df_consolidado = df_consolidado.sort_values('Percentual_Marcadas_>40', ascending=False)
+            arquivo_saida = self.pasta_relatorios / 'relatorio_consolidado.xlsx'
+            df_consolidado, novos, houve_alteracao = self.calcular_consolidado_incremental(armazem)
+            if not houve_alteracao and arquivo_saida.exists() and not forcar:
+                self.logger.info(f"Relatório consolidado sem alterações: {arquivo_saida}")
+                return arquivo_saida
             
             # Formata a coluna de percentual para mostrar % no Excel
             df_consolidado['Percentual_Marcadas_>40'] = df_consolidado['Percentual_Marcadas_>40'].apply(lambda x: f'{x:.1f}%')
             
             # Gera arquivo Excel com formatação
-            arquivo_saida = self.pasta_relatorios / 'relatorio_consolidado.xlsx'
             with pd.ExcelWriter(arquivo_saida, engine='openpyxl') as writer:
                 df_consolidado.to_excel(writer, index=False, sheet_name='Consolidado')
                 
@@ -82,7 +139,7 @@ class AnalisadorConsolidado:
                 for idx, col in enumerate(df_consolidado.columns):
                     # Encontra o comprimento máximo na coluna
                     max_length = max(
-                        df_consolidado[col].astype(str).apply(len).max(),  # Maior valor
+                        df_consolidado[col].map(lambda valor: len(str(valor))).max(),  # Maior valor (NaN conta como "nan")
                         len(str(col))  # Tamanho do cabeçalho
                     )
                     # Ajusta a largura (um pouco maior para garantir a legibilidade)
@@ -95,7 +152,7 @@ class AnalisadorConsolidado:
 
                 # Adiciona comentários explicativos
                 explicacoes = {
-                    'Participante': 'Nome do participante extraído do nome do arquivo',
+                    'Participante': 'Nome do participante (pasta em Resumos)',
                     'Total_Resenhas': 'Número total de resenhas enviadas pelo participante',
                     'Total_GPTZero_80': 'Número de resenhas com GPTZero_Prob_IA >= 0.80',
                     'Total_ZeroGPT_80': 'Número de resenhas com ZeroGPT_Porcentagem_IA >= 80',
@@ -118,9 +175,15 @@ class AnalisadorConsolidado:
                             'Detector IA'
                         )
             
+            # Só depois da planilha escrita as linhas recalculadas passam a valer como atuais
+            armazem.gravar_resumos_consolidados(novos, df_consolidado['Participante'])
+            
             self.logger.info(f"Relatório consolidado gerado: {arquivo_saida}")
             return arquivo_saida
             
         except Exception as e:
             self.logger.error(f"Erro ao gerar relatório consolidado: {str(e)}", exc_info=True)
-            raise 
\ No newline at end of file
+            raise
+        finally:
+            if self.armazem is None:
+                armazem.fechar() 
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+from copy import copy
 from typing import Dict, Any, List, Tuple
 from pathlib import Path
 import pandas as pd
@@ -6,141 +7,458 @@ from detector_gpt_zero import GPTZeroDetector
 from detector_zero_gpt import ZeroGPTDetector
 import openpyxl
 from time import sleep
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from limitador_taxa import LimiteTaxaExcedido, calcular_backoff
+from transporte_http import TransporteHTTP
+from cache_resultados import CacheResultados
+from armazem_sentencas import CHAVES_SENTENCAS
+from metricas import METRICAS, cronometro_detector, etapa
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle, DEFAULT_FONT
 from openpyxl.formatting.rule import ColorScaleRule
 from openpyxl.utils import get_column_letter
-import matplotlib.pyplot as plt
+from openpyxl.cell import WriteOnlyCell
 
 class AnalisadorIA:
-    def __init__(self, gpt_zero_key: str, zero_gpt_key: str):
+    def __init__(self, gpt_zero_key: str, zero_gpt_key: str, cache: CacheResultados = None):
         self.logger = logging.getLogger('detector_ia')
-        self.gpt_zero = GPTZeroDetector(gpt_zero_key)
-        self.zero_gpt = ZeroGPTDetector(zero_gpt_key)
+        self.gpt_zero = GPTZeroDetector(gpt_zero_key, cache=cache)
+        self.zero_gpt = ZeroGPTDetector(zero_gpt_key, cache=cache)
+    
+    def fechar(self):
+        """
+        Registra o volume trafegado com cada API e fecha as conexões e os executores de trechos
+        """
+        for detector in (self.gpt_zero, self.zero_gpt):
+            if detector.executor_trechos is not None:
+                detector.executor_trechos.shutdown()
+            detector.transporte.registrar_estatisticas(detector.nome)
+            detector.transporte.fechar()
     
     def analisar_resumos(self, resumos: List[Tuple[str, str]]) -> List[Dict]:
         """
         Analisa uma lista de resumos e retorna resultados para cada um,
-        processando em lotes de 40 para respeitar limites da API
+        processando em lotes de 40. O ritmo das requisições é controlado pelo
+        limitador de taxa de cada detector, sem pausas fixas entre textos.
         """
         resultados = []
         tamanho_lote = 40
-        max_tentativas = 3  # Número máximo de tentativas por texto
         
         for i in range(0, len(resumos), tamanho_lote):
             lote_atual = resumos[i:i + tamanho_lote]
-            self.logger.info(f"Processando lote {(i//tamanho_lote)+1} ({len(lote_atual)} textos)")
+            self.logger.info("Processando lote %d (%d textos)", (i//tamanho_lote)+1, len(lote_atual))
             
             for nome_livro, texto in lote_atual:
-                self.logger.info(f"Analisando resumo: {nome_livro}")
+                self.logger.info("Analisando resumo: %s", nome_livro)
                 resultado = {
                     'Livro': nome_livro,
                     'Texto_Normalizado': texto
                 }
-                
-                # Análise GPTZero com retry
-                for tentativa in range(max_tentativas):
-                    try:
-                        gpt_zero_result = self.gpt_zero.analisar_texto(texto)
-                        resultado.update({
-                            # Metadados
-                            'GPTZero_Versao': gpt_zero_result['version'],
-                            'GPTZero_ScanID': gpt_zero_result['scan_id'],
-                            
-                            # Probabilidades principais
-                            'GPTZero_Prob_Media_IA': gpt_zero_result['documento']['prob_media_ia'],
-                            'GPTZero_Prob_IA': gpt_zero_result['documento']['prob_classes']['ai'],
-                            'GPTZero_Prob_Humano': gpt_zero_result['documento']['prob_classes']['human'],
-                            'GPTZero_Prob_Misto': gpt_zero_result['documento']['prob_classes']['mixed'],
-                            
-                            # Confiança e classificação
-                            'GPTZero_Categoria_Confianca': gpt_zero_result['documento']['categoria_confianca'],
-                            'GPTZero_Pontuacao_Confianca': gpt_zero_result['documento']['pontuacao_confianca'],
-                            'GPTZero_Classe_Prevista': gpt_zero_result['documento']['classe_prevista'],
-                            'GPTZero_Classificacao': gpt_zero_result['documento']['classificacao_documento'],
-                            
-                            # Mensagem
-                            'GPTZero_Mensagem': gpt_zero_result['documento']['mensagem_resultado'],
-                            
-                            # Sentenças destacadas
-                            'GPTZero_Sentencas_Destacadas': '; '.join([
-                                s['texto'] for s in gpt_zero_result['sentencas'] 
-                                if s['destacar_ia']
-                            ])
-                        })
-                        break  # Sucesso, sai do loop de tentativas
-                    except Exception as e:
-                        self.logger.error(f"Tentativa {tentativa + 1} falhou para GPTZero em {nome_livro}: {str(e)}")
-                        if tentativa == max_tentativas - 1:  # Última tentativa
-                            self.logger.error(f"Todas as tentativas falharam para GPTZero em {nome_livro}")
-                            resultado.update({
-                                'GPTZero_Versao': None,
-                                'GPTZero_ScanID': None,
-                                'GPTZero_Prob_Media_IA': -1,
-                                'GPTZero_Prob_IA': -1,
-                                'GPTZero_Prob_Humano': -1,
-                                'GPTZero_Prob_Misto': -1,
-                                'GPTZero_Categoria_Confianca': None,
-                                'GPTZero_Pontuacao_Confianca': -1,
-                                'GPTZero_Classe_Prevista': None,
-                                'GPTZero_Classificacao': None,
-                                'GPTZero_Mensagem': None,
-                                'GPTZero_Sentencas_Destacadas': None
-                            })
-                        else:
-                            sleep(5)  # Espera 5 segundos antes de tentar novamente
-                
-                # Análise ZeroGPT com retry
-                for tentativa in range(max_tentativas):
-                    try:
-                        zero_gpt_result = self.zero_gpt.analisar_texto(texto)
-                        # Formata as sentenças IA para exibição no Excel
-                        sentencas_ia = zero_gpt_result['sentencas_ia']
-                        if sentencas_ia:
-                            sentencas_formatadas = [
-                                f"{i+1}. {str(sentenca).strip().replace('[', '(').replace(']', ')')}"
-                                for i, sentenca in enumerate(sentencas_ia)
-                            ]
-                            texto_sentencas = "\n".join(sentencas_formatadas)
-                        else:
-                            texto_sentencas = "Nenhuma sentença identificada como IA"
-                        
-                        resultado.update({
-                            'ZeroGPT_Sucesso': zero_gpt_result['success'],
-                            'ZeroGPT_Total_Palavras': zero_gpt_result['total_palavras'],
-                            'ZeroGPT_Palavras_IA': zero_gpt_result['palavras_ia'],
-                            'ZeroGPT_Porcentagem_IA': zero_gpt_result['porcentagem_ia'],
-                            'ZeroGPT_Sentencas_IA': texto_sentencas,  # Sentenças formatadas
-                            'ZeroGPT_Feedback': zero_gpt_result['feedback'],
-                            'ZeroGPT_Mensagem': zero_gpt_result['mensagem']
-                        })
-                        break  # Sucesso, sai do loop de tentativas
-                    except Exception as e:
-                        self.logger.error(f"Tentativa {tentativa + 1} falhou para ZeroGPT em {nome_livro}: {str(e)}")
-                        if tentativa == max_tentativas - 1:  # Última tentativa
-                            self.logger.error(f"Todas as tentativas falharam para ZeroGPT em {nome_livro}")
-                            resultado.update({
-                                'ZeroGPT_Sucesso': None,
-                                'ZeroGPT_Total_Palavras': None,
-                                'ZeroGPT_Palavras_IA': None,
-                                'ZeroGPT_Porcentagem_IA': None,
-                                'ZeroGPT_Sentencas_IA': None,
-                                'ZeroGPT_Feedback': None,
-                                'ZeroGPT_Mensagem': None
-                            })
-                        else:
-                            sleep(5)  # Espera 5 segundos antes de tentar novamente
-                
-                # Adiciona delay entre textos
-                sleep(1)
+                resultado.update(self.analisar_gptzero(nome_livro, texto))
+                resultado.update(self.analisar_zerogpt(nome_livro, texto))
                 resultados.append(resultado)
-            
-            # Delay entre lotes
-            if i + tamanho_lote < len(resumos):
-                self.logger.info("Aguardando 5 segundos antes do próximo lote...")
-                sleep(5)
         
         return resultados
+    
+    @cronometro_detector('gpt_zero')
+    def analisar_gptzero(self, nome_livro: str, texto: str) -> Dict:
+        """
+        Analisa um texto no GPTZero (com retry) e retorna as colunas GPTZero_* do relatório
+        """
+        max_tentativas = 3  # Tentativas por texto (rede e 5xx já são repetidos pelo transporte)
+        
+        for tentativa in range(max_tentativas):
+            try:
+                return self._colunas_gptzero(self.gpt_zero.analisar_texto(texto))
+            except Exception as e:
+                self.logger.error("Tentativa %d falhou para GPTZero em %s: %s", tentativa + 1, nome_livro, e)
+                if _falha_ja_repetida(e):
+                    break
+                if tentativa < max_tentativas - 1:
+                    METRICAS.incrementar('detector_retentativas_total', detector=self.gpt_zero.nome)
+                    sleep(calcular_backoff(tentativa, base=2))  # Backoff exponencial com jitter
+        
+        self.logger.error("Todas as tentativas falharam para GPTZero em %s", nome_livro)
+        METRICAS.incrementar('detector_falhas_total', detector=self.gpt_zero.nome)
+        return {
+            'GPTZero_Versao': None,
+            'GPTZero_ScanID': None,
+            'GPTZero_Prob_Media_IA': -1,
+            'GPTZero_Prob_IA': -1,
+            'GPTZero_Prob_Humano': -1,
+            'GPTZero_Prob_Misto': -1,
+            'GPTZero_Categoria_Confianca': None,
+            'GPTZero_Pontuacao_Confianca': -1,
+            'GPTZero_Classe_Prevista': None,
+            'GPTZero_Classificacao': None,
+            'GPTZero_Mensagem': None,
+            'GPTZero_Sentencas_Destacadas': None,
+            # Lista vazia: a falha também substitui as sentenças de uma análise anterior
+            'Sentencas_GPTZero': []
+        }
+    
+    def analisar_gptzero_lote(self, itens: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Analisa vários (nome_livro, texto) no GPTZero com requisições de vários documentos.
+        Retorna as colunas GPTZero_* de cada item, na mesma ordem. Itens que falharem
+        no lote são reanalisados individualmente (com retry) por analisar_gptzero.
+        """
+        try:
+            resultados = self.gpt_zero.analisar_lote([texto for _, texto in itens])
+        except Exception as e:
+            self.logger.error("Falha no lote GPTZero (%d textos): %s", len(itens), e)
+            resultados = [None] * len(itens)
+        
+        colunas = []
+        for (nome_livro, texto), gpt_zero_result in zip(itens, resultados):
+            if gpt_zero_result is None:
+                colunas.append(self.analisar_gptzero(nome_livro, texto))
+            else:
+                colunas.append(self._colunas_gptzero(gpt_zero_result))
+        return colunas
+    
+    def _colunas_gptzero(self, gpt_zero_result: Dict) -> Dict:
+        """
+        Converte o resultado do GPTZeroDetector nas colunas GPTZero_* do relatório
+        """
+        return {
+            # Metadados
+            'GPTZero_Versao': gpt_zero_result['version'],
+            'GPTZero_ScanID': gpt_zero_result['scan_id'],
+            
+            # Probabilidades principais
+            'GPTZero_Prob_Media_IA': gpt_zero_result['documento']['prob_media_ia'],
+            'GPTZero_Prob_IA': gpt_zero_result['documento']['prob_classes']['ai'],
+            'GPTZero_Prob_Humano': gpt_zero_result['documento']['prob_classes']['human'],
+            'GPTZero_Prob_Misto': gpt_zero_result['documento']['prob_classes']['mixed'],
+            
+            # Confiança e classificação
+            'GPTZero_Categoria_Confianca': gpt_zero_result['documento']['categoria_confianca'],
+            'GPTZero_Pontuacao_Confianca': gpt_zero_result['documento']['pontuacao_confianca'],
+            'GPTZero_Classe_Prevista': gpt_zero_result['documento']['classe_prevista'],
+            'GPTZero_Classificacao': gpt_zero_result['documento']['classificacao_documento'],
+            
+            # Mensagem
+            'GPTZero_Mensagem': gpt_zero_result['documento']['mensagem_resultado'],
+            
+            # Sentenças destacadas
+            'GPTZero_Sentencas_Destacadas': '; '.join([
+                s['texto'] for s in gpt_zero_result['sentencas'] 
+                if s['destacar_ia']
+            ]),
+            
+            # Pontuações por sentença (vão para o ArmazemSentencas, não para o relatório)
+            'Sentencas_GPTZero': [
+                [s['texto'], s['prob_ia'], s['perplexidade'], s['destacar_ia']]
+                for s in gpt_zero_result['sentencas']
+            ]
+        }
+    
+    @cronometro_detector('zero_gpt')
+    def analisar_zerogpt(self, nome_livro: str, texto: str) -> Dict:
+        """
+        Analisa um texto no ZeroGPT (com retry) e retorna as colunas ZeroGPT_* do relatório
+        """
+        max_tentativas = 3  # Tentativas por texto (rede e 5xx já são repetidos pelo transporte)
+        
+        for tentativa in range(max_tentativas):
+            try:
+                zero_gpt_result = self.zero_gpt.analisar_texto(texto)
+                # Formata as sentenças IA para exibição no Excel
+                sentencas_ia = zero_gpt_result['sentencas_ia']
+                if sentencas_ia:
+                    sentencas_formatadas = [
+                        f"{i+1}. {str(sentenca).strip().replace('[', '(').replace(']', ')')}"
+                        for i, sentenca in enumerate(sentencas_ia)
+                    ]
+                    texto_sentencas = "\n".join(sentencas_formatadas)
+                else:
+                    texto_sentencas = "Nenhuma sentença identificada como IA"
+                destacadas = {str(sentenca) for sentenca in sentencas_ia}
+                
+                return {
+                    'ZeroGPT_Sucesso': zero_gpt_result['success'],
+                    'ZeroGPT_Total_Palavras': zero_gpt_result['total_palavras'],
+                    'ZeroGPT_Palavras_IA': zero_gpt_result['palavras_ia'],
+                    'ZeroGPT_Porcentagem_IA': zero_gpt_result['porcentagem_ia'],
+                    'ZeroGPT_Sentencas_IA': texto_sentencas,  # Sentenças formatadas
+                    'ZeroGPT_Feedback': zero_gpt_result['feedback'],
+                    'ZeroGPT_Mensagem': zero_gpt_result['mensagem'],
+                    # Sentenças analisadas e se estão entre as destacadas como IA (para o ArmazemSentencas)
+                    'Sentencas_ZeroGPT': [
+                        [str(sentenca), str(sentenca) in destacadas]
+                        for sentenca in zero_gpt_result['sentencas']
+                    ]
+                }
+            except Exception as e:
+                self.logger.error("Tentativa %d falhou para ZeroGPT em %s: %s", tentativa + 1, nome_livro, e)
+                if _falha_ja_repetida(e):
+                    break
+                if tentativa < max_tentativas - 1:
+                    METRICAS.incrementar('detector_retentativas_total', detector=self.zero_gpt.nome)
+                    sleep(calcular_backoff(tentativa, base=2))  # Backoff exponencial com jitter
+        
+        self.logger.error("Todas as tentativas falharam para ZeroGPT em %s", nome_livro)
+        METRICAS.incrementar('detector_falhas_total', detector=self.zero_gpt.nome)
+        return {
+            'ZeroGPT_Sucesso': None,
+            'ZeroGPT_Total_Palavras': None,
+            'ZeroGPT_Palavras_IA': None,
+            'ZeroGPT_Porcentagem_IA': None,
+            'ZeroGPT_Sentencas_IA': None,
+            'ZeroGPT_Feedback': None,
+            'ZeroGPT_Mensagem': None,
+            'Sentencas_ZeroGPT': []
+        }
+
+def _falha_ja_repetida(erro: Exception) -> bool:
+    """
+    True se a falha já foi repetida pelo transporte (rede, timeout, 5xx) ou pelo limitador de
+    taxa (429): uma nova tentativa aqui multiplicaria as requisições ao mesmo servidor com problema
+    """
+    return isinstance(erro, LimiteTaxaExcedido) or TransporteHTTP.erro_transitorio(erro)
+
+def _nome_livro_relatorio(livro) -> str:
+    # gerar_relatorio_completo remove os colchetes dos nomes dos livros
+    return str(livro).replace('[', '').replace(']', '')
+
+def mesclar_resultados(existentes: List[Dict], novos: List[Dict], livros: List[str]) -> List[Dict]:
+    """
+    Junta os resultados já gravados do participante com resultados novos.
+    Resultados novos substituem as linhas do mesmo livro; a ordem segue a lista de livros
+    (arquivos atuais da pasta) e livros que não estão mais na pasta saem do relatório.
+    """
+    por_livro = {_nome_livro_relatorio(r['Livro']): r for r in existentes}
+    por_livro.update({_nome_livro_relatorio(r['Livro']): r for r in novos})
+    ordem = [_nome_livro_relatorio(livro) for livro in livros]
+    return [por_livro[livro] for livro in ordem if livro in por_livro]
+
+# Estilos compartilhados pelas duas formas de escrever a planilha de análises
+
+# Definição das cores base para o degradê
+VERDE = "63BE7B"  # Verde mais suave
+AMARELO = "FFEB84"
+VERMELHO = "F8696B"  # Vermelho mais suave
+
+# Lista de colunas que usam o degradê padrão (0=verde, 1=vermelho)
+COLUNAS_PROB_IA = [
+    'GPTZero_Prob_Media_IA',  # 0=humano/verde, 1=IA/vermelho
+    'GPTZero_Prob_IA',        # 0=humano/verde, 1=IA/vermelho
+    'GPTZero_Prob_Misto',     # 0=humano/verde, 1=IA/vermelho
+    'ZeroGPT_Porcentagem_IA', # 0=humano/verde, 1=IA/vermelho
+    'Triagem_Prob_IA'         # 0=humano/verde, 1=IA/vermelho
+]
+
+# Lista de colunas que usam o degradê invertido (0=vermelho, 1=verde)
+COLUNAS_PROB_HUMANO = [
+    'GPTZero_Prob_Humano',    # 0=IA/vermelho, 1=humano/verde
+    'GPTZero_Pontuacao_Confianca'  # 0=baixa confiança/vermelho, 1=alta confiança/verde
+]
+
+# Formatação para campos categóricos
+REGRAS_CATEGORIAS = {
+    'GPTZero_Categoria_Confianca': {
+        'high': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
+        'medium': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
+        'low': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
+    },
+    'GPTZero_Classe_Prevista': {
+        'human': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
+        'mixed': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
+        'ai': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
+    },
+    'GPTZero_Classificacao': {
+        'human_only': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
+        'mixed': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
+        'ai_only': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
+    },
+    'ZeroGPT_Feedback': {
+        'your text is human written': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
+        'your text is most likely': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
+        'your text is ai/gpt generated': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
+    }
+}
+
+# Comentários explicativos dos cabeçalhos
+EXPLICACOES_COLUNAS = {
+    # GPTZero - Metadados
+    'GPTZero_Versao': 'Versão do detector GPTZero usado na análise',
+    'GPTZero_ScanID': 'Identificador único do scan. Um scan pode ter múltiplos documentos',
+
+    # GPTZero - Probabilidades
+    'GPTZero_Prob_Media_IA': 'Média das probabilidades de cada sentença ser IA (0-1). Quanto maior, mais provável ser IA',
+    'GPTZero_Prob_IA': 'Probabilidade do texto ser inteiramente IA (0-1). Use junto com Categoria_Confianca',
+    'GPTZero_Prob_Humano': 'Probabilidade do texto ser inteiramente humano (0-1)',
+    'GPTZero_Prob_Misto': 'Probabilidade do texto ser uma mistura de IA e humano (0-1)',
+
+    # GPTZero - Confiança
+    'GPTZero_Categoria_Confianca': '"high" (<1% erro), "medium" (confiança moderada), "low" (baixa confiança)',
+    'GPTZero_Pontuacao_Confianca': 'Score normalizado de confiança (uso interno)',
+
+    # GPTZero - Classificação
+    'GPTZero_Classe_Prevista': '"human" (só humano), "ai" (só IA), "mixed" (mistura)',
+    'GPTZero_Classificacao': '"HUMAN_ONLY" (predominante humano), "MIXED" (misto/fraca IA), "AI_ONLY" (todo IA)',
+    'GPTZero_Mensagem': 'Ex: "highly confident text is written by AI"',
+
+    # GPTZero - Sentenças
+    'GPTZero_Sentencas_Destacadas': 'Sentenças identificadas como prováveis de serem IA',
+
+    # ZeroGPT
+    'ZeroGPT_Sucesso': 'Status da análise: true = sucesso, false = falha',
+    'ZeroGPT_Total_Palavras': 'Contagem total de palavras no texto',
+    'ZeroGPT_Palavras_IA': 'Número de palavras identificadas como IA',
+    'ZeroGPT_Porcentagem_IA': 'Porcentagem (0-100%) do texto identificada como IA. 0% = humano, 100% = IA',
+    'ZeroGPT_Sentencas_IA': 'Lista de sentenças identificadas com maior probabilidade de serem geradas por IA',
+    'ZeroGPT_Feedback': 'Análise detalhada do texto',
+    'ZeroGPT_Mensagem': 'Status e resultado geral da operação',
+
+    # Pré-triagem local
+    'Triagem_Caminho': '"api" (enviado aos detectores), "local_humano" ou "local_ia" (resolvido pela pré-triagem, sem chamar as APIs)',
+    'Triagem_Prob_IA': 'Probabilidade de IA (0-1) estimada localmente pela pré-triagem',
+
+    # Duplicatas
+    'Duplicata_Grupo': 'Número do grupo de resenhas idênticas ou quase idênticas (analisado uma única vez)',
+    'Duplicata_Representante': 'Resenha enviada às APIs; seus resultados valem para todo o grupo',
+    'Duplicata_Similaridade': 'Similaridade (Jaccard, 0-1) com o representante. 1 = texto idêntico',
+    'Duplicata_Outros_Membros': 'Demais resenhas do grupo (participante/livro)'
+}
+
+def _escalas_de_cor() -> Tuple[ColorScaleRule, ColorScaleRule]:
+    # Cria regra de formatação com 100 níveis para IA (0=verde, 1=vermelho)
+    color_scale_ia = ColorScaleRule(
+        start_type='num', start_value=0, start_color=VERDE,
+        mid_type='num', mid_value=0.5, mid_color=AMARELO,
+        end_type='num', end_value=1, end_color=VERMELHO
+    )
 
+    # Cria regra de formatação com 100 níveis para humano (0=vermelho, 1=verde)
+    color_scale_humano = ColorScaleRule(
+        start_type='num', start_value=0, start_color=VERMELHO,
+        mid_type='num', mid_value=0.5, mid_color=AMARELO,
+        end_type='num', end_value=1, end_color=VERDE
+    )
+    return color_scale_ia, color_scale_humano
+
+def _largura_coluna(column: str) -> int:
+    if column == 'Livro':
+        return 30
+    elif column == 'Resenha':
+        return 50
+    elif column == 'ZeroGPT_Sentencas_IA':  # Coluna específica para sentenças
+        return 60  # Largura maior para acomodar as sentenças
+    elif column in ('Duplicata_Representante', 'Duplicata_Outros_Membros'):
+        return 40
+    elif 'Mensagem' in column or 'Feedback' in column:
+        return 30
+    return 15
+
+
+def _escrever_planilha_streaming(df: pd.DataFrame, excel_file: Path):
+    """
+    Escreve a planilha de análises no modo write-only do openpyxl, com o mesmo resultado
+    visual da escrita original (pandas + estilos célula a célula, em benchmark_relatorio.py).
+    Larguras, painel congelado e escalas de cor são definidos por coluna/faixa antes das
+    linhas; cada estilo é criado uma vez e as linhas são gravadas em fluxo, com cada célula
+    já no estilo final (nenhuma é revisitada).
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Análises')
+    colunas = [str(column) for column in df.columns]
+    ultima_linha = len(df) + 1
+    
+    # Propriedades de colunas e faixas (no modo write-only precisam vir antes das linhas)
+    for idx, column in enumerate(colunas):
+        worksheet.column_dimensions[get_column_letter(idx + 1)].width = _largura_coluna(column)
+    worksheet.freeze_panes = 'A2'
+    
+    color_scale_ia, color_scale_humano = _escalas_de_cor()
+    for colunas_escala, escala in ((COLUNAS_PROB_IA, color_scale_ia), (COLUNAS_PROB_HUMANO, color_scale_humano)):
+        for col in colunas_escala:
+            if col in colunas:
+                col_letter = get_column_letter(colunas.index(col) + 1)
+                worksheet.conditional_formatting.add(f"{col_letter}2:{col_letter}{ultima_linha}", escala)
+    
+    # Cabeçalho: fundo azul (GPTZero) ou verde (ZeroGPT) com fonte branca, e comentários explicativos
+    fonte_cabecalho = Font(bold=True)
+    fonte_cabecalho_api = Font(bold=True, color="FFFFFF")
+    preenchimento_api = {
+        'GPTZero': PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        'ZeroGPT': PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
+    }
+    borda_cabecalho = Border(left=Side(style='thin'), right=Side(style='thin'),
+                             top=Side(style='thin'), bottom=Side(style='thin'))
+    alinhamento_cabecalho = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    
+    cabecalho = []
+    for column in colunas:
+        cell = WriteOnlyCell(worksheet, value=column)
+        cell.border = borda_cabecalho
+        cell.alignment = alinhamento_cabecalho
+        cell.font = fonte_cabecalho
+        for prefixo, preenchimento in preenchimento_api.items():
+            if column.startswith(prefixo):
+                cell.font = fonte_cabecalho_api
+                cell.fill = preenchimento
+        if column in EXPLICACOES_COLUNAS:
+            cell.comment = openpyxl.comments.Comment(EXPLICACOES_COLUNAS[column], 'Detector IA')
+        cabecalho.append(cell)
+    worksheet.append(cabecalho)
+    
+    # Linhas de dados: bordas laterais, números à direita, sentenças no topo com quebra de linha
+    borda = Border(left=Side(style='thin'), right=Side(style='thin'))
+    alinhamentos = {
+        'texto': Alignment(vertical='center'),
+        'numero': Alignment(horizontal='right', vertical='center'),
+        'sentencas': Alignment(vertical='top', wrap_text=True, shrink_to_fit=True)
+    }
+    regras_por_indice = [REGRAS_CATEGORIAS.get(column) for column in colunas]
+    indice_sentencas = colunas.index('ZeroGPT_Sentencas_IA') if 'ZeroGPT_Sentencas_IA' in colunas else None
+    
+    # Atribuir estilos célula a célula é o passo mais caro do openpyxl (cada atribuição
+    # procura o estilo na tabela do workbook); cada combinação vira um estilo nomeado,
+    # registrado uma vez com a fonte e o formato padrão, e as células recebem só o nome
+    estilos = {}
+    
+    def estilo(alinhamento: str, fill) -> str:
+        chave = (alinhamento, id(fill))
+        if chave not in estilos:
+            nome = f"Análise {len(estilos) + 1}"
+            workbook.add_named_style(NamedStyle(
+                name=nome, font=copy(DEFAULT_FONT), border=borda, alignment=alinhamentos[alinhamento],
+                fill=fill, number_format='General'
+            ))
+            estilos[chave] = nome
+        return estilos[chave]
+    
+    # Mesmos valores que o pandas grava: tipos nativos do Python e células vazias no lugar de NaN
+    valores = df.astype(object).where(df.notna(), None)
+    for row_idx, linha in enumerate(valores.itertuples(index=False, name=None), start=2):
+        worksheet.row_dimensions[row_idx].height = 15  # Altura fixa pequena
+        celulas = []
+        for idx, valor in enumerate(linha):
+            if idx == indice_sentencas:
+                alinhamento = 'sentencas'
+            elif isinstance(valor, (int, float)):
+                alinhamento = 'numero'
+            else:
+                alinhamento = 'texto'
+            
+            fill = None
+            regras = regras_por_indice[idx]
+            if regras and valor:
+                texto = str(valor).lower()
+                # Verifica se o valor começa com alguma das chaves (para match parcial)
+                for key, regra_fill in regras.items():
+                    if texto.startswith(key):
+                        fill = regra_fill
+                        break
+            cell = WriteOnlyCell(worksheet, value=valor)
+            cell.style = estilo(alinhamento, fill)
+            celulas.append(cell)
+        worksheet.append(celulas)
+    
+    workbook.save(excel_file)
+
+
+@etapa('gerar_relatorio_completo')
 def gerar_relatorio_completo(resultados_participante: List[Dict], pasta_base: Path, participante: str):
     logger = logging.getLogger('detector_ia')
     pasta_relatórios = pasta_base / "Relatórios"
@@ -151,8 +469,8 @@ def gerar_relatorio_completo(resultados_participante: List[Dict], pasta_base: Pa
         for resultado in resultados_participante:
             resultado['Livro'] = resultado['Livro'].replace('[', '').replace(']', '')
         
-        # Cria o DataFrame
-        df = pd.DataFrame(resultados_participante)
+        # Cria o DataFrame (as sentenças de cada detector ficam fora do relatório)
+        df = pd.DataFrame(resultados_participante).drop(columns=CHAVES_SENTENCAS, errors='ignore')
         
         # Renomeia as colunas
         df = df.rename(columns={
@@ -162,242 +480,9 @@ def gerar_relatorio_completo(resultados_participante: List[Dict], pasta_base: Pa
         
         excel_file = pasta_relatórios / f"relatório_{participante}.xlsx"
         
-        # Configura a largura das colunas e adiciona comentários explicativos
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Análises')
-            worksheet = writer.sheets['Análises']
-            
-            # Estilos
-            header_font = Font(bold=True, color="FFFFFF")  # Fonte branca para cabeçalhos
-            gptzero_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")  # Azul para GPTZero
-            zerogpt_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")  # Verde para ZeroGPT
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            # Aplica estilos aos cabeçalhos
-            for idx, column in enumerate(df.columns):
-                col_letter = get_column_letter(idx + 1)
-                cell = worksheet[f"{col_letter}1"]
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                cell.font = Font(bold=True)  # Fonte preta em negrito por padrão
-                
-                # Aplica cor branca e fundo colorido apenas para colunas das APIs
-                if column.startswith('GPTZero'):
-                    cell.font = header_font  # Fonte branca
-                    cell.fill = gptzero_fill
-                elif column.startswith('ZeroGPT'):
-                    cell.font = header_font  # Fonte branca
-                    cell.fill = zerogpt_fill
-            
-            # Definição das cores base para o degradê
-            VERDE = "63BE7B"  # Verde mais suave
-            AMARELO = "FFEB84"
-            VERMELHO = "F8696B"  # Vermelho mais suave
-
-            # Lista de colunas que usam o degradê padrão (0=verde, 1=vermelho)
-            prob_columns_ia = [
-                'GPTZero_Prob_Media_IA',  # 0=humano/verde, 1=IA/vermelho
-                'GPTZero_Prob_IA',        # 0=humano/verde, 1=IA/vermelho
-                'GPTZero_Prob_Misto',     # 0=humano/verde, 1=IA/vermelho
-                'ZeroGPT_Porcentagem_IA'  # 0=humano/verde, 1=IA/vermelho
-            ]
-
-            # Lista de colunas que usam o degradê invertido (0=vermelho, 1=verde)
-            prob_columns_humano = [
-                'GPTZero_Prob_Humano',    # 0=IA/vermelho, 1=humano/verde
-                'GPTZero_Pontuacao_Confianca'  # 0=baixa confiança/vermelho, 1=alta confiança/verde
-            ]
-
-            # Formatação para campos categóricos
-            categoria_rules = {
-                'GPTZero_Categoria_Confianca': {
-                    'high': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
-                    'medium': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
-                    'low': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
-                },
-                'GPTZero_Classe_Prevista': {
-                    'human': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
-                    'mixed': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
-                    'ai': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
-                },
-                'GPTZero_Classificacao': {
-                    'human_only': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
-                    'mixed': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
-                    'ai_only': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
-                },
-                'ZeroGPT_Feedback': {
-                    'your text is human written': PatternFill(start_color=VERDE, end_color=VERDE, fill_type="solid"),
-                    'your text is most likely': PatternFill(start_color=AMARELO, end_color=AMARELO, fill_type="solid"),
-                    'your text is ai/gpt generated': PatternFill(start_color=VERMELHO, end_color=VERMELHO, fill_type="solid")
-                }
-            }
-
-            # Aplica formatação para campos categóricos
-            for col, regras in categoria_rules.items():
-                if col in df.columns:
-                    col_letter = get_column_letter(df.columns.get_loc(col) + 1)
-                    for row_idx in range(2, len(df) + 2):  # Começa da linha 2 (após cabeçalho)
-                        cell = worksheet[f"{col_letter}{row_idx}"]
-                        valor = str(cell.value).lower() if cell.value else ''
-                        # Verifica se o valor começa com alguma das chaves (para match parcial)
-                        for key, fill in regras.items():
-                            if valor.startswith(key):
-                                cell.fill = fill
-                                break
-            
-            # Cria regra de formatação com 100 níveis para IA (0=verde, 1=vermelho)
-            color_scale_ia = ColorScaleRule(
-                start_type='num', start_value=0, start_color=VERDE,
-                mid_type='num', mid_value=0.5, mid_color=AMARELO,
-                end_type='num', end_value=1, end_color=VERMELHO
-            )
-
-            # Cria regra de formatação com 100 níveis para humano (0=vermelho, 1=verde)
-            color_scale_humano = ColorScaleRule(
-                start_type='num', start_value=0, start_color=VERMELHO,
-                mid_type='num', mid_value=0.5, mid_color=AMARELO,
-                end_type='num', end_value=1, end_color=VERDE
-            )
-
-            # Aplica formatação para indicadores de IA
-            for col in prob_columns_ia:
-                if col in df.columns:
-                    col_letter = get_column_letter(df.columns.get_loc(col) + 1)
-                    worksheet.conditional_formatting.add(
-                        f"{col_letter}2:{col_letter}{len(df)+1}",
-                        color_scale_ia
-                    )
-
-            # Aplica formatação para indicadores humanos
-            for col in prob_columns_humano:
-                if col in df.columns:
-                    col_letter = get_column_letter(df.columns.get_loc(col) + 1)
-                    worksheet.conditional_formatting.add(
-                        f"{col_letter}2:{col_letter}{len(df)+1}",
-                        color_scale_humano
-                    )
-            
-            # Ajusta largura das colunas
-            for idx, column in enumerate(df.columns):
-                col_letter = get_column_letter(idx + 1)
-                if column == 'Livro':
-                    width = 30
-                elif column == 'Resenha':
-                    width = 50
-                elif column == 'ZeroGPT_Sentencas_IA':  # Coluna específica para sentenças
-                    width = 60  # Largura maior para acomodar as sentenças
-                elif 'Mensagem' in column or 'Feedback' in column:
-                    width = 30
-                else:
-                    width = 15
-                worksheet.column_dimensions[col_letter].width = width
-            
-            # Ajusta altura das linhas para serem pequenas
-            for row_idx in range(2, len(df) + 2):  # Começa da linha 2 (após cabeçalho)
-                worksheet.row_dimensions[row_idx].height = 15  # Altura fixa pequena
-            
-            # Congela o painel para manter cabeçalhos visíveis
-            worksheet.freeze_panes = 'A2'
-            
-            # Alinhamento para todas as células
-            for row in worksheet.iter_rows(min_row=2):
-                for cell in row:
-                    cell.alignment = Alignment(vertical='center')
-                    if isinstance(cell.value, (int, float)):
-                        cell.alignment = Alignment(horizontal='right', vertical='center')
-                    cell.border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin')
-                    )
-            
-            # Adiciona comentários explicativos
-            explicacoes = {
-                # GPTZero - Metadados
-                'GPTZero_Versao': 'Versão do detector GPTZero usado na análise',
-                'GPTZero_ScanID': 'Identificador único do scan. Um scan pode ter múltiplos documentos',
-                
-                # GPTZero - Probabilidades
-                'GPTZero_Prob_Media_IA': 'Média das probabilidades de cada sentença ser IA (0-1). Quanto maior, mais provável ser IA',
-                'GPTZero_Prob_IA': 'Probabilidade do texto ser inteiramente IA (0-1). Use junto com Categoria_Confianca',
-                'GPTZero_Prob_Humano': 'Probabilidade do texto ser inteiramente humano (0-1)',
-                'GPTZero_Prob_Misto': 'Probabilidade do texto ser uma mistura de IA e humano (0-1)',
-                
-                # GPTZero - Confiança
-                'GPTZero_Categoria_Confianca': '"high" (<1% erro), "medium" (confiança moderada), "low" (baixa confiança)',
-                'GPTZero_Pontuacao_Confianca': 'Score normalizado de confiança (uso interno)',
-                
-                # GPTZero - Classificação
-                'GPTZero_Classe_Prevista': '"human" (só humano), "ai" (só IA), "mixed" (mistura)',
-                'GPTZero_Classificacao': '"HUMAN_ONLY" (predominante humano), "MIXED" (misto/fraca IA), "AI_ONLY" (todo IA)',
-                'GPTZero_Mensagem': 'Ex: "highly confident text is written by AI"',
-                
-                # GPTZero - Sentenças
-                'GPTZero_Sentencas_Destacadas': 'Sentenças identificadas como prováveis de serem IA',
-                
-                # ZeroGPT
-                'ZeroGPT_Sucesso': 'Status da análise: true = sucesso, false = falha',
-                'ZeroGPT_Total_Palavras': 'Contagem total de palavras no texto',
-                'ZeroGPT_Palavras_IA': 'Número de palavras identificadas como IA',
-                'ZeroGPT_Porcentagem_IA': 'Porcentagem (0-100%) do texto identificada como IA. 0% = humano, 100% = IA',
-                'ZeroGPT_Sentencas_IA': 'Lista de sentenças identificadas com maior probabilidade de serem geradas por IA',
-                'ZeroGPT_Feedback': 'Análise detalhada do texto',
-                'ZeroGPT_Mensagem': 'Status e resultado geral da operação'
-            }
-            
-            # Adiciona comentários nas células
-            for idx, (coluna, explicacao) in enumerate(explicacoes.items()):
-                if coluna in df.columns:  # Só adiciona se a coluna existir
-                    col_letter = get_column_letter(df.columns.get_loc(coluna) + 1)
-                    cell = worksheet[f"{col_letter}1"]
-                    cell.comment = openpyxl.comments.Comment(
-                        explicacao,
-                        'Detector IA'
-                    )
-            
-            # Alinhamento especial para a coluna de sentenças
-            if 'ZeroGPT_Sentencas_IA' in df.columns:
-                col_letter = get_column_letter(df.columns.get_loc('ZeroGPT_Sentencas_IA') + 1)
-                for cell in worksheet[col_letter]:
-                    if cell.row > 1:  # Pula o cabeçalho
-                        cell.alignment = Alignment(
-                            vertical='top',
-                            wrap_text=True,
-                            shrink_to_fit=True  # Adiciona shrink_to_fit para ajudar a manter o texto na linha pequena
-                        )
-        
-        # Após gerar o Excel, cria o gráfico de dispersão individual
-        df_analise = pd.DataFrame(resultados_participante)
-        
-        plt.figure(figsize=(10, 8))
-        plt.scatter(df_analise['GPTZero_Prob_IA'], df_analise['ZeroGPT_Porcentagem_IA'])
-        
-        # Adiciona rótulos para cada ponto (nome do livro)
-        for i, livro in enumerate(df_analise['Livro']):
-            plt.annotate(livro, 
-                       (df_analise['GPTZero_Prob_IA'].iloc[i], 
-                        df_analise['ZeroGPT_Porcentagem_IA'].iloc[i]),
-                       fontsize=8)
-        
-        plt.xlabel('GPTZero_Prob_IA')
-        plt.ylabel('ZeroGPT_Porcentagem_IA')
-        plt.title(f'Comparação entre Detectores - {participante}')
-        plt.grid(True)
-        
-        # Define limites fixos para os eixos
-        plt.xlim(0, 1)  # GPTZero vai de 0 a 1
-        plt.ylim(0, 100)  # ZeroGPT vai de 0 a 100
-        
-        # Salva o gráfico na mesma pasta do Excel
-        arquivo_grafico = pasta_relatórios / f"grafico_dispersao_{participante}.png"
-        plt.savefig(arquivo_grafico, bbox_inches='tight', dpi=300)
-        plt.close()
+        _escrever_planilha_streaming(df, excel_file)
         
-        logger.info(f"Gráfico de dispersão gerado para {participante}: {arquivo_grafico}")
+        logger.info(f"Relatório gerado para {participante}: {excel_file}")
         
     except Exception as e:
         logger.error(f"Erro ao gerar relatório para {participante}: {str(e)}", exc_info=True) 
\ No newline at end of file
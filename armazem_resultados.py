@@ -0,0 +1,246 @@
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+
+# Esquema das resenhas analisadas: (coluna, tipo SQL). Os nomes são as chaves dos
+# resultados de AnalisadorIA / MotorAssincrono, na ordem das colunas dos relatórios.
+ESQUEMA_RESENHAS = [
+    ('Livro', 'TEXT NOT NULL'),
+    ('Texto_Normalizado', 'TEXT'),
+    ('GPTZero_Versao', 'TEXT'),
+    ('GPTZero_ScanID', 'TEXT'),
+    ('GPTZero_Prob_Media_IA', 'REAL'),
+    ('GPTZero_Prob_IA', 'REAL'),
+    ('GPTZero_Prob_Humano', 'REAL'),
+    ('GPTZero_Prob_Misto', 'REAL'),
+    ('GPTZero_Categoria_Confianca', 'TEXT'),
+    ('GPTZero_Pontuacao_Confianca', 'REAL'),
+    ('GPTZero_Classe_Prevista', 'TEXT'),
+    ('GPTZero_Classificacao', 'TEXT'),
+    ('GPTZero_Mensagem', 'TEXT'),
+    ('GPTZero_Sentencas_Destacadas', 'TEXT'),
+    ('ZeroGPT_Sucesso', 'BOOLEAN'),
+    ('ZeroGPT_Total_Palavras', 'INTEGER'),
+    ('ZeroGPT_Palavras_IA', 'INTEGER'),
+    ('ZeroGPT_Porcentagem_IA', 'REAL'),
+    ('ZeroGPT_Sentencas_IA', 'TEXT'),
+    ('ZeroGPT_Feedback', 'TEXT'),
+    ('ZeroGPT_Mensagem', 'TEXT'),
+    ('Triagem_Caminho', 'TEXT'),
+    ('Triagem_Prob_IA', 'REAL'),
+    ('Duplicata_Grupo', 'INTEGER'),
+    ('Duplicata_Representante', 'TEXT'),
+    ('Duplicata_Similaridade', 'REAL'),
+    ('Duplicata_Outros_Membros', 'TEXT'),
+]
+COLUNAS_RESENHAS = [coluna for coluna, _ in ESQUEMA_RESENHAS]
+_COLUNAS_BOOLEANAS = {coluna for coluna, tipo in ESQUEMA_RESENHAS if tipo == 'BOOLEAN'}
+_COLUNAS_NUMERICAS = {coluna for coluna, tipo in ESQUEMA_RESENHAS if tipo in ('REAL', 'INTEGER')}
+
+# Colunas que só aparecem no relatório quando preenchidas
+_COLUNAS_OPCIONAIS = {'Triagem_Caminho', 'Triagem_Prob_IA', 'Duplicata_Grupo', 'Duplicata_Representante',
+                      'Duplicata_Similaridade', 'Duplicata_Outros_Membros'}
+
+def _valor_sql(valor: Any) -> Any:
+    # Converte escalares numpy (vindos de planilhas) e NaN para tipos que o sqlite3 aceita
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+class ArmazemResultados:
+    """
+    Armazenamento canônico (SQLite, Resumos/resultados.sqlite) de todas as resenhas analisadas.
+
+    Cada resenha é uma linha com colunas tipadas (ESQUEMA_RESENHAS), identificada por
+    (Participante, Livro) e com a posição da resenha no relatório do participante. A
+    consolidação e os gráficos leem daqui; as planilhas .xlsx são apenas apresentação.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self.logger = logging.getLogger('detector_ia')
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # no modo em fluxo os relatórios são gravados em outra thread
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+
+        definicoes = ',\n'.join(f'"{coluna}" {tipo}' for coluna, tipo in ESQUEMA_RESENHAS)
+        self._conexao.executescript(f"""
+            CREATE TABLE IF NOT EXISTS participantes (
+                Participante TEXT PRIMARY KEY,
+                atualizado_em REAL NOT NULL,
+                impressao TEXT
+            );
+            CREATE TABLE IF NOT EXISTS resumos_consolidados (
+                Participante TEXT PRIMARY KEY,
+                impressao TEXT NOT NULL,
+                metricas TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS resenhas (
+                Participante TEXT NOT NULL,
+                Posicao INTEGER NOT NULL,
+                {definicoes},
+                PRIMARY KEY (Participante, Livro)
+            );
+        """)
+        # Bancos criados por versões anteriores ganham as colunas novas do esquema
+        if 'impressao' not in {linha[1] for linha in self._conexao.execute('PRAGMA table_info(participantes)')}:
+            self._conexao.execute('ALTER TABLE participantes ADD COLUMN impressao TEXT')
+        existentes = {linha[1] for linha in self._conexao.execute('PRAGMA table_info(resenhas)')}
+        for coluna, tipo in ESQUEMA_RESENHAS:
+            if coluna not in existentes:
+                self._conexao.execute(f'ALTER TABLE resenhas ADD COLUMN "{coluna}" {tipo.replace(" NOT NULL", "")}')
+        self._conexao.commit()
+
+    def gravar_participante(self, participante: str, resultados: List[Dict]):
+        """
+        Substitui todas as resenhas do participante pelos resultados informados (na ordem do relatório)
+        """
+        colunas = ', '.join(f'"{coluna}"' for coluna in ['Participante', 'Posicao'] + COLUNAS_RESENHAS)
+        marcadores = ', '.join('?' * (len(COLUNAS_RESENHAS) + 2))
+        linhas = [
+            [participante, posicao] + [_valor_sql(resultado.get(coluna)) for coluna in COLUNAS_RESENHAS]
+            for posicao, resultado in enumerate(resultados)
+        ]
+        # Impressão do conteúdo gravado: muda só quando as resenhas do participante mudam
+        impressao = hashlib.sha256(
+            json.dumps(linhas, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM resenhas WHERE Participante = ?", (participante,))
+            self._conexao.executemany(f"INSERT INTO resenhas ({colunas}) VALUES ({marcadores})", linhas)
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO participantes (Participante, atualizado_em, impressao) VALUES (?, ?, ?)",
+                (participante, time(), impressao)
+            )
+
+    def participantes(self) -> List[str]:
+        with self._lock:
+            return [linha[0] for linha in
+                    self._conexao.execute("SELECT Participante FROM participantes ORDER BY Participante")]
+
+    def atualizacoes(self) -> Dict[str, float]:
+        """
+        Data (epoch) da última gravação de cada participante
+        """
+        with self._lock:
+            return dict(self._conexao.execute("SELECT Participante, atualizado_em FROM participantes"))
+
+    def impressoes(self) -> Dict[str, str]:
+        """
+        Impressão do conteúdo gravado de cada participante (bancos antigos: data da gravação)
+        """
+        with self._lock:
+            return {
+                participante: impressao or f"gravado-{atualizado_em!r}"
+                for participante, atualizado_em, impressao in self._conexao.execute(
+                    "SELECT Participante, atualizado_em, impressao FROM participantes ORDER BY Participante")
+            }
+
+    def resumos_consolidados(self) -> Dict[str, Tuple[str, Dict]]:
+        """
+        Linhas do relatório consolidado já calculadas: {participante: (impressão, métricas)}
+        """
+        with self._lock:
+            return {
+                participante: (impressao, json.loads(metricas))
+                for participante, impressao, metricas in self._conexao.execute(
+                    "SELECT Participante, impressao, metricas FROM resumos_consolidados")
+            }
+
+    def gravar_resumos_consolidados(self, resumos: Dict[str, Tuple[str, Dict]], participantes: Iterable[str]):
+        """
+        Grava as linhas recalculadas e descarta as de participantes fora de `participantes`
+        """
+        manter = set(participantes)
+        with self._lock, self._conexao:
+            removidos = [(p,) for (p,) in self._conexao.execute("SELECT Participante FROM resumos_consolidados")
+                         if p not in manter]
+            self._conexao.executemany("DELETE FROM resumos_consolidados WHERE Participante = ?", removidos)
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO resumos_consolidados (Participante, impressao, metricas) VALUES (?, ?, ?)",
+                [(p, impressao, json.dumps(metricas, ensure_ascii=False, default=_valor_sql))
+                 for p, (impressao, metricas) in resumos.items()]
+            )
+
+    def carregar(self, colunas: Optional[Iterable[str]] = None,
+                 participantes: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Resenhas como DataFrame (coluna Participante + colunas pedidas, todas por padrão),
+        em ordem de participante e posição no relatório
+        """
+        colunas = list(colunas) if colunas is not None else COLUNAS_RESENHAS
+        desconhecidas = [coluna for coluna in colunas if coluna not in COLUNAS_RESENHAS]
+        if desconhecidas:
+            raise ValueError(f"Colunas fora do esquema: {desconhecidas}")
+
+        consulta = "SELECT Participante, " + ', '.join(f'"{coluna}"' for coluna in colunas) + " FROM resenhas"
+        parametros: List[str] = []
+        if participantes is not None:
+            parametros = list(participantes)
+            consulta += f" WHERE Participante IN ({', '.join('?' * len(parametros))})"
+        consulta += " ORDER BY Participante, Posicao"
+
+        with self._lock:
+            linhas = self._conexao.execute(consulta, parametros).fetchall()
+        df = pd.DataFrame.from_records(linhas, columns=['Participante'] + colunas)
+        # Colunas numéricas sempre como números (NaN onde vazio), como no pd.read_excel
+        for coluna in _COLUNAS_NUMERICAS.intersection(colunas):
+            df[coluna] = pd.to_numeric(df[coluna])
+        for coluna in _COLUNAS_BOOLEANAS.intersection(colunas):
+            df[coluna] = df[coluna].map({1: True, 0: False}, na_action='ignore')
+        return df
+
+    def resultados_participante(self, participante: str) -> List[Dict]:
+        """
+        Resenhas gravadas do participante no formato dos resultados da análise
+        """
+        df = self.carregar(participantes=[participante]).drop(columns='Participante')
+        resultados = df.astype(object).where(df.notna(), None).to_dict('records')
+        for resultado in resultados:
+            for coluna in _COLUNAS_OPCIONAIS:
+                if resultado.get(coluna) is None:
+                    resultado.pop(coluna, None)
+        return resultados
+
+    def importar_relatorios(self, pasta_relatorios: Path) -> int:
+        """
+        Popula o armazenamento a partir das planilhas relatório_*.xlsx existentes
+        (migração de execuções anteriores ao armazenamento). Retorna o número de participantes.
+        """
+        importados = 0
+        for arquivo in sorted(Path(pasta_relatorios).glob('relatório_*.xlsx')):
+            participante = arquivo.stem.replace('relatório_', '')
+            try:
+                df = pd.read_excel(arquivo, sheet_name=0, dtype={'Livro/curso': str})
+            except Exception as e:
+                self.logger.warning(f"Relatório {arquivo} não importado: {str(e)}")
+                continue
+            df = df.rename(columns={'Livro/curso': 'Livro', 'Resenha': 'Texto_Normalizado'})
+            self.gravar_participante(participante, df.to_dict('records'))
+            importados += 1
+        if importados:
+            self.logger.info(f"{importados} relatórios importados para {self.caminho}")
+        return importados
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+def abrir_armazem(pasta_relatorios: Path) -> ArmazemResultados:
+    """
+    Abre o armazenamento ao lado da pasta de relatórios (Resumos/resultados.sqlite).
+    Se ainda estiver vazio, importa os relatórios .xlsx já existentes.
+    """
+    armazem = ArmazemResultados(Path(pasta_relatorios).parent / "resultados.sqlite")
+    if not armazem.participantes():
+        armazem.importar_relatorios(pasta_relatorios)
+    return armazem
@@ -0,0 +1,281 @@
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Chaves dos resultados de AnalisadorIA com as sentenças de cada detector (não vão para o relatório):
+#   Sentencas_GPTZero: [[texto, prob_ia, perplexidade, destacar_ia], ...]
+#   Sentencas_ZeroGPT: [[texto, destacada], ...]
+CHAVES_SENTENCAS = ['Sentencas_GPTZero', 'Sentencas_ZeroGPT']
+
+DETECTORES = ['GPTZero', 'ZeroGPT']  # valor da coluna detector é o índice nesta lista
+
+# Colunas de cada sentença e seus tipos
+_TIPOS = {
+    'resenha': np.int32,       # índice em livros (dentro do bloco do participante)
+    'detector': np.int8,
+    'inicio': np.int32,        # posição da sentença no texto normalizado (-1: não localizada)
+    'fim': np.int32,
+    'prob_ia': np.float32,     # NaN no ZeroGPT, que não dá probabilidade por sentença
+    'perplexidade': np.float32,
+    'destacada': np.bool_,
+}
+
+def _localizar(texto: str, sentencas: List[str]) -> Tuple[List[int], List[int]]:
+    """
+    Posições (início, fim) de cada sentença no texto, procurando em ordem a partir da anterior
+    """
+    inicios, fins = [], []
+    posicao = 0
+    for sentenca in sentencas:
+        sentenca = str(sentenca).strip()
+        inicio = texto.find(sentenca, posicao) if sentenca else -1
+        if inicio < 0 and sentenca:
+            inicio = texto.find(sentenca)  # a API pode devolver as sentenças fora de ordem
+        if inicio < 0:
+            inicios.append(-1)
+            fins.append(-1)
+            continue
+        inicios.append(inicio)
+        fins.append(inicio + len(sentenca))
+        posicao = inicio + len(sentenca)
+    return inicios, fins
+
+class BlocoSentencas:
+    """
+    Sentenças de um participante: nomes dos livros e uma coluna numpy por campo de _TIPOS
+    """
+
+    def __init__(self, livros: List[str], colunas: Dict[str, np.ndarray]):
+        self.livros = list(livros)
+        self.colunas = colunas
+
+    @classmethod
+    def vazio(cls) -> 'BlocoSentencas':
+        return cls([], {nome: np.empty(0, dtype=tipo) for nome, tipo in _TIPOS.items()})
+
+    @classmethod
+    def de_resultado(cls, resultado: Dict) -> 'BlocoSentencas':
+        """
+        Converte as sentenças de um resultado de AnalisadorIA (um livro) em colunas
+        """
+        texto = resultado.get('Texto_Normalizado') or ''
+        gptzero = resultado.get('Sentencas_GPTZero') or []
+        zerogpt = resultado.get('Sentencas_ZeroGPT') or []
+
+        inicios_g, fins_g = _localizar(texto, [s[0] for s in gptzero])
+        inicios_z, fins_z = _localizar(texto, [s[0] for s in zerogpt])
+        n_g, n_z = len(gptzero), len(zerogpt)
+        colunas = {
+            'resenha': np.zeros(n_g + n_z, dtype=np.int32),
+            'detector': np.concatenate([np.zeros(n_g, dtype=np.int8), np.ones(n_z, dtype=np.int8)]),
+            'inicio': np.array(inicios_g + inicios_z, dtype=np.int32),
+            'fim': np.array(fins_g + fins_z, dtype=np.int32),
+            'prob_ia': np.array([s[1] for s in gptzero] + [np.nan] * n_z, dtype=np.float32),
+            'perplexidade': np.array([s[2] for s in gptzero] + [np.nan] * n_z, dtype=np.float32),
+            'destacada': np.array([bool(s[3]) for s in gptzero] + [bool(s[1]) for s in zerogpt], dtype=np.bool_),
+        }
+        return cls([resultado['Livro']], colunas)
+
+    def sem_livros(self, livros: Iterable[str]) -> 'BlocoSentencas':
+        """
+        Cópia do bloco sem as sentenças dos livros informados
+        """
+        remover = set(livros)
+        manter = [i for i, livro in enumerate(self.livros) if livro not in remover]
+        if len(manter) == len(self.livros):
+            return self
+        novos_indices = np.full(len(self.livros), -1, dtype=np.int32)
+        novos_indices[manter] = np.arange(len(manter), dtype=np.int32)
+        mascara = novos_indices[self.colunas['resenha']] >= 0
+        colunas = {nome: valores[mascara] for nome, valores in self.colunas.items()}
+        colunas['resenha'] = novos_indices[colunas['resenha']]
+        return BlocoSentencas([self.livros[i] for i in manter], colunas)
+
+    @staticmethod
+    def concatenar(blocos: List['BlocoSentencas']) -> 'BlocoSentencas':
+        livros: List[str] = []
+        partes: Dict[str, List[np.ndarray]] = {nome: [] for nome in _TIPOS}
+        for bloco in blocos:
+            for nome, valores in bloco.colunas.items():
+                partes[nome].append(valores + len(livros) if nome == 'resenha' else valores)
+            livros.extend(bloco.livros)
+        if not blocos:
+            return BlocoSentencas.vazio()
+        return BlocoSentencas(livros, {nome: np.concatenate(valores).astype(_TIPOS[nome], copy=False)
+                                       for nome, valores in partes.items()})
+
+class ArmazemSentencas:
+    """
+    Pontuações por sentença de todos os participantes (Resumos/sentencas.npz).
+
+    Cada sentença é uma linha em colunas numpy tipadas (_TIPOS): livro, detector, posição
+    no texto normalizado, probabilidade e perplexidade do GPTZero e se o detector a destacou
+    como IA. O texto das sentenças não é duplicado; fica no armazenamento de resultados
+    e pode ser recortado pelas posições (adicionar_textos). As consultas rodam vetorizadas
+    sobre todos os participantes, sem chamar as APIs de novo.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self.logger = logging.getLogger('detector_ia')
+        self._lock = threading.Lock()  # no modo em fluxo os relatórios são gravados em outra thread
+        self._blocos: Dict[str, BlocoSentencas] = {}
+        self._coorte: Optional[Tuple[np.ndarray, np.ndarray, BlocoSentencas]] = None
+        self._alterado = False
+
+        if self.caminho.exists():
+            try:
+                self._carregar()
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Sentenças em {self.caminho} ignoradas (ilegíveis): {str(e)}")
+
+    def _carregar(self):
+        with np.load(self.caminho, allow_pickle=False) as dados:
+            participantes = [str(p) for p in dados['participantes']]
+            participante_da_resenha = dados['participante_da_resenha']
+            livros = [str(livro) for livro in dados['livros']]
+            colunas = {nome: dados[nome] for nome in _TIPOS}
+
+        # As linhas estão agrupadas por participante (salvar grava os blocos em sequência)
+        participante_da_linha = participante_da_resenha[colunas['resenha']]
+        limites_linhas = np.searchsorted(participante_da_linha, np.arange(len(participantes) + 1))
+        limites_resenhas = np.searchsorted(participante_da_resenha, np.arange(len(participantes) + 1))
+        for i, participante in enumerate(participantes):
+            linhas = slice(limites_linhas[i], limites_linhas[i + 1])
+            primeira, ultima = limites_resenhas[i], limites_resenhas[i + 1]
+            bloco_colunas = {nome: valores[linhas].copy() for nome, valores in colunas.items()}
+            bloco_colunas['resenha'] -= primeira
+            self._blocos[participante] = BlocoSentencas(livros[primeira:ultima], bloco_colunas)
+        self.logger.info(f"Sentenças carregadas: {len(colunas['resenha'])} de {len(participantes)} participantes")
+
+    def gravar_participante(self, participante: str, resultados: List[Dict]):
+        """
+        Atualiza as sentenças do participante a partir dos resultados do relatório (na ordem dele).
+        Livros com sentenças nos resultados são substituídos, livros sem as chaves de sentença
+        (vindos de um relatório anterior) mantêm as que já estavam gravadas e livros ausentes
+        dos resultados são removidos.
+        """
+        with self._lock:
+            anterior = self._blocos.get(participante, BlocoSentencas.vazio())
+            livros = {resultado['Livro'] for resultado in resultados}
+            analisados = [resultado for resultado in resultados
+                          if any(chave in resultado for chave in CHAVES_SENTENCAS)]
+            remover = (set(anterior.livros) - livros) | {resultado['Livro'] for resultado in analisados}
+            if not analisados and not remover:
+                return
+            blocos = [anterior.sem_livros(remover)] + [BlocoSentencas.de_resultado(r) for r in analisados]
+            self._blocos[participante] = BlocoSentencas.concatenar(blocos)
+            self._coorte = None
+            self._alterado = True
+
+    def participantes(self) -> List[str]:
+        with self._lock:
+            return sorted(self._blocos)
+
+    def _dados_coorte(self) -> Tuple[np.ndarray, np.ndarray, BlocoSentencas]:
+        """
+        Participantes, participante de cada resenha e todos os blocos concatenados
+        (calculados uma vez e reaproveitados até a próxima gravação)
+        """
+        with self._lock:
+            if self._coorte is None:
+                participantes = sorted(self._blocos)
+                blocos = [self._blocos[p] for p in participantes]
+                participante_da_resenha = np.repeat(
+                    np.arange(len(participantes), dtype=np.int32),
+                    [len(bloco.livros) for bloco in blocos]
+                )
+                self._coorte = (np.array(participantes, dtype=str), participante_da_resenha,
+                                BlocoSentencas.concatenar(blocos))
+            return self._coorte
+
+    def _quadro(self, indices: np.ndarray) -> pd.DataFrame:
+        """
+        DataFrame com as sentenças das linhas informadas (índices na coorte)
+        """
+        participantes, participante_da_resenha, coorte = self._dados_coorte()
+        resenha = coorte.colunas['resenha'][indices]
+        livros = np.array(coorte.livros, dtype=str)
+        return pd.DataFrame({
+            'Participante': participantes[participante_da_resenha[resenha]],
+            'Livro': livros[resenha],
+            'Detector': np.array(DETECTORES)[coorte.colunas['detector'][indices]],
+            'Inicio': coorte.colunas['inicio'][indices],
+            'Fim': coorte.colunas['fim'][indices],
+            'Prob_IA': coorte.colunas['prob_ia'][indices],
+            'Perplexidade': coorte.colunas['perplexidade'][indices],
+            'Destacada': coorte.colunas['destacada'][indices],
+        })
+
+    def carregar(self) -> pd.DataFrame:
+        """
+        Todas as sentenças como DataFrame (uma linha por sentença e detector)
+        """
+        _, _, coorte = self._dados_coorte()
+        return self._quadro(np.arange(len(coorte.colunas['resenha'])))
+
+    def mais_provaveis_ia(self, k: int = 5) -> pd.DataFrame:
+        """
+        As k sentenças de maior probabilidade de IA no GPTZero de cada participante
+        """
+        _, participante_da_resenha, coorte = self._dados_coorte()
+        candidatas = np.flatnonzero((coorte.colunas['detector'] == 0) & ~np.isnan(coorte.colunas['prob_ia']))
+        participante = participante_da_resenha[coorte.colunas['resenha'][candidatas]]
+        # Ordena por participante e, dentro dele, por probabilidade decrescente
+        ordem = np.lexsort((-coorte.colunas['prob_ia'][candidatas], participante))
+        candidatas, participante = candidatas[ordem], participante[ordem]
+        # Posição de cada sentença dentro do seu participante
+        inicio_grupo = np.searchsorted(participante, participante, side='left')
+        posicao = np.arange(len(candidatas)) - inicio_grupo
+        return self._quadro(candidatas[posicao < k])
+
+    def destacadas_por_ambos(self) -> pd.DataFrame:
+        """
+        Sentenças destacadas como IA pelos dois detectores (mesma posição na mesma resenha).
+        Retorna as linhas do GPTZero.
+        """
+        _, _, coorte = self._dados_coorte()
+        colunas = coorte.colunas
+        localizadas = colunas['destacada'] & (colunas['inicio'] >= 0)
+        chave = (colunas['resenha'].astype(np.int64) << 32) | colunas['inicio'].astype(np.int64)
+        gptzero = np.flatnonzero(localizadas & (colunas['detector'] == 0))
+        zerogpt = np.flatnonzero(localizadas & (colunas['detector'] == 1))
+        return self._quadro(gptzero[np.isin(chave[gptzero], chave[zerogpt])])
+
+    @staticmethod
+    def adicionar_textos(df: pd.DataFrame, textos: pd.DataFrame) -> pd.DataFrame:
+        """
+        Acrescenta a coluna Sentenca recortando o texto normalizado de cada resenha.
+        textos: colunas Participante, Livro e Texto_Normalizado (ArmazemResultados.carregar)
+        """
+        por_resenha = {(p, livro): texto for p, livro, texto in
+                       textos[['Participante', 'Livro', 'Texto_Normalizado']].itertuples(index=False)}
+        df = df.copy()
+        df['Sentenca'] = [
+            (por_resenha.get((p, livro)) or '')[inicio:fim] if inicio >= 0 else None
+            for p, livro, inicio, fim in df[['Participante', 'Livro', 'Inicio', 'Fim']].itertuples(index=False)
+        ]
+        return df
+
+    def salvar(self):
+        """
+        Grava as sentenças de forma atômica (arquivo temporário + rename), se algo mudou
+        """
+        with self._lock:
+            if not self._alterado:
+                return
+            self._alterado = False
+        participantes, participante_da_resenha, coorte = self._dados_coorte()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_name(self.caminho.stem + '.tmp.npz')
+        with open(temporario, 'wb') as f:
+            np.savez(f, participantes=participantes, participante_da_resenha=participante_da_resenha,
+                     livros=np.array(coorte.livros, dtype=str), **coorte.colunas)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+        self.logger.info(f"Sentenças gravadas: {len(coorte.colunas['resenha'])} em {self.caminho}")
@@ -0,0 +1,134 @@
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import List
+import pandas as pd
+from analisador_consolidado import AnalisadorConsolidado
+from armazem_resultados import ArmazemResultados
+
+
+def consolidado_por_participante(armazem: ArmazemResultados) -> pd.DataFrame:
+    """
+    Consolidação original: uma leitura e uma máscara booleana por limiar para cada participante
+    """
+    resultados = []
+    for participante in armazem.participantes():
+        df = armazem.carregar(['GPTZero_Prob_IA', 'ZeroGPT_Porcentagem_IA'], participantes=[participante])
+        total_resenhas = len(df)
+        marcadas_ia = df[(df['GPTZero_Prob_IA'] >= 0.40) | (df['ZeroGPT_Porcentagem_IA'] >= 40)]
+        resultados.append({
+            'Participante': participante,
+            'Total_Resenhas': total_resenhas,
+            'Total_GPTZero_80': len(df[df['GPTZero_Prob_IA'] >= 0.80]),
+            'Total_ZeroGPT_80': len(df[df['ZeroGPT_Porcentagem_IA'] >= 80]),
+            'Total_GPTZero_60': len(df[df['GPTZero_Prob_IA'] >= 0.60]),
+            'Total_ZeroGPT_60': len(df[df['ZeroGPT_Porcentagem_IA'] >= 60]),
+            'Total_GPTZero_40': len(df[df['GPTZero_Prob_IA'] >= 0.40]),
+            'Total_ZeroGPT_40': len(df[df['ZeroGPT_Porcentagem_IA'] >= 40]),
+            'Total_Marcadas_IA': len(marcadas_ia),
+            'Percentual_Marcadas_>40': (len(marcadas_ia) / total_resenhas * 100) if total_resenhas > 0 else 0,
+            'Media_GPTZero': df['GPTZero_Prob_IA'].mean(),
+            'Media_ZeroGPT': df['ZeroGPT_Porcentagem_IA'].mean()
+        })
+    df_consolidado = pd.DataFrame(resultados)
+    return df_consolidado.sort_values('Percentual_Marcadas_>40', ascending=False)
+
+
+def popular_armazem_participante(armazem: ArmazemResultados, p: int, resenhas: int, rng):
+    quantidade = 0 if p % 97 == 0 else rng.randint(1, 2 * resenhas)
+    resultados = []
+    for i in range(quantidade):
+        falha = rng.random() < 0.05
+        resultados.append({
+            'Livro': f'Livro_{i:04d}',
+            'GPTZero_Prob_IA': -1 if falha else rng.random(),
+            'ZeroGPT_Porcentagem_IA': None if falha else round(rng.random() * 100, 2)
+        })
+    armazem.gravar_participante(f'Participante_{p:05d}', resultados)
+
+
+def popular_armazem(armazem: ArmazemResultados, participantes: int, resenhas: int, semente: int):
+    """
+    Participantes sintéticos com pontuações aleatórias, falhas (-1/None) e alguns sem resenhas
+    """
+    rng = random.Random(semente)
+    for p in range(participantes):
+        popular_armazem_participante(armazem, p, resenhas, rng)
+
+
+def comparar(esperado: pd.DataFrame, obtido: pd.DataFrame) -> List[str]:
+    esperado = esperado.reset_index(drop=True)
+    obtido = obtido.reset_index(drop=True)
+    if list(esperado.columns) != list(obtido.columns):
+        return [f"colunas {list(esperado.columns)} != {list(obtido.columns)}"]
+    try:
+        pd.testing.assert_frame_equal(esperado, obtido, check_dtype=False)
+    except AssertionError as e:
+        return [str(e)]
+    return []
+
+
+def medir(funcao, armazem: ArmazemResultados, repeticoes: int):
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = perf_counter()
+        resultado = funcao(armazem)
+        melhor = min(melhor, perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a consolidação por participante com a agregação única (groupby)"
+    )
+    parser.add_argument('--participantes', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000],
+                        help="Números de participantes a medir")
+    parser.add_argument('--resenhas', type=int, default=20, help="Média de resenhas por participante")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'participantes':>13} {'resenhas':>9} {'original (s)':>13} {'groupby (s)':>12} "
+          f"{'ms/partic.':>11} {'ganho':>7} {'1 alterado (s)':>15}")
+    falhou = False
+    with tempfile.TemporaryDirectory(prefix='benchmark_consolidacao_') as pasta:
+        for participantes in args.participantes:
+            armazem = ArmazemResultados(Path(pasta) / f'resultados_{participantes}.sqlite')
+            try:
+                popular_armazem(armazem, participantes, args.resenhas, args.semente)
+                consolidador = AnalisadorConsolidado(Path(pasta), armazem)
+                tempo_original, esperado = medir(consolidado_por_participante, armazem, args.repeticoes)
+                tempo_groupby, obtido = medir(consolidador.calcular_consolidado, armazem, args.repeticoes)
+                total_resenhas = int(obtido['Total_Resenhas'].sum())
+                
+                # Consolidação incremental depois de reanalisar um único participante
+                _, novos, _ = consolidador.calcular_consolidado_incremental(armazem)
+                armazem.gravar_resumos_consolidados(novos, armazem.participantes())
+                popular_armazem_participante(armazem, participantes // 2 + 1, args.resenhas,
+                                             random.Random(args.semente + 1))
+                inicio = perf_counter()
+                incremental, _, _ = consolidador.calcular_consolidado_incremental(armazem)
+                tempo_incremental = perf_counter() - inicio
+                diferencas_incremental = comparar(consolidador.calcular_consolidado(armazem), incremental)
+            finally:
+                armazem.fechar()
+
+            print(f"{participantes:>13} {total_resenhas:>9} {tempo_original:>13.3f} {tempo_groupby:>12.3f} "
+                  f"{tempo_groupby / participantes * 1000:>11.4f} {tempo_original / tempo_groupby:>6.1f}x "
+                  f"{tempo_incremental:>15.3f}")
+            diferencas = comparar(esperado, obtido) + diferencas_incremental
+            if diferencas:
+                falhou = True
+                print(f"  Resultados diferentes com {participantes} participantes:")
+                for diferenca in diferencas:
+                    print(f"  {diferenca}")
+
+    if falhou:
+        sys.exit(1)
+    print("Resultados idênticos à consolidação original em todos os tamanhos (também o incremental)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import random
+import re
+import sys
+import unicodedata
+from time import perf_counter
+from processador_texto import corrigir_palavras_bugadas, normalizar_texto
+
+# Fragmentos que exercitam todos os casos de normalizar_texto
+FRAGMENTOS = [
+    'â€™', 'â€"', 'â€œ', 'â€', 'â', '€', '™', 'œ', '?', '"', '…',
+    '\x96', '\x93', '\x94', '\x00', '\x07', '\x0b', '\x0c', '\r', '\x1f', '\x7f', '\x85', '\x9f',
+    '​', '‎', '﻿', '\ud800', '\U000e0001', '\xad',
+    ' ', '  ', '\n', '\n\n', '\t', '\xa0', ' ',
+    'ação', 'Ñandú', 'naïve', 'ß', 'ﬁ', '😀', '中文', 'Ω',
+    'O livro ', 'a personagem ', 'resenha. ', 'capítulo ', 'de ', 'que ',
+]
+
+
+def normalizar_texto_referencia(texto):
+    """
+    Implementação original (caractere a caractere) de normalizar_texto, usada como referência
+    na verificação de equivalência (aqui e em test_normalizacao.py) e na medição do ganho
+    """
+    texto = corrigir_palavras_bugadas(texto)
+    texto = ''.join(char for char in texto if not unicodedata.category(char).startswith('C') 
+                    or char in ['\n', '\t'])
+    texto = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]', '', texto)
+    texto = re.sub(r' +', ' ', texto)
+    texto = re.sub(r'\n+', '\n', texto)
+    return texto.strip()
+
+
+def gerar_texto_aleatorio(rng: random.Random, tamanho: int) -> str:
+    partes = []
+    for _ in range(tamanho):
+        if rng.random() < 0.1:
+            partes.append(chr(rng.randint(0, 0x2FFFF)))  # qualquer ponto de código
+        else:
+            partes.append(rng.choice(FRAGMENTOS))
+    return ''.join(partes)
+
+
+def verificar_equivalencia(amostras: int, semente: int) -> int:
+    """
+    Compara normalizar_texto com a implementação de referência em um corpus aleatório.
+    Retorna o número de divergências (mostra as primeiras).
+    """
+    rng = random.Random(semente)
+    divergencias = 0
+    for i in range(amostras):
+        texto = gerar_texto_aleatorio(rng, rng.randint(0, 200))
+        esperado = normalizar_texto_referencia(texto)
+        obtido = normalizar_texto(texto)
+        if esperado != obtido:
+            divergencias += 1
+            if divergencias <= 5:
+                print(f"Divergência na amostra {i}: entrada={texto!r}")
+                print(f"  referência={esperado!r}")
+                print(f"  otimizado ={obtido!r}")
+    return divergencias
+
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = perf_counter()
+        funcao(texto)
+        melhor = min(melhor, perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verifica a equivalência e mede o ganho de normalizar_texto sobre a implementação original"
+    )
+    parser.add_argument('--amostras', type=int, default=20000, help="Textos aleatórios na verificação")
+    parser.add_argument('--megabytes', type=float, default=4, help="Tamanho do texto do benchmark")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    divergencias = verificar_equivalencia(args.amostras, args.semente)
+    print(f"Equivalência: {args.amostras - divergencias}/{args.amostras} amostras idênticas")
+    if divergencias:
+        sys.exit(1)
+
+    # Texto realista: resenha em português com alguns caracteres bugados
+    rng = random.Random(args.semente)
+    base = ("O livro apresenta a história de uma família ao longo de três gerações. "
+            "A autora constrói personagens complexos â€œmarcantesâ€ e um enredo sensível…  \n\n"
+            "Em vários capítulos, a narrativa ?questiona? o papel da memória\x96e do tempo.\r\n")
+    alvo = int(args.megabytes * 1024 * 1024)
+    texto = ''.join(rng.choice([base, base.upper(), base + '​']) for _ in range(alvo // len(base) + 1))[:alvo]
+
+    tempo_referencia = medir(normalizar_texto_referencia, texto, args.repeticoes)
+    tempo_otimizado = medir(normalizar_texto, texto, args.repeticoes)
+    print(f"Texto de {len(texto) / 1024 / 1024:.1f} MB")
+    print(f"Referência: {tempo_referencia:.3f} s")
+    print(f"Otimizado:  {tempo_otimizado:.3f} s")
+    print(f"Ganho:      {tempo_referencia / tempo_otimizado:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+from servidor_simulado import (
+    adicionar_argumentos_simulacao,
+    configuracao_dos_argumentos,
+    iniciar_servidor
+)
+
+PASTA_PROJETO = Path(__file__).resolve().parent
+
+VOCABULARIO = (
+    "o a os as um uma livro autor personagem história narrativa capítulo leitura "
+    "resenha obra enredo tema mundo vida tempo sociedade memória conflito final "
+    "mostra apresenta revela constrói discute questiona descreve acompanha "
+    "interessante profundo complexo simples marcante sensível crítico original "
+    "porque quando enquanto embora assim também ainda sempre nunca muito pouco"
+).split()
+
+
+def gerar_resenha(rng: random.Random, palavras: int) -> str:
+    sentencas = []
+    restantes = palavras
+    while restantes > 0:
+        tamanho = min(restantes, rng.randint(6, 25))
+        sentenca = ' '.join(rng.choice(VOCABULARIO) for _ in range(tamanho))
+        sentencas.append(sentenca.capitalize() + '.')
+        restantes -= tamanho
+    return ' '.join(sentencas)
+
+
+def gerar_arvore_resumos(pasta: Path, participantes: int, resenhas: int, palavras: int, semente: int = 0):
+    """
+    Cria uma pasta Resumos/ sintética com N participantes × M resenhas .txt
+    """
+    rng = random.Random(semente)
+    for p in range(participantes):
+        pasta_participante = pasta / 'Resumos' / f'Participante_{p:04d}'
+        pasta_participante.mkdir(parents=True, exist_ok=True)
+        for r in range(resenhas):
+            (pasta_participante / f'Livro_{r:03d}.txt').write_text(
+                gerar_resenha(rng, palavras), encoding='utf-8'
+            )
+    # Chaves falsas: main.py importa config.py
+    (pasta / 'config.py').write_text('GPT_ZERO_KEY = "simulado"\nZERO_GPT_KEY = "simulado"\n', encoding='utf-8')
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """
+    Percentil pelo método do posto mais próximo
+    """
+    if not valores:
+        return float('nan')
+    ordenados = sorted(valores)
+    posto = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[min(posto, len(ordenados)) - 1]
+
+
+def executar_benchmark(args) -> Dict:
+    servidor, estado = iniciar_servidor(configuracao_dos_argumentos(args))
+    url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_resenhas_') as pasta_temp:
+        pasta_temp = Path(pasta_temp)
+        gerar_arvore_resumos(pasta_temp, args.participantes, args.resenhas, args.palavras, args.semente or 0)
+
+        ambiente = dict(os.environ)
+        ambiente['GPTZERO_BASE_URL'] = url
+        ambiente['ZEROGPT_BASE_URL'] = url
+        ambiente['PYTHONPATH'] = os.pathsep.join(
+            [str(pasta_temp), str(PASTA_PROJETO), ambiente.get('PYTHONPATH', '')]
+        )
+        comando = [sys.executable, str(PASTA_PROJETO / 'main.py'), '--sem-cache',
+                   '--simultaneas', str(args.simultaneas),
+                   '--timeout-leitura', str(args.timeout_leitura)] + args.args_main
+
+        inicio = perf_counter()
+        processo = subprocess.run(comando, cwd=pasta_temp, env=ambiente,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        duracao = perf_counter() - inicio
+        servidor.shutdown()
+
+        if processo.returncode != 0:
+            sys.stderr.write(processo.stderr.decode('utf-8', errors='replace')[-4000:])
+            raise SystemExit(f"main.py terminou com código {processo.returncode}")
+
+    # ru_maxrss é em KB no Linux (bytes no macOS)
+    pico_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == 'darwin':
+        pico_rss //= 1024
+
+    total_resenhas = args.participantes * args.resenhas
+    estatisticas = estado.estatisticas()
+    latencias = estatisticas['latencias']
+    return {
+        'participantes': args.participantes,
+        'resenhas_por_participante': args.resenhas,
+        'total_resenhas': total_resenhas,
+        'duracao_s': round(duracao, 3),
+        'resenhas_por_segundo': round(total_resenhas / duracao, 3) if duracao > 0 else None,
+        'requisicoes': estatisticas['requisicoes'],
+        'status': estatisticas['status'],
+        'latencia_p50_s': round(percentil(latencias, 50), 4),
+        'latencia_p95_s': round(percentil(latencias, 95), 4),
+        'latencia_p99_s': round(percentil(latencias, 99), 4),
+        'pico_rss_mb': round(pico_rss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de ponta a ponta do main.py contra o servidor simulado"
+    )
+    parser.add_argument('--participantes', type=int, default=10, help="Número de participantes (N)")
+    parser.add_argument('--resenhas', type=int, default=20, help="Resenhas por participante (M)")
+    parser.add_argument('--palavras', type=int, default=300, help="Palavras por resenha")
+    parser.add_argument('--simultaneas', type=int, default=4, help="Repassado ao main.py")
+    parser.add_argument('--timeout-leitura', type=float, default=10, help="Repassado ao main.py")
+    parser.add_argument('--saida-json', type=Path, default=None, help="Grava o resultado em JSON")
+    parser.add_argument('args_main', nargs=argparse.REMAINDER,
+                        help="Argumentos extras para o main.py (após --)")
+    adicionar_argumentos_simulacao(parser)
+    args = parser.parse_args()
+    if args.args_main and args.args_main[0] == '--':
+        args.args_main = args.args_main[1:]
+
+    resultado = executar_benchmark(args)
+
+    print(f"Resenhas:          {resultado['total_resenhas']} "
+          f"({resultado['participantes']} participantes × {resultado['resenhas_por_participante']})")
+    print(f"Duração:           {resultado['duracao_s']:.2f} s")
+    print(f"Vazão:             {resultado['resenhas_por_segundo']:.2f} resenhas/s")
+    print(f"Requisições:       {resultado['requisicoes']} {resultado['status']}")
+    print(f"Latência p50/p95/p99: {resultado['latencia_p50_s']:.3f} / "
+          f"{resultado['latencia_p95_s']:.3f} / {resultado['latencia_p99_s']:.3f} s")
+    print(f"Pico de RSS:       {resultado['pico_rss_mb']:.1f} MB")
+
+    if args.saida_json:
+        args.saida_json.write_text(json.dumps(resultado, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
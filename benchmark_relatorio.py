@@ -0,0 +1,270 @@
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+import openpyxl
+import pandas as pd
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from analisador_ia import (
+    COLUNAS_PROB_HUMANO,
+    COLUNAS_PROB_IA,
+    EXPLICACOES_COLUNAS,
+    REGRAS_CATEGORIAS,
+    _escalas_de_cor,
+    _escrever_planilha_streaming,
+    _largura_coluna
+)
+from benchmark_pipeline import gerar_resenha
+
+CATEGORIAS = ['high', 'medium', 'low', None]
+CLASSES = ['human', 'mixed', 'ai', None]
+CLASSIFICACOES = ['HUMAN_ONLY', 'MIXED', 'AI_ONLY', None]
+FEEDBACKS = ['Your Text is Human written', 'Your Text is Most Likely AI/GPT generated',
+             'Your Text is AI/GPT Generated', None]
+
+
+def _escrever_planilha_openpyxl(df: pd.DataFrame, excel_file: Path):
+    """
+    Escrita original da planilha: pandas + openpyxl, com os estilos aplicados célula a célula.
+    Referência de resultado e de tempo para _escrever_planilha_streaming.
+    """
+    # Configura a largura das colunas e adiciona comentários explicativos
+    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Análises')
+        worksheet = writer.sheets['Análises']
+        
+        # Estilos
+        header_font = Font(bold=True, color="FFFFFF")  # Fonte branca para cabeçalhos
+        gptzero_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")  # Azul para GPTZero
+        zerogpt_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")  # Verde para ZeroGPT
+        thin_border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        
+        # Aplica estilos aos cabeçalhos
+        for idx, column in enumerate(df.columns):
+            col_letter = get_column_letter(idx + 1)
+            cell = worksheet[f"{col_letter}1"]
+            cell.border = thin_border
+            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+            cell.font = Font(bold=True)  # Fonte preta em negrito por padrão
+            
+            # Aplica cor branca e fundo colorido apenas para colunas das APIs
+            if column.startswith('GPTZero'):
+                cell.font = header_font  # Fonte branca
+                cell.fill = gptzero_fill
+            elif column.startswith('ZeroGPT'):
+                cell.font = header_font  # Fonte branca
+                cell.fill = zerogpt_fill
+        
+        # Aplica formatação para campos categóricos
+        for col, regras in REGRAS_CATEGORIAS.items():
+            if col in df.columns:
+                col_letter = get_column_letter(df.columns.get_loc(col) + 1)
+                for row_idx in range(2, len(df) + 2):  # Começa da linha 2 (após cabeçalho)
+                    cell = worksheet[f"{col_letter}{row_idx}"]
+                    valor = str(cell.value).lower() if cell.value else ''
+                    # Verifica se o valor começa com alguma das chaves (para match parcial)
+                    for key, fill in regras.items():
+                        if valor.startswith(key):
+                            cell.fill = fill
+                            break
+        
+        color_scale_ia, color_scale_humano = _escalas_de_cor()
+
+        # Aplica formatação para indicadores de IA
+        for col in COLUNAS_PROB_IA:
+            if col in df.columns:
+                col_letter = get_column_letter(df.columns.get_loc(col) + 1)
+                worksheet.conditional_formatting.add(
+                    f"{col_letter}2:{col_letter}{len(df)+1}",
+                    color_scale_ia
+                )
+
+        # Aplica formatação para indicadores humanos
+        for col in COLUNAS_PROB_HUMANO:
+            if col in df.columns:
+                col_letter = get_column_letter(df.columns.get_loc(col) + 1)
+                worksheet.conditional_formatting.add(
+                    f"{col_letter}2:{col_letter}{len(df)+1}",
+                    color_scale_humano
+                )
+        
+        # Ajusta largura das colunas
+        for idx, column in enumerate(df.columns):
+            col_letter = get_column_letter(idx + 1)
+            worksheet.column_dimensions[col_letter].width = _largura_coluna(column)
+        
+        # Ajusta altura das linhas para serem pequenas
+        for row_idx in range(2, len(df) + 2):  # Começa da linha 2 (após cabeçalho)
+            worksheet.row_dimensions[row_idx].height = 15  # Altura fixa pequena
+        
+        # Congela o painel para manter cabeçalhos visíveis
+        worksheet.freeze_panes = 'A2'
+        
+        # Alinhamento para todas as células
+        for row in worksheet.iter_rows(min_row=2):
+            for cell in row:
+                cell.alignment = Alignment(vertical='center')
+                if isinstance(cell.value, (int, float)):
+                    cell.alignment = Alignment(horizontal='right', vertical='center')
+                cell.border = Border(
+                    left=Side(style='thin'),
+                    right=Side(style='thin')
+                )
+        
+        # Adiciona comentários nas células
+        for idx, (coluna, explicacao) in enumerate(EXPLICACOES_COLUNAS.items()):
+            if coluna in df.columns:  # Só adiciona se a coluna existir
+                col_letter = get_column_letter(df.columns.get_loc(coluna) + 1)
+                cell = worksheet[f"{col_letter}1"]
+                cell.comment = openpyxl.comments.Comment(
+                    explicacao,
+                    'Detector IA'
+                )
+        
+        # Alinhamento especial para a coluna de sentenças
+        if 'ZeroGPT_Sentencas_IA' in df.columns:
+            col_letter = get_column_letter(df.columns.get_loc('ZeroGPT_Sentencas_IA') + 1)
+            for cell in worksheet[col_letter]:
+                if cell.row > 1:  # Pula o cabeçalho
+                    cell.alignment = Alignment(
+                        vertical='top',
+                        wrap_text=True,
+                        shrink_to_fit=True  # Adiciona shrink_to_fit para ajudar a manter o texto na linha pequena
+                    )
+
+
+def gerar_resultados(linhas: int, palavras: int, semente: int = 0) -> List[Dict]:
+    """
+    Resultados sintéticos no formato de AnalisadorIA (inclui falhas com -1/None)
+    """
+    rng = random.Random(semente)
+    resultados = []
+    for i in range(linhas):
+        texto = gerar_resenha(rng, palavras)
+        falha = rng.random() < 0.05
+        prob_ia = rng.random()
+        resultados.append({
+            'Livro/curso': f'Livro_{i:05d}',
+            'Resenha': texto,
+            'GPTZero_Versao': None if falha else '2024-01-09-base',
+            'GPTZero_ScanID': None if falha else f'scan-{i}',
+            'GPTZero_Prob_Media_IA': -1 if falha else rng.random(),
+            'GPTZero_Prob_IA': -1 if falha else prob_ia,
+            'GPTZero_Prob_Humano': -1 if falha else 1 - prob_ia,
+            'GPTZero_Prob_Misto': -1 if falha else 0.0,
+            'GPTZero_Categoria_Confianca': None if falha else rng.choice(CATEGORIAS),
+            'GPTZero_Pontuacao_Confianca': -1 if falha else rng.random(),
+            'GPTZero_Classe_Prevista': None if falha else rng.choice(CLASSES),
+            'GPTZero_Classificacao': None if falha else rng.choice(CLASSIFICACOES),
+            'GPTZero_Mensagem': None if falha else 'We are highly confident this text was written by a human',
+            'GPTZero_Sentencas_Destacadas': None if falha else texto[:200],
+            'ZeroGPT_Sucesso': None if falha else True,
+            'ZeroGPT_Total_Palavras': None if falha else palavras,
+            'ZeroGPT_Palavras_IA': None if falha else rng.randint(0, palavras),
+            'ZeroGPT_Porcentagem_IA': None if falha else round(rng.random() * 100, 2),
+            'ZeroGPT_Sentencas_IA': None if falha else '\n'.join(texto.split('. ')[:3]),
+            'ZeroGPT_Feedback': None if falha else rng.choice(FEEDBACKS),
+            'ZeroGPT_Mensagem': None if falha else 'detection complete',
+        })
+    return resultados
+
+
+def _estilo(cell) -> tuple:
+    return (repr(cell.font), repr(cell.fill), repr(cell.border), repr(cell.alignment), cell.number_format)
+
+
+def comparar_planilhas(arquivo_a: Path, arquivo_b: Path) -> List[str]:
+    """
+    Compara valores, estilos, comentários, larguras, alturas, painel congelado e formatação
+    condicional das duas planilhas. Retorna as diferenças encontradas (vazia se iguais).
+    """
+    ws_a = openpyxl.load_workbook(arquivo_a)['Análises']
+    ws_b = openpyxl.load_workbook(arquivo_b)['Análises']
+    diferencas = []
+
+    if (ws_a.max_row, ws_a.max_column) != (ws_b.max_row, ws_b.max_column):
+        diferencas.append(f"dimensões {ws_a.dimensions} != {ws_b.dimensions}")
+    if ws_a.freeze_panes != ws_b.freeze_panes:
+        diferencas.append(f"freeze_panes {ws_a.freeze_panes} != {ws_b.freeze_panes}")
+
+    for linha_a, linha_b in zip(ws_a.iter_rows(), ws_b.iter_rows()):
+        for a, b in zip(linha_a, linha_b):
+            if a.value != b.value:
+                diferencas.append(f"{a.coordinate}: valor {a.value!r} != {b.value!r}")
+            if _estilo(a) != _estilo(b):
+                diferencas.append(f"{a.coordinate}: estilo diferente")
+            comentario_a = (a.comment.text, a.comment.author) if a.comment else None
+            comentario_b = (b.comment.text, b.comment.author) if b.comment else None
+            if comentario_a != comentario_b:
+                diferencas.append(f"{a.coordinate}: comentário {comentario_a} != {comentario_b}")
+        if len(diferencas) > 20:
+            return diferencas
+
+    for letra in {*ws_a.column_dimensions.keys(), *ws_b.column_dimensions.keys()}:
+        if ws_a.column_dimensions[letra].width != ws_b.column_dimensions[letra].width:
+            diferencas.append(f"largura da coluna {letra}")
+    for linha in range(1, ws_a.max_row + 1):
+        if ws_a.row_dimensions[linha].height != ws_b.row_dimensions[linha].height:
+            diferencas.append(f"altura da linha {linha}")
+            break
+
+    def regras(ws):
+        return sorted(
+            (str(faixa.sqref), regra.type, repr(regra.colorScale))
+            for faixa in ws.conditional_formatting for regra in faixa.rules
+        )
+    if regras(ws_a) != regras(ws_b):
+        diferencas.append("formatação condicional diferente")
+    return diferencas
+
+
+def medir(funcao, df: pd.DataFrame, arquivo: Path, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = perf_counter()
+        funcao(df, arquivo)
+        melhor = min(melhor, perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara a escrita original da planilha de análises com a escrita em fluxo"
+    )
+    parser.add_argument('--linhas', type=int, default=5000, help="Resenhas no relatório")
+    parser.add_argument('--palavras', type=int, default=300, help="Palavras por resenha")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+
+    df = pd.DataFrame(gerar_resultados(args.linhas, args.palavras, args.semente))
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_relatorio_') as pasta:
+        arquivo_original = Path(pasta) / 'original.xlsx'
+        arquivo_fluxo = Path(pasta) / 'fluxo.xlsx'
+        tempo_original = medir(_escrever_planilha_openpyxl, df, arquivo_original, args.repeticoes)
+        tempo_fluxo = medir(_escrever_planilha_streaming, df, arquivo_fluxo, args.repeticoes)
+
+        diferencas = comparar_planilhas(arquivo_original, arquivo_fluxo)
+        print(f"Relatório com {args.linhas} linhas × {len(df.columns)} colunas")
+        print(f"Original:  {tempo_original:.2f} s")
+        print(f"Em fluxo:  {tempo_fluxo:.2f} s")
+        print(f"Ganho:     {tempo_original / tempo_fluxo:.1f}x")
+        if diferencas:
+            print("Planilhas diferentes:")
+            for diferenca in diferencas[:20]:
+                print(f"  {diferenca}")
+            sys.exit(1)
+        print("Planilhas equivalentes (valores, estilos, comentários, larguras, alturas e escalas de cor)")
+
+if __name__ == "__main__":
+    main()
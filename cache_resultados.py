@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Optional
+from processador_texto import normalizar_texto
+
+class CacheResultados:
+    """
+    Cache persistente (SQLite) dos resultados dos detectores.
+
+    A chave é o hash SHA-256 do texto normalizado (normalizar_texto) junto com o
+    nome e a versão do detector, de modo que reenviar um texto que não mudou
+    não gera nova chamada à API. Suporta validade opcional (TTL) e limite de
+    entradas, removendo primeiro as entradas acessadas há mais tempo.
+
+    O último acesso só importa com limite de entradas; nesse caso os acessos ficam
+    em memória e são gravados juntos (antes de cada despejo, a cada
+    ACESSOS_POR_GRAVACAO acertos e em fechar), para que um acerto não espere um
+    commit em disco.
+    """
+
+    ACESSOS_POR_GRAVACAO = 256
+
+    def __init__(self, caminho: Path, ttl_segundos: Optional[float] = None,
+                 max_entradas: Optional[int] = None):
+        self.caminho = Path(caminho)
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.logger = logging.getLogger('detector_ia')
+        self.acertos = 0
+        self.falhas = 0
+        self._acessos: Dict[str, float] = {}  # chave -> último acesso ainda não gravado
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # os detectores são chamados de várias threads
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                chave TEXT PRIMARY KEY,
+                detector TEXT NOT NULL,
+                versao TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            )
+        """)
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (ultimo_acesso)"
+        )
+        self._conexao.commit()
+
+    @staticmethod
+    def gerar_chave(detector: str, versao: str, texto: str) -> str:
+        """
+        Hash do texto normalizado + nome e versão do detector
+        """
+        conteudo = f"{detector}\0{versao}\0{normalizar_texto(texto)}"
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+    def obter(self, detector: str, versao: str, texto: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o resultado em cache, ou None se não houver entrada válida
+        """
+        chave = self.gerar_chave(detector, versao, texto)
+        agora = time()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT resultado, criado_em FROM resultados WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha and self.ttl_segundos is not None and agora - linha[1] > self.ttl_segundos:
+                self._conexao.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+                self._conexao.commit()
+                linha = None
+            if linha is None:
+                self.falhas += 1
+                return None
+            if self.max_entradas is not None:
+                self._acessos[chave] = agora
+                if len(self._acessos) >= self.ACESSOS_POR_GRAVACAO:
+                    self._gravar_acessos()
+                    self._conexao.commit()
+            self.acertos += 1
+        return json.loads(linha[0])
+
+    def _gravar_acessos(self):
+        """
+        Grava os últimos acessos acumulados (chamar com o lock adquirido; o commit fica com quem chama)
+        """
+        if self._acessos:
+            self._conexao.executemany(
+                "UPDATE resultados SET ultimo_acesso = ? WHERE chave = ?",
+                [(acesso, chave) for chave, acesso in self._acessos.items()]
+            )
+            self._acessos.clear()
+
+    def contem(self, detector: str, versao: str, texto: str) -> bool:
+        """
+        True se há entrada válida para o texto (não conta como acerto nem atualiza o último acesso)
+        """
+        chave = self.gerar_chave(detector, versao, texto)
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT criado_em FROM resultados WHERE chave = ?", (chave,)
+            ).fetchone()
+        return linha is not None and (self.ttl_segundos is None or time() - linha[0] <= self.ttl_segundos)
+
+    def guardar(self, detector: str, versao: str, texto: str, resultado: Dict[str, Any]):
+        """
+        Armazena o resultado de um detector e aplica o limite de entradas
+        """
+        chave = self.gerar_chave(detector, versao, texto)
+        agora = time()
+        with self._lock:
+            self._acessos.pop(chave, None)
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO resultados "
+                "(chave, detector, versao, resultado, criado_em, ultimo_acesso) VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, detector, versao, json.dumps(resultado, ensure_ascii=False), agora, agora)
+            )
+            self._despejar()
+            self._conexao.commit()
+
+    def _despejar(self):
+        """
+        Remove entradas expiradas e, se necessário, as menos acessadas (chamar com o lock adquirido)
+        """
+        self._gravar_acessos()
+        if self.ttl_segundos is not None:
+            self._conexao.execute(
+                "DELETE FROM resultados WHERE criado_em < ?", (time() - self.ttl_segundos,)
+            )
+        if self.max_entradas is not None:
+            total = self._conexao.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+            excesso = total - self.max_entradas
+            if excesso > 0:
+                self._conexao.execute(
+                    "DELETE FROM resultados WHERE chave IN "
+                    "(SELECT chave FROM resultados ORDER BY ultimo_acesso ASC LIMIT ?)",
+                    (excesso,)
+                )
+
+    def registrar_estatisticas(self):
+        """
+        Registra no log o número de acertos e falhas do cache
+        """
+        total = self.acertos + self.falhas
+        taxa = (self.acertos / total * 100) if total > 0 else 0
+        self.logger.info(
+            f"Cache de resultados: {self.acertos} acertos, {self.falhas} falhas ({taxa:.1f}% de acertos)"
+        )
+
+    def fechar(self):
+        with self._lock:
+            self._gravar_acessos()
+            self._conexao.commit()
+            self._conexao.close()
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import queue
+import re
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import FrozenSet, Iterable, Optional
+
+FORMATO_LOG = '%(asctime)s [%(levelname)s] %(message)s'
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+MASCARA = '***'
+
+# Valores de cabeçalhos/campos de autenticação que aparecem em mensagens (ex.: dicts de headers)
+_CAMPO_SECRETO = re.compile(
+    r'''(?i)(["']?(?:x-api-key|apikey|api[_-]key|authorization)["']?\s*[:=]\s*["']?)(?:bearer\s+)?[^"'\s,}]+'''
+)
+
+_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_segredos: FrozenSet[str] = frozenset()  # substituído (não alterado) para ser lido sem lock
+
+class FormatadorSemSegredos(logging.Formatter):
+    """
+    Formatador que mascara as chaves de API registradas e valores de campos de autenticação,
+    também nos tracebacks. Roda na thread do listener, fora do caminho das requisições.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        texto = super().format(record)
+        for segredo in _segredos:
+            texto = texto.replace(segredo, MASCARA)
+        return _CAMPO_SECRETO.sub(r'\1' + MASCARA, texto)
+
+class _FilaLocal(QueueHandler):
+    """
+    QueueHandler para um listener no mesmo processo: entrega o registro sem formatá-lo,
+    deixando a montagem da mensagem (msg % args) para a thread do listener. Por isso os
+    argumentos das mensagens devem ser valores que não mudam depois da chamada ao logger.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def registrar_segredos(segredos: Iterable[Optional[str]]):
+    """
+    Registra valores que nunca devem aparecer nos logs (ex.: chaves de API)
+    """
+    global _segredos
+    with _lock:
+        _segredos = _segredos | {s for s in segredos if s and len(s) >= 4}
+
+def configurar_logging(segredos: Iterable[Optional[str]] = (), nivel: int = logging.INFO) -> logging.Logger:
+    """
+    Configura o logger 'detector_ia' para arquivo (logs/detector_ia_<data>.log) e console.
+    As mensagens vão para uma fila e são formatadas e gravadas por uma thread em segundo plano.
+    Pode ser chamada mais de uma vez: os handlers são criados só na primeira chamada (as
+    seguintes apenas registram novos segredos e ajustam o nível).
+    """
+    global _listener
+    registrar_segredos(segredos)
+    logger = logging.getLogger('detector_ia')
+    logger.setLevel(nivel)
+    with _lock:
+        if _listener is not None:
+            return logger
+
+        Path('logs').mkdir(exist_ok=True)
+        log_file = f"logs/detector_ia_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        formato = FormatadorSemSegredos(FORMATO_LOG, datefmt=FORMATO_DATA)
+
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(formato)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formato)
+
+        fila = queue.SimpleQueue()
+        _listener = QueueListener(fila, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(_FilaLocal(fila))
+        logger.propagate = False
+        atexit.register(encerrar_logging)
+    return logger
+
+def encerrar_logging():
+    """
+    Grava as mensagens pendentes na fila e fecha os arquivos de log
+    """
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        logger = logging.getLogger('detector_ia')
+        for handler in [h for h in logger.handlers if isinstance(h, _FilaLocal)]:
+            logger.removeHandler(handler)
+        _listener = None
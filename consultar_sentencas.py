@@ -0,0 +1,48 @@
+import argparse
+from pathlib import Path
+import pandas as pd
+from armazem_resultados import abrir_armazem
+from armazem_sentencas import ArmazemSentencas
+
+def parse_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Consulta as pontuações por sentença gravadas em Resumos/sentencas.npz"
+    )
+    parser.add_argument('consulta', choices=['mais_provaveis', 'ambos'],
+                        help="mais_provaveis: as K sentenças com maior probabilidade de IA (GPTZero) "
+                             "de cada participante; ambos: sentenças destacadas pelos dois detectores")
+    parser.add_argument('--k', type=int, default=5, help="Sentenças por participante (padrão: 5)")
+    parser.add_argument('--participante', default=None, help="Mostra apenas o participante informado")
+    parser.add_argument('--saida', type=Path, default=None, help="Grava o resultado em .xlsx ou .csv")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_argumentos()
+    pasta_base = Path("Resumos")
+    sentencas = ArmazemSentencas(pasta_base / "sentencas.npz")
+
+    if args.consulta == 'mais_provaveis':
+        df = sentencas.mais_provaveis_ia(args.k)
+    else:
+        df = sentencas.destacadas_por_ambos()
+    if args.participante:
+        df = df[df['Participante'] == args.participante]
+
+    # O texto de cada sentença é recortado do texto normalizado guardado no armazenamento
+    armazem = abrir_armazem(pasta_base / "Relatórios")
+    try:
+        textos = armazem.carregar(['Livro', 'Texto_Normalizado'], participantes=df['Participante'].unique())
+    finally:
+        armazem.fechar()
+    df = ArmazemSentencas.adicionar_textos(df, textos)
+
+    if args.saida is None:
+        with pd.option_context('display.max_rows', None, 'display.max_colwidth', 80, 'display.width', 200):
+            print(df.to_string(index=False))
+    elif args.saida.suffix == '.csv':
+        df.to_csv(args.saida, index=False)
+    else:
+        df.to_excel(args.saida, index=False)
+
+if __name__ == "__main__":
+    main()
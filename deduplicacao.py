@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import random
+from typing import Dict, List, Optional, Set, Tuple
+
+class GrupoDuplicatas:
+    """
+    Resenhas idênticas ou quase idênticas: só o representante é enviado aos detectores
+    e o resultado dele vale para todos os membros
+    """
+
+    def __init__(self, numero: int, representante: int):
+        self.numero = numero
+        self.representante = representante
+        self.rotulo: Optional[int] = None  # numeração, a partir de 1, só dos grupos com duplicatas
+        self.membros: List[int] = [representante]
+        self.similaridades: Dict[int, float] = {representante: 1.0}  # Jaccard de cada membro com o representante
+
+    def adicionar(self, indice: int, similaridade: float):
+        self.membros.append(indice)
+        self.similaridades[indice] = similaridade
+
+
+class DeduplicadorResenhas:
+    """
+    Agrupa textos normalizados idênticos (hash SHA-256) e quase idênticos (MinHash + LSH).
+
+    Cada texto é dividido em shingles de `tamanho_shingle` palavras. A assinatura MinHash
+    de `num_permutacoes` valores é cortada em `bandas` faixas; textos que coincidem em
+    alguma faixa são candidatos, e o candidato só entra no grupo se a similaridade de
+    Jaccard real com o representante for >= limiar. Os textos são comparados apenas com
+    representantes, então todo membro é parecido com o texto cujo resultado recebe.
+    """
+
+    def __init__(self, limiar: float = 0.9, num_permutacoes: int = 64, bandas: int = 16,
+                 tamanho_shingle: int = 5, semente: int = 1):
+        if num_permutacoes % bandas:
+            raise ValueError("num_permutacoes deve ser múltiplo de bandas")
+        self.limiar = limiar
+        self.bandas = bandas
+        self.linhas_por_banda = num_permutacoes // bandas
+        self.tamanho_shingle = tamanho_shingle
+        rng = random.Random(semente)
+        # Os shingles já são hashes uniformes de 64 bits; um XOR com uma máscara aleatória
+        # basta para reordená-los (e é bem mais barato que (a * x + b) mod P em Python)
+        self._mascaras = [rng.getrandbits(64) for _ in range(num_permutacoes)]
+        self.logger = logging.getLogger('detector_ia')
+
+    def shingles(self, texto: str) -> Set[int]:
+        """
+        Hashes de 64 bits das sequências de `tamanho_shingle` palavras do texto
+        """
+        palavras = texto.lower().split()
+        if len(palavras) <= self.tamanho_shingle:
+            sequencias = [' '.join(palavras)]
+        else:
+            sequencias = [' '.join(palavras[i:i + self.tamanho_shingle])
+                          for i in range(len(palavras) - self.tamanho_shingle + 1)]
+        return {
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+            for s in sequencias
+        }
+
+    def assinatura(self, shingles: Set[int]) -> List[int]:
+        return [min(map(mascara.__xor__, shingles)) for mascara in self._mascaras]
+
+    def _faixas(self, assinatura: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        n = self.linhas_por_banda
+        return [(banda, tuple(assinatura[banda * n:(banda + 1) * n])) for banda in range(self.bandas)]
+
+    @staticmethod
+    def jaccard(a: Set[int], b: Set[int]) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    def agrupar(self, textos: List[str]) -> List[GrupoDuplicatas]:
+        """
+        Agrupa os textos na ordem recebida; o primeiro texto de cada grupo é o representante.
+        Textos sem duplicata formam grupos de um só membro.
+        """
+        grupos: List[GrupoDuplicatas] = []
+        por_hash: Dict[str, GrupoDuplicatas] = {}
+        indice_lsh: Dict[Tuple[int, Tuple[int, ...]], List[GrupoDuplicatas]] = {}
+        shingles_representantes: Dict[int, Set[int]] = {}
+
+        for indice, texto in enumerate(textos):
+            chave = hashlib.sha256(texto.encode('utf-8')).hexdigest()
+            grupo = por_hash.get(chave)
+            if grupo is not None:
+                grupo.adicionar(indice, 1.0)
+                continue
+
+            shingles = self.shingles(texto)
+            faixas = self._faixas(self.assinatura(shingles))
+
+            # Candidatos: representantes que coincidem em pelo menos uma faixa
+            melhor, melhor_similaridade = None, 0.0
+            vistos = set()
+            for faixa in faixas:
+                for candidato in indice_lsh.get(faixa, []):
+                    if candidato.numero in vistos:
+                        continue
+                    vistos.add(candidato.numero)
+                    similaridade = self.jaccard(shingles, shingles_representantes[candidato.numero])
+                    if similaridade >= self.limiar and similaridade > melhor_similaridade:
+                        melhor, melhor_similaridade = candidato, similaridade
+
+            if melhor is not None:
+                melhor.adicionar(indice, melhor_similaridade)
+                por_hash[chave] = melhor
+                continue
+
+            grupo = GrupoDuplicatas(len(grupos), indice)
+            grupos.append(grupo)
+            por_hash[chave] = grupo
+            shingles_representantes[grupo.numero] = shingles
+            for faixa in faixas:
+                indice_lsh.setdefault(faixa, []).append(grupo)
+
+        duplicados = 0
+        com_duplicatas = [grupo for grupo in grupos if len(grupo.membros) > 1]
+        for rotulo, grupo in enumerate(com_duplicatas, start=1):
+            grupo.rotulo = rotulo
+            duplicados += len(grupo.membros) - 1
+        if duplicados:
+            self.logger.info(
+                f"Deduplicação: {len(textos)} textos em {len(grupos)} grupos "
+                f"({duplicados} duplicatas não serão enviadas às APIs)"
+            )
+        return grupos
+
+
+def expandir_resultado(resultado: Dict, grupo: GrupoDuplicatas,
+                       itens: List[Tuple[str, str, str]]) -> List[Tuple[str, Dict]]:
+    """
+    Replica o resultado do representante para cada membro do grupo.
+    itens: lista de (participante, nome_livro, texto) indexada como em agrupar().
+    Retorna [(participante, resultado_do_membro)]; em grupos com mais de um membro,
+    acrescenta as colunas Duplicata_* que listam o grupo no relatório.
+    """
+    expandidos = []
+    for indice in grupo.membros:
+        participante, nome_livro, texto = itens[indice]
+        copia = dict(resultado)
+        copia['Livro'] = nome_livro
+        copia['Texto_Normalizado'] = texto
+        if len(grupo.membros) > 1:
+            copia.update(colunas_duplicata(grupo, indice, itens))
+        expandidos.append((participante, copia))
+    return expandidos
+
+
+def colunas_duplicata(grupo: GrupoDuplicatas, indice: int,
+                      itens: List[Tuple[str, str, str]]) -> Dict[str, Optional[object]]:
+    participante, nome_livro, _ = itens[grupo.representante]
+    outros = [f"{itens[i][0]}/{itens[i][1]}" for i in grupo.membros if i != indice]
+    return {
+        'Duplicata_Grupo': grupo.rotulo,
+        'Duplicata_Representante': f"{participante}/{nome_livro}",
+        'Duplicata_Similaridade': round(grupo.similaridades[indice], 3),
+        'Duplicata_Outros_Membros': '; '.join(outros)
+    }
@@ -1,7 +1,16 @@
 import logging
-from typing import Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import requests
-from time import sleep, time
+from limitador_taxa import LimitadorTaxa, LimiteTaxaExcedido
+from cache_resultados import CacheResultados
+from transporte_http import TransporteHTTP
+from agendador_cota import CotaDetector
+from divisao_trechos import analisar_em_trechos, contar_palavras, dividir_em_trechos, media_ponderada
+
+# Ordem das categorias de confiança; o resultado combinado de vários trechos fica com a menor
+ORDEM_CONFIANCA = {'low': 0, 'medium': 1, 'high': 2}
 
 class GPTZeroDetector:
     """
@@ -20,27 +29,39 @@ class GPTZeroDetector:
        - Textos de IA tendem a manter um nível mais constante de complexidade
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, limitador: LimitadorTaxa = None, cache: CacheResultados = None,
+                 transporte: TransporteHTTP = None, base_url: str = None):
         self.api_key = api_key
+        self.nome = 'GPTZero'
+        self.versao = 'v2'  # versão do endpoint usada na chave do cache; alterar invalida o cache
+        self.cache = cache
         self.logger = logging.getLogger('detector_ia')
-        self.base_url = "https://api.gptzero.me/v2/predict/text"
+        # A URL base pode ser trocada (parâmetro ou variável GPTZERO_BASE_URL) para apontar para um servidor local
+        self.transporte = transporte or TransporteHTTP(base_url or os.environ.get('GPTZERO_BASE_URL', "https://api.gptzero.me"),
+                                                   nome=self.nome)
+        self.caminho = "/v2/predict/text"
+        self.base_url = self.transporte.url(self.caminho)
         self.headers = {
             "accept": "application/json",
             "X-Api-Key": api_key,
             "Content-Type": "application/json"
         }
-        self.last_request_time = 0
-        self.min_request_interval = 1  # segundos entre requisições
-    
-    def _esperar_rate_limit(self):
-        """
-        Garante um intervalo mínimo entre requisições
-        """
-        agora = time()
-        tempo_desde_ultima = agora - self.last_request_time
-        if tempo_desde_ultima < self.min_request_interval:
-            sleep(self.min_request_interval - tempo_desde_ultima)
-        self.last_request_time = time()
+        self.limitador = limitador or LimitadorTaxa('GPTZero')
+        self.max_tentativas_rate_limit = 6  # tentativas após respostas 429
+        
+        # Limites do modo lote (vários documentos por requisição)
+        self.max_documentos_lote = 16
+        self.max_palavras_lote = 5000
+        self.lote_suportado = True  # desligado se a API não devolver um documento por texto
+        
+        # Modo trechos: textos com mais de max_palavras_trecho palavras são divididos
+        # e os trechos analisados em paralelo (None: texto sempre inteiro)
+        self.max_palavras_trecho: Optional[int] = None
+        # Executor dos trechos, compartilhado por todos os textos (None: trechos em sequência)
+        self.executor_trechos: Optional[ThreadPoolExecutor] = None
+        
+        # Cota de palavras/requisições: cada resposta bem sucedida é descontada (None: não contabiliza)
+        self.cota: Optional[CotaDetector] = None
     
     def analisar_texto(self, texto: str) -> Dict[str, Any]:
         """
@@ -72,72 +93,254 @@ class GPTZeroDetector:
           - "MIXED": seções com forte assinatura de IA ou documento com fraca assinatura de IA
           - "AI_ONLY": documento inteiramente escrito por IA
         - mensagem_resultado: Mensagem principal da classificação
+        
+        Com max_palavras_trecho, textos maiores são analisados em trechos (ver _analisar_trechos).
         """
-        try:
-            self._esperar_rate_limit()
-            
-            payload = {
-                "document": texto,
-                "multilingual": True
-            }
-            
-            # Log da requisição
-            self.logger.info(f"Enviando requisição para GPTZero - URL: {self.base_url}")
-            self.logger.debug(f"Headers: {self.headers}")
-            
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                json=payload
-            )
+        trechos = dividir_em_trechos(texto, self.max_palavras_trecho)
+        if len(trechos) > 1:
+            return self._analisar_trechos(trechos)
+        
+        if self.cache is not None:
+            resultado = self.cache.obter(self.nome, self.versao, texto)
+            if resultado is not None:
+                self.logger.debug("Resultado do GPTZero obtido do cache")
+                return resultado
+        
+        resultado = self._consultar_api(texto)
+        if self.cache is not None:
+            self.cache.guardar(self.nome, self.versao, texto, resultado)
+        return resultado
+    
+    def _analisar_trechos(self, trechos: List[str]) -> Dict[str, Any]:
+        """
+        Analisa os trechos em paralelo (cada um passa pelo cache) e combina os resultados em um
+        documento: probabilidades e pontuações são médias ponderadas pelo número de palavras de
+        cada trecho, a confiança é a menor entre os trechos e as sentenças são concatenadas.
+        """
+        palavras = [contar_palavras(trecho) for trecho in trechos]
+        self.logger.info("GPTZero: texto de %d palavras analisado em %d trechos", sum(palavras), len(trechos))
+        resultados = analisar_em_trechos(self.analisar_texto, trechos, self.executor_trechos)
+        
+        documentos = [resultado['documento'] for resultado in resultados]
+        prob_classes = {
+            classe: media_ponderada([doc['prob_classes'][classe] for doc in documentos], palavras)
+            for classe in ('ai', 'human', 'mixed')
+        }
+        classificacoes = {doc['classificacao_documento'] for doc in documentos}
+        return {
+            'version': resultados[0]['version'],
+            'scan_id': ','.join(resultado['scan_id'] for resultado in resultados if resultado['scan_id']),
+            'documento': {
+                'prob_media_ia': media_ponderada([doc['prob_media_ia'] for doc in documentos], palavras),
+                'prob_classes': prob_classes,
+                'categoria_confianca': min((doc['categoria_confianca'] for doc in documentos),
+                                           key=lambda categoria: ORDEM_CONFIANCA.get(categoria, -1)),
+                'pontuacao_confianca': media_ponderada([doc['pontuacao_confianca'] for doc in documentos], palavras),
+                'classe_prevista': max(prob_classes, key=prob_classes.get),
+                # Trechos com classificações diferentes formam um documento misto
+                'classificacao_documento': classificacoes.pop() if len(classificacoes) == 1 else 'MIXED',
+                'mensagem_resultado': f"Resultado combinado de {len(trechos)} trechos "
+                                      f"(média ponderada pelo número de palavras)"
+            },
+            'sentencas': [sentenca for resultado in resultados for sentenca in resultado['sentencas']]
+        }
+    
+    def _enviar(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envia o payload à API GPTZero respeitando o limitador de taxa e retorna o JSON da resposta
+        """
+        # Log da requisição
+        self.logger.info("Enviando requisição para GPTZero - URL: %s", self.base_url)
+        
+        for tentativa in range(self.max_tentativas_rate_limit):
+            self.limitador.adquirir()
+            response = self.transporte.post_json(self.caminho, payload, self.headers)
             
             # Log da resposta
-            self.logger.info(f"Status code GPTZero: {response.status_code}")
-            self.logger.debug(f"Resposta bruta GPTZero: {response.text}")
+            self.logger.info("Status code GPTZero: %s", response.status_code)
+            if self.logger.isEnabledFor(logging.DEBUG):  # response.text decodifica o corpo inteiro
+                self.logger.debug("Resposta bruta GPTZero: %s", response.text)
             
-            # Se houver erro de rate limit, espera e tenta novamente
+            # Se houver erro de rate limit, o limitador reduz a taxa e bloqueia até a nova tentativa
             if response.status_code == 429:
-                self.logger.warning("Rate limit atingido, aguardando 60 segundos...")
-                sleep(60)
-                return self.analisar_texto(texto)
-            
-            response.raise_for_status()
-            data = response.json()
-            doc = data.get('documents', [{}])[0]  # Pega o primeiro documento
+                self.limitador.registrar_limite(response.headers, tentativa)
+                continue
             
-            # Processa e formata a resposta
-            resultado = {
-                'version': data.get('version', ''),
-                'scan_id': data.get('scanId', ''),
-                'documento': {
-                    'prob_media_ia': doc.get('average_generated_prob', 0),
-                    'prob_classes': {
-                        'ai': doc.get('class_probabilities', {}).get('ai', 0),
-                        'human': doc.get('class_probabilities', {}).get('human', 0),
-                        'mixed': doc.get('class_probabilities', {}).get('mixed', 0)
-                    },
-                    'categoria_confianca': doc.get('confidence_category', ''),
-                    'pontuacao_confianca': doc.get('confidence_score', 0),
-                    'classe_prevista': doc.get('predicted_class', ''),
-                    'classificacao_documento': doc.get('document_classification', ''),
-                    'mensagem_resultado': doc.get('result_message', '')
+            if response.ok:
+                self.limitador.registrar_sucesso(response.headers)
+                if self.cota is not None:
+                    textos = payload['documents'] if 'documents' in payload else [payload['document']]
+                    self.cota.consumir(sum(contar_palavras(texto) for texto in textos))
+            break
+        else:
+            raise LimiteTaxaExcedido(
+                f"Rate limit do GPTZero persistiu após {self.max_tentativas_rate_limit} tentativas"
+            )
+        
+        response.raise_for_status()
+        return response.json()
+    
+    def _formatar_documento(self, data: Dict[str, Any], doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Converte um documento da resposta da API no formato retornado por analisar_texto
+        """
+        return {
+            'version': data.get('version', ''),
+            'scan_id': data.get('scanId', ''),
+            'documento': {
+                'prob_media_ia': doc.get('average_generated_prob', 0),
+                'prob_classes': {
+                    'ai': doc.get('class_probabilities', {}).get('ai', 0),
+                    'human': doc.get('class_probabilities', {}).get('human', 0),
+                    'mixed': doc.get('class_probabilities', {}).get('mixed', 0)
                 },
-                'sentencas': [
-                    {
-                        'texto': s.get('sentence', ''),
-                        'prob_ia': s.get('generated_prob', 0),
-                        'perplexidade': s.get('perplexity', 0),
-                        'destacar_ia': s.get('highlight_sentence_for_ai', False)
-                    }
-                    for s in doc.get('sentences', [])
-                ]
+                'categoria_confianca': doc.get('confidence_category', ''),
+                'pontuacao_confianca': doc.get('confidence_score', 0),
+                'classe_prevista': doc.get('predicted_class', ''),
+                'classificacao_documento': doc.get('document_classification', ''),
+                'mensagem_resultado': doc.get('result_message', '')
+            },
+            'sentencas': [
+                {
+                    'texto': s.get('sentence', ''),
+                    'prob_ia': s.get('generated_prob', 0),
+                    'perplexidade': s.get('perplexity', 0),
+                    'destacar_ia': s.get('highlight_sentence_for_ai', False)
+                }
+                for s in doc.get('sentences', [])
+            ]
+        }
+    
+    def _consultar_api(self, texto: str) -> Dict[str, Any]:
+        """
+        Envia o texto à API GPTZero e formata a resposta (sem passar pelo cache)
+        """
+        try:
+            payload = {
+                "document": texto,
+                "multilingual": True
             }
+            data = self._enviar(payload)
+            doc = data.get('documents', [{}])[0]  # Pega o primeiro documento
             
-            return resultado
+            # Processa e formata a resposta
+            return self._formatar_documento(data, doc)
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Erro na chamada à API GPTZero: {str(e)}")
+            self.logger.error("Erro na chamada à API GPTZero: %s", e)
             raise
         except Exception as e:
-            self.logger.error(f"Erro ao processar resposta da API GPTZero: {str(e)}")
-            raise 
\ No newline at end of file
+            self.logger.error("Erro ao processar resposta da API GPTZero: %s", e)
+            raise
+    
+    def estimar_custo(self, texto: str, lote: bool = False) -> Tuple[float, float]:
+        """
+        Palavras e requisições que analisar_texto gastaria na API (trechos em cache não custam nada).
+        No modo lote, um texto que cabe num lote conta como fração de requisição.
+        """
+        palavras = requisicoes = 0
+        trechos = dividir_em_trechos(texto, self.max_palavras_trecho)
+        for trecho in trechos:
+            if self.cache is None or not self.cache.contem(self.nome, self.versao, trecho):
+                palavras += contar_palavras(trecho)
+                requisicoes += 1
+        if lote and len(trechos) == 1 and self.lote_suportado:
+            requisicoes /= self.max_documentos_lote
+        return palavras, requisicoes
+    
+    def agrupar_lote(self, textos: List[str]) -> List[List[int]]:
+        """
+        Agrupa os índices dos textos em lotes que respeitam max_documentos_lote e
+        max_palavras_lote. Um texto maior que o limite de palavras fica sozinho no lote.
+        """
+        grupos = []
+        grupo_atual = []
+        palavras_grupo = 0
+        for indice, texto in enumerate(textos):
+            palavras = len(texto.split())
+            if grupo_atual and (len(grupo_atual) >= self.max_documentos_lote
+                                or palavras_grupo + palavras > self.max_palavras_lote):
+                grupos.append(grupo_atual)
+                grupo_atual = []
+                palavras_grupo = 0
+            grupo_atual.append(indice)
+            palavras_grupo += palavras
+        if grupo_atual:
+            grupos.append(grupo_atual)
+        return grupos
+    
+    def _consultar_api_lote(self, textos: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Envia vários textos em uma única requisição. Retorna None se a resposta não
+        trouxer exatamente um documento por texto enviado.
+        """
+        payload = {
+            "documents": textos,
+            "multilingual": True
+        }
+        data = self._enviar(payload)
+        documentos = data.get('documents', [])
+        if len(documentos) != len(textos):
+            self.logger.warning(
+                "GPTZero devolveu %d documentos para um lote de %d textos; modo lote desativado",
+                len(documentos), len(textos)
+            )
+            self.lote_suportado = False
+            return None
+        return [self._formatar_documento(data, doc) for doc in documentos]
+    
+    def analisar_lote(self, textos: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Analisa vários textos agrupando-os em requisições com vários documentos,
+        o que reduz o número de requisições sob limite de requisições por minuto.
+        
+        Retorna uma lista na mesma ordem de `textos`, no formato de analisar_texto.
+        Textos em cache não são reenviados. Se um lote falhar, seus textos são
+        analisados um a um; textos que também falharem individualmente ficam como None.
+        Textos acima de max_palavras_trecho não entram nos lotes e são analisados em trechos.
+        """
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(textos)
+        pendentes = []
+        longos = []
+        for indice, texto in enumerate(textos):
+            if len(dividir_em_trechos(texto, self.max_palavras_trecho)) > 1:
+                longos.append(indice)
+                continue
+            resultado = self.cache.obter(self.nome, self.versao, texto) if self.cache is not None else None
+            if resultado is not None:
+                resultados[indice] = resultado
+            else:
+                pendentes.append(indice)
+        
+        for grupo in self.agrupar_lote([textos[i] for i in pendentes]):
+            indices = [pendentes[i] for i in grupo]
+            documentos = None
+            if self.lote_suportado and len(indices) > 1:
+                try:
+                    documentos = self._consultar_api_lote([textos[i] for i in indices])
+                except Exception as e:
+                    self.logger.warning("Falha no lote GPTZero com %d textos, analisando um a um: %s", len(indices), e)
+            
+            if documentos is not None:
+                for indice, resultado in zip(indices, documentos):
+                    resultados[indice] = resultado
+                    if self.cache is not None:
+                        self.cache.guardar(self.nome, self.versao, textos[indice], resultado)
+                continue
+            
+            # Fallback: um documento por requisição
+            for indice in indices:
+                try:
+                    resultados[indice] = self._consultar_api(textos[indice])
+                    if self.cache is not None:
+                        self.cache.guardar(self.nome, self.versao, textos[indice], resultados[indice])
+                except Exception as e:
+                    self.logger.error("Falha ao analisar texto %d do lote no GPTZero: %s", indice + 1, e)
+        
+        for indice in longos:
+            try:
+                resultados[indice] = self.analisar_texto(textos[indice])
+            except Exception as e:
+                self.logger.error("Falha ao analisar texto %d do lote no GPTZero: %s", indice + 1, e)
+        
+        return resultados
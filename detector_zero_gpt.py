@@ -1,7 +1,13 @@
 import logging
-from typing import Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import requests
-from time import sleep, time
+from limitador_taxa import LimitadorTaxa, LimiteTaxaExcedido
+from cache_resultados import CacheResultados
+from transporte_http import TransporteHTTP
+from agendador_cota import CotaDetector
+from divisao_trechos import analisar_em_trechos, contar_palavras, dividir_em_trechos, media_ponderada
 
 class ZeroGPTDetector:
     """
@@ -17,26 +23,33 @@ class ZeroGPTDetector:
        - Baseado no tamanho e qualidade do texto analisado
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, limitador: LimitadorTaxa = None, cache: CacheResultados = None,
+                 transporte: TransporteHTTP = None, base_url: str = None):
         self.api_key = api_key
+        self.nome = 'ZeroGPT'
+        self.versao = 'detectText-v1'  # versão do endpoint usada na chave do cache; alterar invalida o cache
+        self.cache = cache
         self.logger = logging.getLogger('detector_ia')
-        self.base_url = "https://api.zerogpt.com/api/detect/detectText"  # Endpoint correto
+        # A URL base pode ser trocada (parâmetro ou variável ZEROGPT_BASE_URL) para apontar para um servidor local
+        self.transporte = transporte or TransporteHTTP(base_url or os.environ.get('ZEROGPT_BASE_URL', "https://api.zerogpt.com"),
+                                                   nome=self.nome)
+        self.caminho = "/api/detect/detectText"
+        self.base_url = self.transporte.url(self.caminho)
         self.headers = {
             "ApiKey": api_key,  # Header correto
             "Content-Type": "application/json"
         }
-        self.last_request_time = 0
-        self.min_request_interval = 1  # segundos entre requisições
-    
-    def _esperar_rate_limit(self):
-        """
-        Garante um intervalo mínimo entre requisições
-        """
-        agora = time()
-        tempo_desde_ultima = agora - self.last_request_time
-        if tempo_desde_ultima < self.min_request_interval:
-            sleep(self.min_request_interval - tempo_desde_ultima)
-        self.last_request_time = time()
+        self.limitador = limitador or LimitadorTaxa('ZeroGPT')
+        self.max_tentativas_rate_limit = 6  # tentativas após respostas 429
+        
+        # Modo trechos: textos com mais de max_palavras_trecho palavras são divididos
+        # e os trechos analisados em paralelo (None: texto sempre inteiro)
+        self.max_palavras_trecho: Optional[int] = None
+        # Executor dos trechos, compartilhado por todos os textos (None: trechos em sequência)
+        self.executor_trechos: Optional[ThreadPoolExecutor] = None
+        
+        # Cota de palavras/requisições: cada resposta bem sucedida é descontada (None: não contabiliza)
+        self.cota: Optional[CotaDetector] = None
     
     def analisar_texto(self, texto: str) -> Dict[str, Any]:
         """
@@ -64,34 +77,99 @@ class ZeroGPTDetector:
         
         - feedback (str):
           Feedback detalhado da análise
+        
+        Com max_palavras_trecho, textos maiores são analisados em trechos (ver _analisar_trechos).
+        """
+        trechos = dividir_em_trechos(texto, self.max_palavras_trecho)
+        if len(trechos) > 1:
+            return self._analisar_trechos(texto, trechos)
+        
+        if self.cache is not None:
+            resultado = self.cache.obter(self.nome, self.versao, texto)
+            if resultado is not None:
+                self.logger.debug("Resultado do ZeroGPT obtido do cache")
+                return resultado
+        
+        resultado = self._consultar_api(texto)
+        if self.cache is not None and resultado['success']:  # só guarda análises bem sucedidas
+            self.cache.guardar(self.nome, self.versao, texto, resultado)
+        return resultado
+    
+    def _analisar_trechos(self, texto: str, trechos: List[str]) -> Dict[str, Any]:
+        """
+        Analisa os trechos em paralelo (cada um passa pelo cache) e combina os resultados:
+        a porcentagem de IA é a média ponderada pelo número de palavras de cada trecho,
+        contagens somadas, sentenças concatenadas e feedbacks distintos juntados. Se algum trecho não tiver sucesso,
+        o resultado é o desse trecho.
+        """
+        palavras = [contar_palavras(trecho) for trecho in trechos]
+        self.logger.info("ZeroGPT: texto de %d palavras analisado em %d trechos", sum(palavras), len(trechos))
+        resultados = analisar_em_trechos(self.analisar_texto, trechos, self.executor_trechos)
+        
+        falhas = [resultado for resultado in resultados if not resultado['success']]
+        if falhas:
+            return dict(falhas[0], input_text=texto)
+        return {
+            'success': True,
+            'input_text': texto,
+            'total_palavras': sum(resultado['total_palavras'] for resultado in resultados),
+            'palavras_ia': sum(resultado['palavras_ia'] for resultado in resultados),
+            'porcentagem_ia': round(media_ponderada([resultado['porcentagem_ia'] for resultado in resultados],
+                                                    palavras), 2),
+            'sentencas': [sentenca for resultado in resultados for sentenca in resultado['sentencas']],
+            'sentencas_ia': [sentenca for resultado in resultados for sentenca in resultado['sentencas_ia']],
+            'feedback': ' | '.join(dict.fromkeys(resultado['feedback'] for resultado in resultados if resultado['feedback'])),
+            'mensagem': f"Resultado combinado de {len(trechos)} trechos (média ponderada pelo número de palavras)"
+        }
+    
+    def estimar_custo(self, texto: str) -> Tuple[float, float]:
+        """
+        Palavras e requisições que analisar_texto gastaria na API (trechos em cache não custam nada)
+        """
+        palavras = requisicoes = 0
+        for trecho in dividir_em_trechos(texto, self.max_palavras_trecho):
+            if self.cache is None or not self.cache.contem(self.nome, self.versao, trecho):
+                palavras += contar_palavras(trecho)
+                requisicoes += 1
+        return palavras, requisicoes
+    
+    def _consultar_api(self, texto: str) -> Dict[str, Any]:
+        """
+        Envia o texto à API ZeroGPT e formata a resposta (sem passar pelo cache)
         """
         try:
-            self._esperar_rate_limit()
-            
             payload = {
                 "text": "",
                 "input_text": texto
             }
             
             # Log da requisição
-            self.logger.info(f"Enviando requisição para ZeroGPT - URL: {self.base_url}")
-            self.logger.debug(f"Headers: {self.headers}")
-            self.logger.debug(f"Payload: {payload}")
-            
-            response = requests.post(
-                self.base_url,
-                headers=self.headers,
-                json=payload
-            )
+            self.logger.info("Enviando requisição para ZeroGPT - URL: %s", self.base_url)
+            self.logger.debug("Payload: %s", payload)
             
-            # Log da resposta
-            self.logger.info(f"Status code: {response.status_code}")
-            self.logger.debug(f"Resposta bruta: {response.text}")
-            
-            if response.status_code == 429:
-                self.logger.warning("Rate limit atingido, aguardando 60 segundos...")
-                sleep(60)
-                return self.analisar_texto(texto)
+            for tentativa in range(self.max_tentativas_rate_limit):
+                self.limitador.adquirir()
+                response = self.transporte.post_json(self.caminho, payload, self.headers)
+                
+                # Log da resposta
+                self.logger.info("Status code: %s", response.status_code)
+                if self.logger.isEnabledFor(logging.DEBUG):  # response.text decodifica o corpo inteiro
+                    self.logger.debug("Resposta bruta: %s", response.text)
+                
+                # Se houver erro de rate limit, o limitador reduz a taxa e bloqueia até a nova tentativa
+                if response.status_code == 429:
+                    self.limitador.registrar_limite(response.headers, tentativa)
+                    continue
+                
+                if response.ok:
+                    self.limitador.registrar_sucesso(response.headers)
+                    if self.cota is not None:
+                        self.cota.consumir(contar_palavras(texto))
+                break
+            else:
+                raise LimiteTaxaExcedido(
+                    f"Rate limit do ZeroGPT persistiu após {self.max_tentativas_rate_limit} tentativas"
+                )
             
             response.raise_for_status()
             
@@ -115,7 +193,7 @@ class ZeroGPTDetector:
                     'mensagem': data.get('message', '')
                 }
             else:
-                self.logger.warning(f"API retornou erro: {data.get('message')}")
+                self.logger.warning("API retornou erro: %s", data.get('message'))
                 resultado = {
                     'success': False,
                     'input_text': texto,
@@ -131,9 +209,9 @@ class ZeroGPTDetector:
             return resultado
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Erro na chamada à API ZeroGPT: {str(e)}")
-            self.logger.error(f"Detalhes da requisição: URL={self.base_url}, Headers={self.headers}")
+            self.logger.error("Erro na chamada à API ZeroGPT: %s", e)
+            self.logger.error("Detalhes da requisição: URL=%s", self.base_url)
             raise
         except Exception as e:
-            self.logger.error(f"Erro ao processar resposta da API ZeroGPT: {str(e)}")
+            self.logger.error("Erro ao processar resposta da API ZeroGPT: %s", e)
             raise 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+
+R = TypeVar('R')
+
+_PALAVRA = re.compile(r'\S+')
+_FIM_SENTENCA = re.compile(r'[.!?…]["\'”»)\]]*$')
+
+def dividir_em_trechos(texto: str, max_palavras: Optional[int]) -> List[str]:
+    """
+    Divide um texto longo em trechos de até max_palavras palavras, cortando em fins de sentença.
+    Os trechos têm tamanhos parecidos (o último não fica com só uma sobra) e são recortados do
+    texto original, preservando quebras de linha. Uma sentença maior que o limite é cortada entre
+    palavras. Sem limite, ou com o texto dentro dele, retorna [texto].
+    """
+    palavras = list(_PALAVRA.finditer(texto))
+    total = len(palavras)
+    if not max_palavras or total <= max_palavras:
+        return [texto]
+
+    alvo = math.ceil(total / math.ceil(total / max_palavras))
+    trechos = []
+    inicio = 0
+    while inicio < total:
+        if total - inicio <= max_palavras:
+            fim = total
+        else:
+            # Fim de sentença mais próximo do tamanho alvo, sem passar do limite
+            candidatos = [j for j in range(inicio + 1, inicio + max_palavras + 1)
+                          if _FIM_SENTENCA.search(palavras[j - 1].group())]
+            fim = min(candidatos, key=lambda j: abs(j - inicio - alvo)) if candidatos else inicio + alvo
+        trechos.append(texto[palavras[inicio].start():palavras[fim - 1].end()])
+        inicio = fim
+    return trechos
+
+def contar_palavras(texto: str) -> int:
+    return len(texto.split())
+
+def analisar_em_trechos(analisar: Callable[[str], R], trechos: List[str],
+                        executor: Optional[ThreadPoolExecutor]) -> List[R]:
+    """
+    Analisa os trechos no executor do detector, mantendo a ordem. O executor é compartilhado
+    pelos trechos de todos os textos, o que limita as requisições de trechos em andamento
+    (sem executor, os trechos são analisados em sequência). Se algum trecho falhar,
+    a exceção é propagada, como na análise do texto inteiro.
+    """
+    if executor is None:
+        return [analisar(trecho) for trecho in trechos]
+    return list(executor.map(analisar, trechos))
+
+def media_ponderada(valores: List[float], pesos: List[int]) -> float:
+    return sum(valor * peso for valor, peso in zip(valores, pesos)) / sum(pesos)
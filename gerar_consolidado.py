@@ -1,27 +1,11 @@
-from pathlib import Path
-from analisador_consolidado import AnalisadorConsolidado
-import logging
-
-def configurar_logging():
-    logger = logging.getLogger('detector_ia')
-    logger.setLevel(logging.INFO)
-    Path('logs').mkdir(exist_ok=True)
-    handler = logging.StreamHandler()
-    handler.setLevel(logging.INFO)
-    logger.addHandler(handler)
-    return logger
+import sys
+from configuracao_log import configurar_logging
+from pipeline_etapas import executar_etapas, parse_argumentos_etapas
 
 def main():
-    logger = configurar_logging()
-    pasta_relatorios = Path("Resumos/Relatórios")
-    
-    try:
-        analisador = AnalisadorConsolidado(pasta_relatorios)
-        analisador.gerar_relatorio_consolidado()
-        logger.info("Relatório consolidado gerado com sucesso")
-    except Exception as e:
-        logger.error(f"Erro: {str(e)}")
-        raise
+    # Atalho para "python main.py consolidate" (aceita as mesmas opções, ex.: --force)
+    configurar_logging()
+    executar_etapas(parse_argumentos_etapas(['consolidate'] + sys.argv[1:]), nome_metricas='gerar_consolidado')
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,270 +1,153 @@
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-from pathlib import Path
 import logging
+from typing import Dict, List, Tuple
+from armazem_resultados import ArmazemResultados
+from analisador_consolidado import AnalisadorConsolidado
+from pretriagem import CAMINHOS_LOCAIS
+from renderizador_graficos import RenderizadorGraficos, TarefaGrafico
+from configuracao_log import configurar_logging
 
-def configurar_logging():
-    logger = logging.getLogger('detector_ia')
-    logger.setLevel(logging.INFO)
-    
-    # Cria pasta de logs se não existir
-    Path('logs').mkdir(exist_ok=True)
-    
-    # Handler para arquivo
-    fh = logging.FileHandler('logs/detector_ia.log', encoding='utf-8')
-    fh.setLevel(logging.INFO)
-    
-    # Handler para console
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    
-    # Formato do log
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
-    
-    logger.addHandler(fh)
-    logger.addHandler(ch)
-    
-    return logger
+# Colunas do armazenamento de resultados usadas nos gráficos
+COLUNAS_GRAFICOS = ['GPTZero_Prob_IA', 'ZeroGPT_Porcentagem_IA']
 
-def gerar_grafico_barras(df, coluna, titulo, arquivo_saida):
-    plt.figure(figsize=(12, 6))
-    bars = plt.bar(df['Participante'], df[coluna])
-    
-    # Adiciona rótulos nas barras
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'{height:.1f}%',
-                ha='center', va='bottom')
-    
-    plt.xticks(rotation=45, ha='right')
-    plt.xlabel('Participante')
-    plt.ylabel('% de Resenhas Marcadas como IA')
-    plt.title(titulo)
-    plt.tight_layout()
-    
-    plt.savefig(arquivo_saida)
-    plt.close()
-
-def gerar_grafico_barras_absoluto(df, coluna, titulo, arquivo_saida):
-    plt.figure(figsize=(12, 6))
-    bars = plt.bar(df['Participante'], df[coluna])
-    
-    # Adiciona rótulos nas barras
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(height)}',  # Valor inteiro para contagem absoluta
-                ha='center', va='bottom')
-    
-    plt.xticks(rotation=45, ha='right')
-    plt.xlabel('Participante')
-    plt.ylabel('Número de Resenhas Marcadas como IA')
-    plt.title(titulo)
-    plt.tight_layout()
-    
-    plt.savefig(arquivo_saida)
-    plt.close()
+def tarefa_dispersao_individual(df: pd.DataFrame, participante: str) -> TarefaGrafico:
+    return TarefaGrafico(
+        'dispersao_individual',
+        f'grafico_dispersao_{participante}',
+        f'Comparação entre Detectores - {participante}',
+        {
+            'livros': df['Livro/curso'].tolist(),
+            'zerogpt': df['ZeroGPT_Porcentagem_IA'].tolist(),
+            'gptzero': df['GPTZero_Prob_IA'].tolist()
+        }
+    )
 
-def gerar_grafico_dispersao(df, arquivo_saida):
-    plt.figure(figsize=(10, 8))
-    # Normaliza ZeroGPT para escala 0-1
-    plt.scatter(df['Media_ZeroGPT'] / 100, df['Media_GPTZero'])
-    
-    # Adiciona rótulos para cada ponto
-    for i, participante in enumerate(df['Participante']):
-        plt.annotate(participante, 
-                   (df['Media_ZeroGPT'].iloc[i] / 100, 
-                    df['Media_GPTZero'].iloc[i]))
-    
-    plt.xlabel('ZeroGPT_Porcentagem_IA (normalizado 0-1)')
-    plt.ylabel('GPTZero_Prob_IA')
-    plt.title('Comparação entre Detectores por Participante')
-    plt.grid(True)
-    
-    plt.savefig(arquivo_saida)
-    plt.close()
-
-def gerar_grafico_dispersao_absoluto(pasta_relatorios, arquivo_saida):
-    plt.figure(figsize=(10, 8))
-    
-    # Processa cada arquivo para obter contagens absolutas
-    contagens = []
-    for arquivo in pasta_relatorios.glob('relatório_*.xlsx'):
-        if 'consolidado' not in arquivo.stem:
-            participante = arquivo.stem.replace('relatório_', '')
-            df = pd.read_excel(arquivo)
-            
-            # Conta resenhas acima de 0.40 para cada detector
-            total_gptzero = len(df[df['GPTZero_Prob_IA'] >= 0.40])
-            total_zerogpt = len(df[df['ZeroGPT_Porcentagem_IA'] >= 40])
+def tarefas_consolidadas(df_consolidado: pd.DataFrame, frames: Dict[str, pd.DataFrame]) -> List[TarefaGrafico]:
+    """
+    Gráficos de todos os participantes: dispersão das médias, barras com percentuais e
+    números absolutos de resenhas marcadas e dispersão das contagens de cada detector
+    """
+    tarefas = [TarefaGrafico(
+        'dispersao_consolidado',
+        'grafico_dispersao_consolidado',
+        'Comparação entre Detectores por Participante',
+        {
+            'participantes': df_consolidado['Participante'].tolist(),
+            'zerogpt': df_consolidado['Media_ZeroGPT'].tolist(),
+            'gptzero': df_consolidado['Media_GPTZero'].tolist()
+        }
+    )]
+    
+    # Calcula percentuais e contagens absolutas de cada participante
+    resultados = []
+    for participante, df_individual in frames.items():
+        total_resenhas = len(df_individual)
+        
+        if total_resenhas > 0:  # Evita divisão por zero
+            # Calcula contagens para diferentes thresholds
+            total_40 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.40) | 
+                                       (df_individual['ZeroGPT_Porcentagem_IA'] >= 40)])
+            total_60 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.60) | 
+                                       (df_individual['ZeroGPT_Porcentagem_IA'] >= 60)])
+            total_80 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.80) | 
+                                       (df_individual['ZeroGPT_Porcentagem_IA'] >= 80)])
             
-            contagens.append({
+            resultados.append({
                 'Participante': participante,
-                'Total_GPTZero_40': total_gptzero,
-                'Total_ZeroGPT_40': total_zerogpt
+                'Percentual_Marcadas_>40': (total_40 / total_resenhas) * 100,
+                'Percentual_Marcadas_>60': (total_60 / total_resenhas) * 100,
+                'Percentual_Marcadas_>80': (total_80 / total_resenhas) * 100,
+                'Total_Marcadas_>40': total_40,
+                'Total_Marcadas_>60': total_60,
+                'Total_Marcadas_>80': total_80
             })
     
-    df_contagens = pd.DataFrame(contagens)
-    
-    # Plota o gráfico com eixos invertidos
-    plt.scatter(df_contagens['Total_ZeroGPT_40'], df_contagens['Total_GPTZero_40'])
-    
-    # Adiciona rótulos para cada ponto
-    for i, participante in enumerate(df_contagens['Participante']):
-        plt.annotate(participante, 
-                   (df_contagens['Total_ZeroGPT_40'].iloc[i], 
-                    df_contagens['Total_GPTZero_40'].iloc[i]))
-    
-    plt.xlabel('Número de Resenhas com ZeroGPT_Porcentagem_IA >= 40')
-    plt.ylabel('Número de Resenhas com GPTZero_Prob_IA >= 0.40')
-    plt.title('Comparação do Número de Resenhas Marcadas por Cada Detector')
-    plt.grid(True)
-    
-    # Força o uso de números inteiros nos eixos
-    plt.gca().xaxis.set_major_locator(plt.MaxNLocator(integer=True))
-    plt.gca().yaxis.set_major_locator(plt.MaxNLocator(integer=True))
-    
-    plt.savefig(arquivo_saida)
-    plt.close()
+    # Cria DataFrame com os resultados
+    df_resultados = pd.DataFrame(resultados, columns=[
+        'Participante', 'Percentual_Marcadas_>40', 'Percentual_Marcadas_>60', 'Percentual_Marcadas_>80',
+        'Total_Marcadas_>40', 'Total_Marcadas_>60', 'Total_Marcadas_>80'
+    ])
+    
+    # Três gráficos de barra com percentuais e três com números absolutos
+    for prefixo, tipo, titulo, sufixo in [
+        ('Percentual', 'barras', 'Percentual de Resenhas Marcadas como IA', ''),
+        ('Total', 'barras_absoluto', 'Número de Resenhas Marcadas como IA', '_absoluto')
+    ]:
+        for threshold in ['40', '60', '80']:
+            coluna = f'{prefixo}_Marcadas_>{threshold}'
+            df_ordenado = df_resultados.sort_values(coluna, ascending=False)
+            tarefas.append(TarefaGrafico(
+                tipo,
+                f'grafico_barras_consolidado_{threshold}{sufixo}',
+                f'{titulo} (>{threshold}%)',
+                {'participantes': df_ordenado['Participante'].tolist(), 'valores': df_ordenado[coluna].tolist()}
+            ))
+    
+    # Dispersão com o número de resenhas acima de 0.40 para cada detector
+    participantes = list(frames)
+    tarefas.append(TarefaGrafico(
+        'dispersao_absoluto',
+        'grafico_dispersao_consolidado_absoluto',
+        'Comparação do Número de Resenhas Marcadas por Cada Detector',
+        {
+            'participantes': participantes,
+            'zerogpt': [int((frames[p]['ZeroGPT_Porcentagem_IA'] >= 40).sum()) for p in participantes],
+            'gptzero': [int((frames[p]['GPTZero_Prob_IA'] >= 0.40).sum()) for p in participantes]
+        }
+    ))
+    return tarefas
 
-def gerar_grafico_dispersao_individual(df, participante, arquivo_saida):
-    plt.figure(figsize=(10, 8))
-    # Normaliza ZeroGPT para escala 0-1
-    plt.scatter(df['ZeroGPT_Porcentagem_IA'] / 100, df['GPTZero_Prob_IA'])
-    
-    # Adiciona rótulos para cada ponto
-    for i, livro in enumerate(df['Livro/curso']):
-        plt.annotate(livro, 
-                   (df['ZeroGPT_Porcentagem_IA'].iloc[i] / 100, 
-                    df['GPTZero_Prob_IA'].iloc[i]),
-                   fontsize=8)
-    
-    plt.xlabel('ZeroGPT_Porcentagem_IA (normalizado 0-1)')
-    plt.ylabel('GPTZero_Prob_IA')
-    plt.title(f'Comparação entre Detectores - {participante}')
-    plt.grid(True)
-    
-    # Define limites fixos para os eixos (agora ambos 0-1)
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    
-    plt.savefig(arquivo_saida, bbox_inches='tight', dpi=300)
-    plt.close()
+def carregar_resenhas(armazem: ArmazemResultados) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Lê uma única vez, do armazenamento, as colunas usadas nos gráficos (nomes como no relatório).
+    Retorna todas as resenhas e um DataFrame por participante (vazio para quem não tem resenhas),
+    que são repassados a todas as funções de gráfico. Resenhas resolvidas pela pré-triagem ficam
+    sem pontuação dos detectores.
+    """
+    df = armazem.carregar(['Livro'] + COLUNAS_GRAFICOS + ['Triagem_Caminho'])
+    df = df.rename(columns={'Livro': 'Livro/curso'})
+    locais = df.pop('Triagem_Caminho').isin(CAMINHOS_LOCAIS)
+    df[COLUNAS_GRAFICOS] = df[COLUNAS_GRAFICOS].mask(locais, axis=0)
+    grupos = dict(tuple(df.groupby('Participante', sort=False)))
+    frames = {
+        participante: grupos.get(participante, df.iloc[0:0]).reset_index(drop=True)
+        for participante in armazem.participantes()
+    }
+    return df, frames
+
+def gerar_graficos_participantes(armazem: ArmazemResultados, renderizador: RenderizadorGraficos):
+    """
+    Gráfico de dispersão de cada participante (só os que mudaram são redesenhados)
+    """
+    _, frames = carregar_resenhas(armazem)
+    renderizador.renderizar([
+        tarefa_dispersao_individual(df_individual, participante)
+        for participante, df_individual in frames.items()
+    ])
+
+def gerar_graficos(armazem: ArmazemResultados, renderizador: RenderizadorGraficos, forcar: bool = False):
+    """
+    Gráficos individuais de todos os participantes e os consolidados (só os que mudaram
+    são redesenhados, a menos que forcar seja True)
+    """
+    df_resenhas, frames = carregar_resenhas(armazem)
+    
+    # Métricas consolidadas por participante
+    df = AnalisadorConsolidado(renderizador.pasta_saida, armazem).consolidar(df_resenhas, list(frames))
+    
+    tarefas = [tarefa_dispersao_individual(df_individual, participante)
+               for participante, df_individual in frames.items()]
+    tarefas.extend(tarefas_consolidadas(df, frames))
+    renderizador.renderizar(tarefas, forcar)
+    logging.getLogger('detector_ia').info("Geração de gráficos extras concluída com sucesso")
 
 def main():
-    logger = configurar_logging()
-    pasta_relatorios = Path("Resumos/Relatórios")
-    
-    try:
-        # Gera gráficos individuais
-        for arquivo in pasta_relatorios.glob('relatório_*.xlsx'):
-            if 'consolidado' not in arquivo.stem:
-                participante = arquivo.stem.replace('relatório_', '')
-                df_individual = pd.read_excel(arquivo)
-                
-                # Gera gráfico de dispersão individual
-                gerar_grafico_dispersao_individual(
-                    df_individual,
-                    participante,
-                    pasta_relatorios / f'grafico_dispersao_{participante}.png'
-                )
-                logger.info(f"Gerado gráfico de dispersão para {participante}")
-        
-        # Lê o relatório consolidado
-        df = pd.read_excel(pasta_relatorios / "relatorio_consolidado.xlsx")
-        
-        # Gera gráfico de dispersão (sem escalas fixas)
-        gerar_grafico_dispersao(df, pasta_relatorios / 'grafico_dispersao_consolidado.png')
-        logger.info("Gerado gráfico de dispersão consolidado")
-        
-        # Processa cada arquivo individual para calcular percentuais
-        resultados = []
-        for arquivo in pasta_relatorios.glob('relatório_*.xlsx'):
-            if 'consolidado' not in arquivo.stem:
-                participante = arquivo.stem.replace('relatório_', '')
-                df_individual = pd.read_excel(arquivo)
-                total_resenhas = len(df_individual)
-                
-                if total_resenhas > 0:  # Evita divisão por zero
-                    # Calcula percentuais para diferentes thresholds
-                    total_40 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.40) | 
-                                               (df_individual['ZeroGPT_Porcentagem_IA'] >= 40)])
-                    total_60 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.60) | 
-                                               (df_individual['ZeroGPT_Porcentagem_IA'] >= 60)])
-                    total_80 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.80) | 
-                                               (df_individual['ZeroGPT_Porcentagem_IA'] >= 80)])
-                    
-                    resultados.append({
-                        'Participante': participante,
-                        'Percentual_Marcadas_>40': (total_40 / total_resenhas) * 100,
-                        'Percentual_Marcadas_>60': (total_60 / total_resenhas) * 100,
-                        'Percentual_Marcadas_>80': (total_80 / total_resenhas) * 100
-                    })
-        
-        # Cria DataFrame com os resultados
-        df_resultados = pd.DataFrame(resultados)
-        
-        # Adiciona contagem absoluta aos resultados
-        for arquivo in pasta_relatorios.glob('relatório_*.xlsx'):
-            if 'consolidado' not in arquivo.stem:
-                participante = arquivo.stem.replace('relatório_', '')
-                df_individual = pd.read_excel(arquivo)
-                
-                # Calcula contagens absolutas para diferentes thresholds
-                total_40 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.40) | 
-                                           (df_individual['ZeroGPT_Porcentagem_IA'] >= 40)])
-                total_60 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.60) | 
-                                           (df_individual['ZeroGPT_Porcentagem_IA'] >= 60)])
-                total_80 = len(df_individual[(df_individual['GPTZero_Prob_IA'] >= 0.80) | 
-                                           (df_individual['ZeroGPT_Porcentagem_IA'] >= 80)])
-                
-                # Atualiza o dicionário existente com as contagens absolutas
-                idx = df_resultados[df_resultados['Participante'] == participante].index[0]
-                df_resultados.loc[idx, 'Total_Marcadas_>40'] = total_40
-                df_resultados.loc[idx, 'Total_Marcadas_>60'] = total_60
-                df_resultados.loc[idx, 'Total_Marcadas_>80'] = total_80
-        
-        # Gera os três gráficos de barra com percentuais
-        for threshold in ['40', '60', '80']:
-            coluna = f'Percentual_Marcadas_>{threshold}'
-            df_ordenado = df_resultados.sort_values(coluna, ascending=False)
-            
-            gerar_grafico_barras(
-                df_ordenado,
-                coluna,
-                f'Percentual de Resenhas Marcadas como IA (>{threshold}%)',
-                pasta_relatorios / f'grafico_barras_consolidado_{threshold}.png'
-            )
-            logger.info(f"Gerado gráfico percentual para threshold >{threshold}%")
-        
-        # Gera os três novos gráficos de barra com números absolutos
-        for threshold in ['40', '60', '80']:
-            coluna = f'Total_Marcadas_>{threshold}'
-            df_ordenado = df_resultados.sort_values(coluna, ascending=False)
-            
-            gerar_grafico_barras_absoluto(
-                df_ordenado,
-                coluna,
-                f'Número de Resenhas Marcadas como IA (>{threshold}%)',
-                pasta_relatorios / f'grafico_barras_consolidado_{threshold}_absoluto.png'
-            )
-            logger.info(f"Gerado gráfico absoluto para threshold >{threshold}%")
-        
-        # Gera o novo gráfico de dispersão com números absolutos
-        gerar_grafico_dispersao_absoluto(
-            pasta_relatorios,
-            pasta_relatorios / 'grafico_dispersao_consolidado_absoluto.png'
-        )
-        logger.info("Gerado gráfico de dispersão consolidado com números absolutos")
-        
-        logger.info("Geração de gráficos extras concluída com sucesso")
-        
-    except Exception as e:
-        logger.error(f"Erro ao gerar gráficos extras: {str(e)}", exc_info=True)
-        raise
+    # Atalho para "python main.py charts" (mesmas opções); importado aqui porque
+    # pipeline_etapas usa as funções deste módulo
+    from pipeline_etapas import executar_etapas, parse_argumentos_etapas
+    configurar_logging()
+    executar_etapas(parse_argumentos_etapas(['charts'] + sys.argv[1:]), nome_metricas='gerar_graficos')
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from pretriagem import CAMINHOS_LOCAIS
+
+class JournalAnalises:
+    """
+    Journal de checkpoints das análises (JSON Lines, somente acréscimo).
+
+    Cada resenha analisada é gravada assim que termina, com fsync, identificada
+    por (participante, livro). Se a execução for interrompida (erro de rede,
+    Ctrl-C), uma nova execução com retomar=True reaproveita o que já foi gravado
+    e só reenvia às APIs as resenhas que faltam.
+    """
+
+    def __init__(self, caminho: Path, retomar: bool = False):
+        self.caminho = Path(caminho)
+        self.logger = logging.getLogger('detector_ia')
+        self._lock = threading.Lock()
+        self._entradas: Dict[Tuple[str, str], Dict] = {}
+
+        if retomar and self.caminho.exists():
+            self._carregar()
+            self.logger.info(f"Journal carregado: {len(self._entradas)} resenhas já analisadas em {self.caminho}")
+            modo = 'a'
+        else:
+            modo = 'w'  # execução nova: começa um journal vazio
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._arquivo = open(self.caminho, modo, encoding='utf-8')
+        if modo == 'a' and self._termina_sem_quebra():
+            self._arquivo.write('\n')  # isola a linha incompleta deixada por uma interrupção
+            self._arquivo.flush()
+
+    def _termina_sem_quebra(self) -> bool:
+        with open(self.caminho, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def _carregar(self):
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for num_linha, linha in enumerate(f, start=1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    entrada = json.loads(linha)
+                except json.JSONDecodeError:
+                    # A última linha pode ter ficado incompleta se o processo foi interrompido
+                    self.logger.warning(f"Linha {num_linha} do journal ignorada (incompleta ou corrompida)")
+                    continue
+                chave = (entrada['participante'], entrada['resultado']['Livro'])
+                self._entradas[chave] = entrada['resultado']
+
+    @staticmethod
+    def analise_completa(resultado: Dict) -> bool:
+        """
+        True se os dois detectores retornaram resultado (sem os valores de falha)
+        ou se o texto foi resolvido pela pré-triagem local
+        """
+        if resultado.get('Triagem_Caminho') in CAMINHOS_LOCAIS:
+            return True
+        return resultado.get('GPTZero_Prob_IA') != -1 and resultado.get('ZeroGPT_Sucesso') is not None
+
+    def contem(self, participante: str, livro: str) -> bool:
+        """
+        True se a resenha já foi analisada com sucesso; resenhas com falha são reanalisadas
+        """
+        return self.obter(participante, livro) is not None
+
+    def obter(self, participante: str, livro: str) -> Optional[Dict]:
+        """
+        Cópia do resultado gravado se a resenha foi analisada com sucesso, senão None
+        """
+        resultado = self._entradas.get((participante, livro))
+        if resultado is None or not self.analise_completa(resultado):
+            return None
+        return dict(resultado)
+
+    def registrar(self, participante: str, resultado: Dict):
+        """
+        Grava o resultado de uma resenha no journal e força a escrita em disco
+        """
+        linha = json.dumps({'participante': participante, 'resultado': resultado}, ensure_ascii=False)
+        with self._lock:
+            self._arquivo.write(linha + '\n')
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+            self._entradas[(participante, resultado['Livro'])] = dict(resultado)
+
+    def resultados_participante(self, participante: str, livros: List[str]) -> List[Dict]:
+        """
+        Resultados gravados do participante, na ordem dos livros informados
+        """
+        return [
+            dict(self._entradas[(participante, livro)])
+            for livro in livros
+            if (participante, livro) in self._entradas
+        ]
+
+    def liberar(self, participante: str):
+        """
+        Remove da memória os resultados do participante (continuam gravados no arquivo)
+        """
+        with self._lock:
+            for chave in [chave for chave in self._entradas if chave[0] == participante]:
+                del self._entradas[chave]
+
+    def fechar(self):
+        with self._lock:
+            self._arquivo.close()
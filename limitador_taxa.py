@@ -0,0 +1,183 @@
+import logging
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep, time
+from typing import Mapping, Optional
+from metricas import METRICAS
+
+
+class LimiteTaxaExcedido(Exception):
+    """
+    Levantada quando a API continua respondendo 429 após todas as tentativas
+    """
+
+
+def calcular_backoff(tentativa: int, base: float = 1.0, maximo: float = 60.0) -> float:
+    """
+    Backoff exponencial com jitter completo: sorteia uma espera entre 0 e
+    base * 2^tentativa (limitado a `maximo`), evitando que várias threads
+    voltem a chamar a API no mesmo instante.
+    """
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+def ler_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Interpreta o cabeçalho Retry-After, que pode vir em segundos ou como data HTTP.
+    Retorna o número de segundos a esperar, ou None se o valor for inválido.
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=timezone.utc)
+    return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+
+
+def _cabecalho(headers: Optional[Mapping[str, str]], *nomes: str) -> Optional[str]:
+    """
+    Busca o primeiro cabeçalho presente entre os nomes informados (sem diferenciar maiúsculas)
+    """
+    if not headers:
+        return None
+    normalizados = {str(k).lower(): v for k, v in headers.items()}
+    for nome in nomes:
+        if nome.lower() in normalizados:
+            return normalizados[nome.lower()]
+    return None
+
+
+class LimitadorTaxa:
+    """
+    Limitador de taxa adaptativo (token bucket + AIMD) usado pelos detectores.
+
+    - Token bucket: cada requisição consome um token; os tokens são repostos
+      continuamente na taxa atual (requisições por segundo), até `capacidade`.
+    - AIMD: cada resposta bem sucedida aumenta a taxa de forma aditiva; cada 429
+      reduz a taxa de forma multiplicativa. Assim a taxa converge para o maior
+      valor que a API aceita.
+    - Retry-After e cabeçalhos de rate limit (X-RateLimit-Remaining/Reset) bloqueiam
+      novas requisições pelo tempo indicado pela API. Sem esses cabeçalhos, usa
+      backoff exponencial com jitter.
+
+    É seguro para uso por várias threads; cada detector tem sua própria instância.
+    """
+
+    def __init__(self, nome: str, taxa_inicial: float = 1.0, taxa_minima: float = 0.05,
+                 taxa_maxima: float = 10.0, capacidade: float = 1.0, incremento: float = 0.05,
+                 fator_reducao: float = 0.5, backoff_base: float = 1.0, backoff_maximo: float = 60.0):
+        self.nome = nome
+        self.logger = logging.getLogger('detector_ia')
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.taxa = min(max(taxa_inicial, taxa_minima), taxa_maxima)
+        self.capacidade = max(1.0, capacidade)
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.backoff_base = backoff_base
+        self.backoff_maximo = backoff_maximo
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacidade
+        self._ultima_reposicao = monotonic()
+        self._bloqueado_ate = 0.0
+
+    def _repor_tokens(self, agora: float):
+        decorrido = max(0.0, agora - self._ultima_reposicao)
+        self._tokens = min(self.capacidade, self._tokens + decorrido * self.taxa)
+        self._ultima_reposicao = max(self._ultima_reposicao, agora)
+
+    def _bloquear(self, segundos: float):
+        """
+        Impede novas requisições pelos próximos `segundos` (chamar com o lock adquirido)
+        """
+        agora = monotonic()
+        self._bloqueado_ate = max(self._bloqueado_ate, agora + segundos)
+        self._tokens = 0.0
+        self._ultima_reposicao = max(self._ultima_reposicao, self._bloqueado_ate)
+
+    def adquirir(self):
+        """
+        Bloqueia até haver um token disponível para a próxima requisição
+        (a espera entra nas métricas da execução como limitador_espera_segundos)
+        """
+        inicio = monotonic()
+        while True:
+            with self._lock:
+                agora = monotonic()
+                espera = self._bloqueado_ate - agora
+                if espera <= 0:
+                    self._repor_tokens(agora)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        METRICAS.observar('limitador_espera_segundos', monotonic() - inicio, detector=self.nome)
+                        return
+                    espera = (1 - self._tokens) / self.taxa
+            sleep(espera)
+
+    def registrar_sucesso(self, headers: Optional[Mapping[str, str]] = None):
+        """
+        Aumento aditivo da taxa após uma resposta aceita pela API
+        """
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + self.incremento)
+            self._aplicar_cabecalhos(headers)
+
+    def registrar_limite(self, headers: Optional[Mapping[str, str]] = None, tentativa: int = 0) -> float:
+        """
+        Redução multiplicativa da taxa após um 429. Retorna quantos segundos as
+        próximas requisições ficarão bloqueadas.
+        """
+        with self._lock:
+            self.taxa = max(self.taxa_minima, self.taxa * self.fator_reducao)
+            espera = ler_retry_after(_cabecalho(headers, 'Retry-After'))
+            if espera is None:
+                espera = self._espera_reset(headers)
+            if espera is None:
+                espera = calcular_backoff(tentativa, self.backoff_base, self.backoff_maximo)
+            self._bloquear(espera)
+            self.logger.warning("%s: rate limit atingido, taxa reduzida para %.2f req/s; aguardando %.1fs",
+                                self.nome, self.taxa, espera)
+            return espera
+
+    def _espera_reset(self, headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """
+        Segundos até o reset da janela indicado pelos cabeçalhos de rate limit.
+        Aceita tanto segundos relativos quanto timestamp Unix.
+        """
+        valor = _cabecalho(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+        if valor is None:
+            return None
+        try:
+            reset = float(valor)
+        except ValueError:
+            return None
+        if reset > 1e9:  # timestamp Unix
+            reset = reset - time()
+        return max(0.0, reset)
+
+    def _aplicar_cabecalhos(self, headers: Optional[Mapping[str, str]]):
+        """
+        Se a API avisar que a cota da janela acabou, espera o reset antes da próxima requisição
+        """
+        restante = _cabecalho(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        if restante is None:
+            return
+        try:
+            restante = float(restante)
+        except ValueError:
+            return
+        if restante <= 0:
+            espera = self._espera_reset(headers)
+            if espera:
+                self._bloquear(espera)
@@ -1,11 +1,32 @@
 import sys
+import argparse
 import logging
 from processador_texto import (
-    configurar_logging, 
-    ler_resumos, 
+    ler_resumos,
+    ler_resumos_em_fluxo,
+    listar_arquivos_participante,
+    listar_pastas_participantes,
     gerar_relatório_excel
 )
-from analisador_ia import AnalisadorIA, gerar_relatorio_completo
+from analisador_ia import (
+    gerar_relatorio_completo,
+    mesclar_resultados
+)
+from metricas import METRICAS
+from configuracao_log import configurar_logging
+from journal_analises import JournalAnalises
+from manifesto_ingestao import ManifestoIngestao
+from pipeline_etapas import (
+    NOMES_ETAPAS,
+    ContextoAnalise,
+    adicionar_opcoes_analise,
+    adicionar_opcoes_graficos,
+    executar_etapas,
+    parse_argumentos_etapas
+)
+from pipeline_fluxo import PipelineFluxo
+from renderizador_graficos import RenderizadorGraficos
+from gerar_graficos_extras import gerar_graficos_participantes
 from pathlib import Path
 import openpyxl
 from time import sleep
@@ -13,39 +34,130 @@ import time
 from config import GPT_ZERO_KEY, ZERO_GPT_KEY  # Importa as chaves do arquivo de configuração
 from analisador_consolidado import AnalisadorConsolidado
 
+def parse_argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analisa resenhas com os detectores GPTZero e ZeroGPT",
+        epilog="Pipeline em etapas, que só refaz o que está desatualizado: "
+               "main.py {ingest,score,report,consolidate,charts,all} --help"
+    )
+    # Aceita nome do participante como argumento opcional
+    parser.add_argument('participante', nargs='?', default=None,
+                        help="Analisa apenas o participante informado")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos usados na leitura e normalização dos arquivos e no desenho "
+                             "dos gráficos (padrão: 1)")
+    parser.add_argument('--fluxo', action='store_true',
+                        help="Processa em fluxo: cada arquivo é analisado assim que lido, com memória constante")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Lê e analisa só arquivos novos ou alterados desde a última execução "
+                             "e os junta aos relatórios existentes")
+    adicionar_opcoes_analise(parser)
+    adicionar_opcoes_graficos(parser)
+    return parser.parse_args(argv)
+
 def main():
-    logger = configurar_logging()
+    logger = configurar_logging(segredos=(GPT_ZERO_KEY, ZERO_GPT_KEY))
+    argv = sys.argv[1:]
+    if argv and argv[0] in NOMES_ETAPAS:
+        executar_etapas(parse_argumentos_etapas(argv), chaves=(GPT_ZERO_KEY, ZERO_GPT_KEY))
+        return
     
-    # Aceita nome do participante como argumento opcional
-    participante_teste = sys.argv[1] if len(sys.argv) > 1 else None
+    args = parse_argumentos(argv)
+    participante_teste = args.participante
     
     pasta_base = Path("Resumos")
+    contexto = None
     try:
-        # Processa os textos
-        resultados = ler_resumos(pasta_base, participante_teste)
+        contexto = ContextoAnalise(args, pasta_base, (GPT_ZERO_KEY, ZERO_GPT_KEY))
+        journal = contexto.journal
+        armazem = contexto.armazem
         
-        # Inicializa analisador com as chaves do config
-        analisador = AnalisadorIA(GPT_ZERO_KEY, ZERO_GPT_KEY)
+        # Manifesto: tamanho, mtime e hash de cada arquivo já analisado
+        manifesto = ManifestoIngestao(pasta_base / "manifesto_ingestao.json", pasta_base)
+        filtro_arquivos = manifesto.alterado if args.incremental else None
         
-        # Processa cada participante
-        for participante, resumos in resultados.items():
-            logger.info(f"Analisando textos de: {participante}")
+        def finalizar_participante(participante, resultados_analise):
+            arquivos = listar_arquivos_participante(pasta_base / participante)
+            completos = {r['Livro'] for r in resultados_analise if JournalAnalises.analise_completa(r)}
+            if args.incremental:
+                # Junta os resultados novos às linhas do relatório anterior
+                existentes = armazem.resultados_participante(participante)
+                resultados_analise = mesclar_resultados(existentes, resultados_analise,
+                                                        [arquivo.stem for arquivo in arquivos])
+            gerar_relatorio_completo(resultados_analise, pasta_base, participante)
+            contexto.gravar_participante(participante, resultados_analise)
             
-            # Analisa todos os resumos do participante
-            resultados_analise = analisador.analisar_resumos(resumos)
+            # Só resenhas analisadas com sucesso entram no manifesto; as demais são lidas de novo
+            for arquivo in arquivos:
+                if arquivo.stem in completos:
+                    manifesto.registrar(arquivo)
+            manifesto.remover_ausentes(participante, arquivos)
+            manifesto.salvar()
+        
+        if args.fluxo:
+            # Cada arquivo segue para a análise assim que é lido; o relatório de cada
+            # participante é escrito quando suas resenhas terminam
+            def concluir_participante(participante, resultados_analise):
+                finalizar_participante(participante, resultados_analise)
+                journal.liberar(participante)
             
-            # Gera relatório com todos os dados
-            gerar_relatorio_completo(resultados_analise, pasta_base, participante)
+            if contexto.usa_agenda():
+                logger.warning("No modo --fluxo a cota é contabilizada, mas a prioridade e o corte "
+                               "pela cota não são aplicados")
+            pipeline = PipelineFluxo(contexto.motor, concluir_participante,
+                                     ao_concluir_resenha=journal.registrar,
+                                     ja_analisado=journal.obter)
+            inicio_analise = time.perf_counter()
+            with METRICAS.cronometro('etapa_segundos', etapa='analise'):
+                pipeline.executar(ler_resumos_em_fluxo(pasta_base, participante_teste, filtro_arquivos))
+            contexto.agendador.registrar_execucao(time.perf_counter() - inicio_analise)
+        else:
+            # Processa os textos
+            resultados = ler_resumos(pasta_base, participante_teste, workers=args.workers,
+                                     filtro_arquivos=filtro_arquivos)
+            if args.incremental and not resultados:
+                logger.info("Nenhum arquivo novo ou alterado")
+            
+            adiados = contexto.analisar_em_lote(resultados)
+            
+            # Gera os relatórios a partir do journal, na ordem original dos resumos
+            for participante, resumos in resultados.items():
+                if participante in adiados:
+                    logger.info(f"{participante}: relatório fica para quando todas as resenhas couberem na cota")
+                    continue
+                resultados_analise = journal.resultados_participante(participante, [livro for livro, _ in resumos])
+                finalizar_participante(participante, resultados_analise)
+        
+        if args.incremental:
+            # Participantes que só tiveram arquivos removidos: tira as linhas do relatório
+            for pasta_participante in listar_pastas_participantes(pasta_base, participante_teste):
+                if manifesto.possui_ausentes(pasta_participante.name, listar_arquivos_participante(pasta_participante)):
+                    finalizar_participante(pasta_participante.name, [])
         
         logger.info("Processamento concluído")
         
         # Após processar todos os participantes, gera relatório consolidado
-        analisador_consolidado = AnalisadorConsolidado(pasta_base / "Relatórios")
+        analisador_consolidado = AnalisadorConsolidado(pasta_base / "Relatórios", armazem)
         analisador_consolidado.gerar_relatorio_consolidado()
         
+        # Gráficos de dispersão dos participantes, desenhados só quando os dados mudaram
+        renderizador = RenderizadorGraficos(pasta_base / "Relatórios", args.workers, args.dpi,
+                                            args.formato_graficos)
+        gerar_graficos_participantes(armazem, renderizador)
+    
+    except KeyboardInterrupt:
+        logger.warning("Processamento interrompido. Use --resume para continuar de onde parou")
+        raise
     except Exception as e:
         logger.error(f"Erro no processamento: {str(e)}", exc_info=True)
+        if contexto is not None:
+            logger.error("As resenhas já analisadas estão no journal; use --resume para continuar")
         raise
+    finally:
+        if contexto is not None:
+            contexto.fechar()
+        # Tempos e contadores da execução: Resumos/Metricas/execucao_<data>.json e execucao.prom
+        METRICAS.salvar(pasta_base / "Metricas")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable
+
+class ManifestoIngestao:
+    """
+    Manifesto dos arquivos de resumo já analisados (JSON em Resumos/manifesto_ingestao.json).
+
+    Para cada arquivo guarda caminho (relativo à pasta base), tamanho, mtime e hash
+    do conteúdo. No modo incremental só são lidos os arquivos novos ou alterados:
+    tamanho e mtime iguais bastam para considerar o arquivo inalterado; se diferem,
+    o hash decide (um arquivo só "tocado" não é reanalisado).
+    """
+
+    VERSAO = 1
+
+    def __init__(self, caminho: Path, pasta_base: Path):
+        self.caminho = Path(caminho)
+        self.pasta_base = Path(pasta_base)
+        self.logger = logging.getLogger('detector_ia')
+        self._lock = threading.Lock()  # no modo em fluxo, leitura e escrita de relatórios rodam em threads diferentes
+        self._arquivos: Dict[str, Dict] = {}
+        self._verificados: Dict[str, Dict] = {}  # entradas calculadas em alterado(), reaproveitadas em registrar()
+
+        if self.caminho.exists():
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                if dados.get('versao') == self.VERSAO:
+                    self._arquivos = dados.get('arquivos', {})
+                else:
+                    self.logger.warning(f"Versão do manifesto {self.caminho} não reconhecida; todos os arquivos serão lidos")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Manifesto {self.caminho} ignorado (ilegível): {str(e)}")
+            self.logger.info(f"Manifesto carregado: {len(self._arquivos)} arquivos registrados")
+
+    def _chave(self, arquivo: Path) -> str:
+        return Path(arquivo).relative_to(self.pasta_base).as_posix()
+
+    @staticmethod
+    def calcular_hash(arquivo: Path) -> str:
+        h = hashlib.sha256()
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloco)
+        return h.hexdigest()
+
+    def alterado(self, arquivo: Path) -> bool:
+        """
+        True se o arquivo é novo ou mudou desde que foi registrado
+        """
+        chave = self._chave(arquivo)
+        estado = os.stat(arquivo)
+        anterior = self._arquivos.get(chave)
+        if anterior is not None and anterior['tamanho'] == estado.st_size and anterior['mtime'] == estado.st_mtime_ns:
+            return False
+
+        entrada = {'tamanho': estado.st_size, 'mtime': estado.st_mtime_ns}
+        if anterior is not None and anterior['tamanho'] == estado.st_size:
+            entrada['hash'] = self.calcular_hash(arquivo)
+            if entrada['hash'] == anterior['hash']:
+                with self._lock:
+                    self._arquivos[chave] = entrada  # só o mtime mudou
+                return False
+        with self._lock:
+            self._verificados[chave] = entrada
+        return True
+
+    def registrar(self, arquivo: Path):
+        """
+        Marca o arquivo como analisado no estado atual
+        """
+        chave = self._chave(arquivo)
+        with self._lock:
+            entrada = self._verificados.pop(chave, None)
+        if entrada is None:
+            estado = os.stat(arquivo)
+            entrada = {'tamanho': estado.st_size, 'mtime': estado.st_mtime_ns}
+        if 'hash' not in entrada:
+            entrada['hash'] = self.calcular_hash(arquivo)
+        with self._lock:
+            self._arquivos[chave] = entrada
+
+    def possui_ausentes(self, participante: str, arquivos_existentes: Iterable[Path]) -> bool:
+        """
+        True se algum arquivo registrado do participante não existe mais
+        """
+        prefixo = f"{participante}/"
+        existentes = {self._chave(arquivo) for arquivo in arquivos_existentes}
+        with self._lock:
+            return any(chave.startswith(prefixo) and chave not in existentes for chave in self._arquivos)
+
+    def remover_ausentes(self, participante: str, arquivos_existentes: Iterable[Path]):
+        """
+        Esquece os arquivos registrados do participante que não existem mais
+        """
+        prefixo = f"{participante}/"
+        existentes = {self._chave(arquivo) for arquivo in arquivos_existentes}
+        with self._lock:
+            removidos = [chave for chave in self._arquivos
+                         if chave.startswith(prefixo) and chave not in existentes]
+            for chave in removidos:
+                del self._arquivos[chave]
+        if removidos:
+            self.logger.info(f"Manifesto: {len(removidos)} arquivos removidos da pasta de {participante} foram esquecidos")
+
+    def salvar(self):
+        """
+        Grava o manifesto de forma atômica (arquivo temporário + rename)
+        """
+        with self._lock:
+            arquivos = dict(self._arquivos)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': self.VERSAO, 'arquivos': arquivos}, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
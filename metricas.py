@@ -0,0 +1,198 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Limites (segundos) dos buckets dos histogramas no formato Prometheus
+BUCKETS_SEGUNDOS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1, 2.5, 5, 10, 30, 60, 120)
+
+PREFIXO_PROMETHEUS = 'detector_ia_'
+
+Serie = Tuple[str, Tuple[Tuple[str, str], ...]]  # (nome, rótulos ordenados)
+
+def _serie(nome: str, rotulos: Dict[str, object]) -> Serie:
+    return nome, tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+def _rotulos_prometheus(rotulos: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pares = rotulos + extra
+    if not pares:
+        return ''
+    valores = ','.join(
+        f'{chave}="{valor.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for chave, valor in pares
+    )
+    return '{' + valores + '}'
+
+class RegistroMetricas:
+    """
+    Contadores e tempos (histogramas) de uma execução, com rótulos (ex.: etapa, detector).
+
+    Pode ser usado de várias threads. Os tempos guardam cada observação, para que o relatório
+    traga percentis exatos; no fim da execução tudo é gravado em JSON (um arquivo por execução,
+    para comparar execuções) e no formato texto do Prometheus (ver salvar).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('detector_ia')
+        self._lock = threading.Lock()
+        self._contadores: Dict[Serie, float] = {}
+        self._tempos: Dict[Serie, List[float]] = {}
+        self.inicio = time()
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        serie = _serie(nome, rotulos)
+        with self._lock:
+            self._contadores[serie] = self._contadores.get(serie, 0) + valor
+
+    def observar(self, nome: str, segundos: float, **rotulos):
+        serie = _serie(nome, rotulos)
+        with self._lock:
+            self._tempos.setdefault(serie, []).append(segundos)
+
+    @contextmanager
+    def cronometro(self, nome: str, **rotulos):
+        """
+        Mede o tempo do bloco (também quando ele termina com exceção)
+        """
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, perf_counter() - inicio, **rotulos)
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._tempos.clear()
+            self.inicio = time()
+
+    def para_dict(self) -> Dict:
+        """
+        Métricas da execução em estruturas simples (o conteúdo do JSON)
+        """
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            tempos = sorted((serie, np.array(valores)) for serie, valores in self._tempos.items())
+        fim = time()
+        return {
+            'comando': sys.argv,
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'fim': datetime.fromtimestamp(fim).isoformat(timespec='seconds'),
+            'duracao_segundos': round(fim - self.inicio, 3),
+            'contadores': [
+                {'nome': nome, 'rotulos': dict(rotulos), 'valor': valor}
+                for (nome, rotulos), valor in contadores
+            ],
+            'tempos': [
+                {
+                    'nome': nome,
+                    'rotulos': dict(rotulos),
+                    'contagem': len(valores),
+                    'soma': float(valores.sum()),
+                    'media': float(valores.mean()),
+                    'minimo': float(valores.min()),
+                    'maximo': float(valores.max()),
+                    'p50': float(np.percentile(valores, 50)),
+                    'p95': float(np.percentile(valores, 95)),
+                    'p99': float(np.percentile(valores, 99)),
+                }
+                for (nome, rotulos), valores in tempos
+            ],
+        }
+
+    def para_prometheus(self, programa: str = 'execucao') -> str:
+        """
+        Métricas no formato texto do Prometheus (contadores e histogramas com buckets acumulados).
+        Toda série recebe o rótulo programa, para que os arquivos .prom de main.py, gerar_consolidado.py
+        e gerar_graficos_extras.py possam ser coletados juntos.
+        """
+        fixo = (('programa', programa),)
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            tempos = sorted((serie, np.sort(valores)) for serie, valores in self._tempos.items())
+        linhas = []
+        declarados = set()
+        for (nome, rotulos), valor in contadores:
+            metrica = PREFIXO_PROMETHEUS + nome
+            if metrica not in declarados:
+                linhas.append(f'# TYPE {metrica} counter')
+                declarados.add(metrica)
+            valor = int(valor) if float(valor).is_integer() else valor
+            linhas.append(f'{metrica}{_rotulos_prometheus(fixo + rotulos)} {valor}')
+        for (nome, rotulos), valores in tempos:
+            metrica = PREFIXO_PROMETHEUS + nome
+            if metrica not in declarados:
+                linhas.append(f'# TYPE {metrica} histogram')
+                declarados.add(metrica)
+            rotulos = fixo + rotulos
+            acumulados = np.searchsorted(valores, BUCKETS_SEGUNDOS, side='right')
+            for limite, acumulado in zip(BUCKETS_SEGUNDOS, acumulados):
+                linhas.append(f'{metrica}_bucket{_rotulos_prometheus(rotulos, (("le", f"{limite:g}"),))} {acumulado}')
+            linhas.append(f'{metrica}_bucket{_rotulos_prometheus(rotulos, (("le", "+Inf"),))} {len(valores)}')
+            linhas.append(f'{metrica}_sum{_rotulos_prometheus(rotulos)} {valores.sum():.6f}')
+            linhas.append(f'{metrica}_count{_rotulos_prometheus(rotulos)} {len(valores)}')
+        linhas.append(f'# TYPE {PREFIXO_PROMETHEUS}execucao_inicio_segundos gauge')
+        linhas.append(f'{PREFIXO_PROMETHEUS}execucao_inicio_segundos{_rotulos_prometheus(fixo)} {self.inicio:.3f}')
+        linhas.append(f'# TYPE {PREFIXO_PROMETHEUS}execucao_duracao_segundos gauge')
+        linhas.append(f'{PREFIXO_PROMETHEUS}execucao_duracao_segundos{_rotulos_prometheus(fixo)} '
+                      f'{time() - self.inicio:.3f}')
+        return '\n'.join(linhas) + '\n'
+
+    def salvar(self, pasta: Path, nome: str = 'execucao') -> Optional[Path]:
+        """
+        Grava <pasta>/<nome>_<data>.json (histórico das execuções) e <pasta>/<nome>.prom
+        (sobrescrito a cada execução, como o textfile collector do node_exporter espera).
+        Falhas ao gravar só geram aviso, para não derrubar a execução. Retorna o JSON gravado.
+        """
+        pasta = Path(pasta)
+        try:
+            pasta.mkdir(parents=True, exist_ok=True)
+            arquivo_json = pasta / f"{nome}_{datetime.fromtimestamp(self.inicio):%Y%m%d_%H%M%S}.json"
+            for arquivo, conteudo in ((arquivo_json, json.dumps(self.para_dict(), ensure_ascii=False, indent=1)),
+                                      (pasta / f"{nome}.prom", self.para_prometheus(nome))):
+                temporario = arquivo.with_suffix(arquivo.suffix + '.tmp')
+                with open(temporario, 'w', encoding='utf-8') as f:
+                    f.write(conteudo)
+                os.replace(temporario, arquivo)
+        except OSError as e:
+            self.logger.warning(f"Métricas da execução não gravadas: {str(e)}")
+            return None
+        self.logger.info(f"Métricas da execução gravadas em {arquivo_json}")
+        return arquivo_json
+
+# Registro único do processo, como o logger 'detector_ia'
+METRICAS = RegistroMetricas()
+
+def etapa(nome: str):
+    """
+    Decorador: registra cada chamada da função no tempo da etapa (métrica etapa_segundos)
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with METRICAS.cronometro('etapa_segundos', etapa=nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+def cronometro_detector(atributo: str):
+    """
+    Decorador de métodos: registra cada chamada no tempo de análise do detector guardado em
+    self.<atributo> (métrica detector_analise_segundos, rotulada pelo nome do detector)
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(self, *args, **kwargs):
+            with METRICAS.cronometro('detector_analise_segundos', detector=getattr(self, atributo).nome):
+                return funcao(self, *args, **kwargs)
+        return envolvida
+    return decorador
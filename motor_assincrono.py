@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from analisador_ia import AnalisadorIA
+from pretriagem import CAMINHOS_LOCAIS, PreTriagem
+
+class MotorAssincrono:
+    """
+    Motor de análise assíncrono para os detectores GPTZero e ZeroGPT.
+
+    Cada texto é enviado aos dois detectores ao mesmo tempo e vários textos
+    ficam em andamento simultaneamente. O número de requisições em andamento
+    é limitado separadamente para cada detector, de modo que o tempo total
+    passa a depender dos limites das APIs e não de pausas fixas.
+
+    As chamadas HTTP dos detectores são síncronas, por isso rodam em um pool
+    de threads dedicado enquanto o loop de eventos coordena as tarefas.
+
+    Com lote_gptzero=True, os textos são enviados ao GPTZero em requisições com
+    vários documentos (ver GPTZeroDetector.agrupar_lote) e cada documento
+    devolvido é associado de volta ao seu livro.
+
+    Com uma PreTriagem, cada texto é pontuado localmente antes; os resolvidos por ela
+    não chegam aos detectores e todos os resultados ganham as colunas Triagem_*.
+    """
+
+    def __init__(self, analisador: AnalisadorIA, max_simultaneas_gptzero: int = 4,
+                 max_simultaneas_zerogpt: int = 4, lote_gptzero: bool = False,
+                 pretriagem: Optional[PreTriagem] = None):
+        self.analisador = analisador
+        self.lote_gptzero = lote_gptzero
+        self.pretriagem = pretriagem
+        self.logger = logging.getLogger('detector_ia')
+        self.max_simultaneas_gptzero = max(1, max_simultaneas_gptzero)
+        self.max_simultaneas_zerogpt = max(1, max_simultaneas_zerogpt)
+
+    async def _chamar_detector(self, semaforo: asyncio.Semaphore, executor: ThreadPoolExecutor,
+                               funcao, *args):
+        """
+        Executa a análise de um detector em thread, respeitando o limite de simultaneidade
+        """
+        async with semaforo:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, funcao, *args)
+
+    async def _colunas_do_lote(self, tarefa_lote: asyncio.Future, posicao: int) -> Dict:
+        """
+        Aguarda o lote GPTZero e devolve as colunas do item na posição informada
+        """
+        return (await tarefa_lote)[posicao]
+
+    def _triar(self, texto: str) -> Dict:
+        """
+        Colunas Triagem_* do texto (vazio sem pré-triagem)
+        """
+        return self.pretriagem.classificar(texto) if self.pretriagem is not None else {}
+
+    def avaliar_triagem(self, texto: str) -> Dict:
+        """
+        Colunas Triagem_* do texto sem contabilizá-lo, para quem planeja antes de enviar
+        (vazio sem pré-triagem). O resultado é repassado a estimar_custo e analisar_resumos.
+        """
+        return self.pretriagem.avaliar(texto) if self.pretriagem is not None else {}
+
+    def estimar_custo(self, texto: str, triagem: Optional[Dict] = None) -> Dict[str, Tuple[float, float]]:
+        """
+        Palavras e requisições que o texto gastaria em cada detector (nada se a pré-triagem o resolve).
+        `triagem` é a de avaliar_triagem, se já calculada.
+        """
+        if triagem is None:
+            triagem = self.avaliar_triagem(texto)
+        if triagem.get('Triagem_Caminho') in CAMINHOS_LOCAIS:
+            return {}
+        gpt_zero, zero_gpt = self.analisador.gpt_zero, self.analisador.zero_gpt
+        return {
+            gpt_zero.nome: gpt_zero.estimar_custo(texto, lote=self.lote_gptzero),
+            zero_gpt.nome: zero_gpt.estimar_custo(texto),
+        }
+
+    async def _analisar_item(self, nome_livro: str, texto: str, tarefa_gptzero,
+                             semaforo_zerogpt: asyncio.Semaphore, executor: ThreadPoolExecutor,
+                             triagem: Dict) -> Dict:
+        """
+        Analisa um resumo nos dois detectores ao mesmo tempo e monta o dicionário de resultado.
+        `tarefa_gptzero` é o awaitable que produz as colunas GPTZero_* deste resumo.
+        """
+        self.logger.info("Analisando resumo: %s", nome_livro)
+        colunas_gptzero, colunas_zerogpt = await asyncio.gather(
+            tarefa_gptzero,
+            self._chamar_detector(semaforo_zerogpt, executor, self.analisador.analisar_zerogpt,
+                                  nome_livro, texto)
+        )
+
+        # Mesma ordem de colunas gerada por AnalisadorIA.analisar_resumos
+        resultado = {
+            'Livro': nome_livro,
+            'Texto_Normalizado': texto
+        }
+        resultado.update(colunas_gptzero)
+        resultado.update(colunas_zerogpt)
+        resultado.update(triagem)
+        return resultado
+
+    async def analisar_resumo(self, nome_livro: str, texto: str, semaforo_gptzero: asyncio.Semaphore,
+                              semaforo_zerogpt: asyncio.Semaphore, executor: ThreadPoolExecutor) -> Dict:
+        """
+        Analisa um único resumo (sem lote) com os semáforos e o executor informados.
+        Usado por quem alimenta o motor aos poucos, como o PipelineFluxo.
+        """
+        triagem = self._triar(texto)
+        if triagem.get('Triagem_Caminho') in CAMINHOS_LOCAIS:
+            return PreTriagem.resultado_local(nome_livro, texto, triagem)
+        tarefa_gptzero = self._chamar_detector(semaforo_gptzero, executor, self.analisador.analisar_gptzero,
+                                               nome_livro, texto)
+        return await self._analisar_item(nome_livro, texto, tarefa_gptzero, semaforo_zerogpt, executor, triagem)
+
+    async def _analisar_e_notificar(self, indice: int, nome_livro: str, texto: str, tarefa_gptzero,
+                                    semaforo_zerogpt: asyncio.Semaphore, executor: ThreadPoolExecutor,
+                                    triagem: Dict, ao_concluir: Optional[Callable[[int, Dict], None]],
+                                    notificador: ThreadPoolExecutor) -> Dict:
+        resultado = await self._analisar_item(nome_livro, texto, tarefa_gptzero, semaforo_zerogpt, executor,
+                                              triagem)
+        if ao_concluir is not None:
+            # ao_concluir grava no journal (com fsync): roda em outra thread para não travar o loop
+            await asyncio.get_running_loop().run_in_executor(notificador, ao_concluir, indice, resultado)
+        return resultado
+
+    async def analisar_resumos_async(self, resumos: List[Tuple[str, str]],
+                                     ao_concluir: Optional[Callable[[int, Dict], None]] = None,
+                                     triagens: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Analisa todos os resumos concorrentemente, mantendo a ordem de entrada nos resultados.
+        Se informado, `ao_concluir` é chamado com a posição do resumo em `resumos` e o seu
+        resultado assim que ele fica pronto.
+        `triagens` traz as colunas de avaliar_triagem de cada resumo, quando já calculadas,
+        para que a pré-triagem não pontue o mesmo texto duas vezes.
+        """
+        if not resumos:
+            return []
+
+        # Textos resolvidos pela pré-triagem ficam prontos na hora; os demais vão aos detectores
+        resultados: List[Optional[Dict]] = [None] * len(resumos)
+        if triagens is None:
+            triagens = [self._triar(texto) for _, texto in resumos]
+        elif self.pretriagem is not None:
+            triagens = [self.pretriagem.contabilizar(triagem) for triagem in triagens]
+        enviar = []
+        for indice, ((nome_livro, texto), triagem) in enumerate(zip(resumos, triagens)):
+            if triagem.get('Triagem_Caminho') in CAMINHOS_LOCAIS:
+                resultados[indice] = PreTriagem.resultado_local(nome_livro, texto, triagem)
+                if ao_concluir is not None:
+                    ao_concluir(indice, resultados[indice])
+            else:
+                enviar.append(indice)
+        if not enviar:
+            return resultados
+
+        semaforo_gptzero = asyncio.Semaphore(self.max_simultaneas_gptzero)
+        semaforo_zerogpt = asyncio.Semaphore(self.max_simultaneas_zerogpt)
+        max_threads = self.max_simultaneas_gptzero + self.max_simultaneas_zerogpt
+
+        with ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='detector') as executor, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal') as notificador:
+            tarefas_gptzero = self._tarefas_gptzero([resumos[i] for i in enviar], semaforo_gptzero, executor)
+            tarefas = [
+                self._analisar_e_notificar(indice, resumos[indice][0], resumos[indice][1], tarefa_gptzero,
+                                           semaforo_zerogpt, executor, triagens[indice], ao_concluir,
+                                           notificador)
+                for indice, tarefa_gptzero in zip(enviar, tarefas_gptzero)
+            ]
+            for indice, resultado in zip(enviar, await asyncio.gather(*tarefas)):
+                resultados[indice] = resultado
+        return resultados
+
+    def _tarefas_gptzero(self, resumos: List[Tuple[str, str]], semaforo: asyncio.Semaphore,
+                         executor: ThreadPoolExecutor) -> List:
+        """
+        Cria, para cada resumo, o awaitable que produz suas colunas GPTZero_*:
+        uma chamada individual ou a sua posição dentro de um lote.
+        """
+        if not self.lote_gptzero:
+            return [
+                self._chamar_detector(semaforo, executor, self.analisador.analisar_gptzero, nome_livro, texto)
+                for nome_livro, texto in resumos
+            ]
+
+        tarefas: List = [None] * len(resumos)
+        grupos = self.analisador.gpt_zero.agrupar_lote([texto for _, texto in resumos])
+        self.logger.info("GPTZero: %d textos agrupados em %d lotes", len(resumos), len(grupos))
+        for grupo in grupos:
+            itens = [resumos[i] for i in grupo]
+            tarefa_lote = asyncio.ensure_future(
+                self._chamar_detector(semaforo, executor, self.analisador.analisar_gptzero_lote, itens)
+            )
+            for posicao, indice in enumerate(grupo):
+                tarefas[indice] = self._colunas_do_lote(tarefa_lote, posicao)
+        return tarefas
+
+    def analisar_resumos(self, resumos: List[Tuple[str, str]],
+                         ao_concluir: Optional[Callable[[int, Dict], None]] = None,
+                         triagens: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Versão síncrona de analisar_resumos_async; retorna os mesmos dicionários
+        que AnalisadorIA.analisar_resumos
+        """
+        self.logger.info(
+            "Analisando %d textos (até %d simultâneos no GPTZero, %d no ZeroGPT)",
+            len(resumos), self.max_simultaneas_gptzero, self.max_simultaneas_zerogpt
+        )
+        return asyncio.run(self.analisar_resumos_async(resumos, ao_concluir, triagens))
@@ -0,0 +1,569 @@
+import argparse
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Optional, Set, Tuple
+from processador_texto import ler_resumos, listar_arquivos_participante, listar_pastas_participantes
+from analisador_ia import AnalisadorIA, gerar_relatorio_completo
+from analisador_consolidado import AnalisadorConsolidado
+from motor_assincrono import MotorAssincrono
+from metricas import METRICAS
+from pretriagem import treinar_pretriagem
+from agendador_cota import RITMOS, AgendadorCota, interpretar_limite, interpretar_prioridade, montar_unidades
+from cache_resultados import CacheResultados
+from journal_analises import JournalAnalises
+from armazem_resultados import ArmazemResultados, abrir_armazem
+from armazem_sentencas import ArmazemSentencas
+from deduplicacao import DeduplicadorResenhas, GrupoDuplicatas, expandir_resultado
+from renderizador_graficos import FORMATOS, RenderizadorGraficos
+from gerar_graficos_extras import gerar_graficos
+
+PASTA_INGESTAO = "Ingestao"
+TODOS = '*'  # alvo único das etapas que cobrem a coorte inteira
+
+def adicionar_opcoes_analise(parser: argparse.ArgumentParser):
+    """
+    Opções da análise nos detectores (main.py sem subcomando, score e all)
+    """
+    parser.add_argument('--sem-deduplicacao', action='store_true',
+                        help="Envia às APIs todas as resenhas, mesmo as idênticas ou quase idênticas")
+    parser.add_argument('--limiar-duplicata', type=float, default=0.9,
+                        help="Similaridade (Jaccard, 0-1) a partir da qual duas resenhas são "
+                             "consideradas duplicatas (padrão: 0.9)")
+    parser.add_argument('--simultaneas', type=int, default=4,
+                        help="Número de requisições simultâneas por detector (padrão: 4)")
+    parser.add_argument('--lote-gptzero', type=int, default=1,
+                        help="Número máximo de textos por requisição ao GPTZero (padrão: 1, sem lote)")
+    parser.add_argument('--max-palavras-trecho', type=int, default=None,
+                        help="Divide textos com mais palavras que isso em trechos (em fins de sentença), "
+                             "analisados em paralelo (até --simultaneas por detector) e combinados pela "
+                             "média ponderada (padrão: texto inteiro)")
+    parser.add_argument('--timeout-leitura', type=float, default=120,
+                        help="Segundos de espera pela resposta de cada API (padrão: 120)")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Não usa o cache de resultados dos detectores")
+    parser.add_argument('--cache-validade-dias', type=float, default=None,
+                        help="Descarta resultados em cache mais antigos que N dias")
+    parser.add_argument('--cache-max-entradas', type=int, default=None,
+                        help="Número máximo de resultados mantidos no cache")
+    parser.add_argument('--resume', action='store_true',
+                        help="Retoma uma execução interrompida: pula resenhas já gravadas no journal")
+    parser.add_argument('--pretriagem', action='store_true',
+                        help="Pontua cada texto localmente antes das APIs e só envia os da faixa incerta "
+                             "(modelo treinado com os resultados anteriores)")
+    parser.add_argument('--triagem-limiar-humano', type=float, default=0.05,
+                        help="Probabilidade local de IA até a qual o texto é dado como humano "
+                             "sem chamar as APIs (padrão: 0.05)")
+    parser.add_argument('--triagem-limiar-ia', type=float, default=0.95,
+                        help="Probabilidade local de IA a partir da qual o texto é dado como IA "
+                             "sem chamar as APIs (padrão: 0.95)")
+    parser.add_argument('--triagem-min-exemplos', type=int, default=50,
+                        help="Resenhas humanas e de IA já analisadas necessárias para treinar "
+                             "a pré-triagem (padrão: 50 de cada)")
+    parser.add_argument('--cota', type=interpretar_limite, action='append', default=[],
+                        metavar='DETECTOR:LIMITE=VALOR',
+                        help="Limite de cota de um detector (gptzero/zerogpt; palavras_dia, palavras_mes, "
+                             "requisicoes_dia ou requisicoes_mes; 'nenhum' remove). Fica gravado em "
+                             "Resumos/cotas.json; pode ser repetido")
+    parser.add_argument('--prioridade', type=interpretar_prioridade, default=['ordem'],
+                        help="Ordem de envio dos textos, em chaves separadas por vírgula: novos "
+                             "(participantes ainda sem resultados), menores, maiores, ordem (padrão: ordem)")
+    parser.add_argument('--ritmo-cota', choices=RITMOS, default='livre',
+                        help="livre: usa toda a cota restante; uniforme: divide a cota restante do mês "
+                             "pelos dias que faltam (padrão: livre)")
+    parser.add_argument('--cota-por-resenha', action='store_true',
+                        help="Deixa resenhas avulsas para a próxima execução quando a cota acaba "
+                             "(padrão: só participantes inteiros)")
+
+def adicionar_opcoes_graficos(parser: argparse.ArgumentParser):
+    parser.add_argument('--dpi', type=int, default=None,
+                        help="Resolução dos gráficos (padrão: 300 nos individuais, 100 nos consolidados)")
+    parser.add_argument('--formato-graficos', '--formato', dest='formato_graficos', choices=FORMATOS,
+                        default='png', help="Formato dos arquivos de gráfico (padrão: png)")
+
+class ContextoAnalise:
+    """
+    Recursos da análise nos detectores, montados a partir das opções da linha de comando:
+    cache, detectores, journal, armazenamentos, pré-triagem, cota e motor. fechar() libera
+    tudo e registra as estatísticas, também quando a análise termina com erro.
+    """
+
+    def __init__(self, args: argparse.Namespace, pasta_base: Path, chaves: Tuple[str, str]):
+        self.args = args
+        self.pasta_base = Path(pasta_base)
+        self.logger = logging.getLogger('detector_ia')
+        self.cache: Optional[CacheResultados] = None
+        self.analisador: Optional[AnalisadorIA] = None
+        self.journal: Optional[JournalAnalises] = None
+        self.armazem: Optional[ArmazemResultados] = None
+        self.sentencas: Optional[ArmazemSentencas] = None
+        self.pretriagem = None
+        self.agendador: Optional[AgendadorCota] = None
+        try:
+            self._abrir(chaves)
+        except BaseException:
+            self.fechar()
+            raise
+
+    def _abrir(self, chaves: Tuple[str, str]):
+        args = self.args
+        # Cache de resultados: textos que não mudaram não são reenviados às APIs
+        if not args.sem_cache:
+            ttl = args.cache_validade_dias * 86400 if args.cache_validade_dias else None
+            self.cache = CacheResultados(self.pasta_base / "cache_detectores.sqlite", ttl, args.cache_max_entradas)
+
+        # Inicializa analisador com as chaves do config
+        self.analisador = AnalisadorIA(*chaves, cache=self.cache)
+        self.analisador.gpt_zero.max_documentos_lote = max(1, args.lote_gptzero)
+        for detector in (self.analisador.gpt_zero, self.analisador.zero_gpt):
+            detector.transporte.timeout = (detector.transporte.timeout[0], args.timeout_leitura)
+            detector.max_palavras_trecho = args.max_palavras_trecho
+            if args.max_palavras_trecho:
+                # Um executor por detector para os trechos de todos os textos, com o mesmo limite
+                # do motor: textos longos não multiplicam as requisições em andamento
+                detector.executor_trechos = ThreadPoolExecutor(max_workers=max(1, args.simultaneas),
+                                                               thread_name_prefix=f'trechos-{detector.nome}')
+
+        # Cota de cada detector: limites, consumo do dia/mês e previsão de conclusão
+        self.agendador = AgendadorCota(self.pasta_base / "cotas.json", args.prioridade, args.ritmo_cota)
+        for nome, limite, valor in args.cota:
+            self.agendador.definir_limite(nome, limite, valor)
+        for detector in (self.analisador.gpt_zero, self.analisador.zero_gpt):
+            detector.cota = self.agendador.cota(detector.nome)
+
+        # Journal: cada resenha analisada é gravada em disco assim que termina
+        self.journal = JournalAnalises(self.pasta_base / "journal_analises.jsonl", retomar=args.resume)
+
+        # Armazenamento canônico dos resultados; os .xlsx são só apresentação
+        self.armazem = abrir_armazem(self.pasta_base / "Relatórios")
+        # Pontuações por sentença de cada detector, para consultas sem chamar as APIs
+        self.sentencas = ArmazemSentencas(self.pasta_base / "sentencas.npz")
+
+        # Pré-triagem local: textos claramente humanos ou de IA não vão às APIs
+        if args.pretriagem:
+            self.pretriagem = treinar_pretriagem(self.armazem, args.triagem_limiar_humano, args.triagem_limiar_ia,
+                                                 args.triagem_min_exemplos)
+        self.motor = MotorAssincrono(self.analisador, args.simultaneas, args.simultaneas,
+                                     lote_gptzero=args.lote_gptzero > 1, pretriagem=self.pretriagem)
+
+    def usa_agenda(self) -> bool:
+        """
+        True se há cota configurada ou prioridade diferente da ordem de leitura
+        """
+        return self.agendador.limitado() or self.args.prioridade != ['ordem']
+
+    def analisar_em_lote(self, resultados: Dict[str, List[Tuple[str, str]]]) -> Set[str]:
+        """
+        Analisa as resenhas lidas que ainda não estão no journal: deduplica, planeja contra a cota
+        e envia ao motor; cada resultado é gravado no journal. Retorna os participantes com
+        resenhas deixadas para a próxima execução pela cota.
+        """
+        args = self.args
+        journal = self.journal
+
+        # Junta as resenhas de todos os participantes que ainda não estão no journal
+        pendentes = []  # (participante, nome_livro, texto)
+        adiados = set()  # participantes com resenhas deixadas para a próxima execução pela cota
+        for participante, resumos in resultados.items():
+            faltando = [(participante, livro, texto) for livro, texto in resumos
+                        if not journal.contem(participante, livro)]
+            if len(faltando) < len(resumos):
+                self.logger.info(f"{participante}: {len(resumos) - len(faltando)} resumos recuperados do journal")
+            pendentes.extend(faltando)
+        if not pendentes:
+            return adiados
+
+        # Textos iguais ou quase iguais (inclusive entre participantes) são analisados uma vez só
+        if args.sem_deduplicacao:
+            grupos = [GrupoDuplicatas(i, i) for i in range(len(pendentes))]
+        else:
+            grupos = DeduplicadorResenhas(limiar=args.limiar_duplicata).agrupar(
+                [texto for _, _, texto in pendentes]
+            )
+
+        # A pré-triagem pontua cada representante uma vez; o resultado serve ao plano e ao motor
+        triagens = [self.motor.avaliar_triagem(pendentes[g.representante][2]) for g in grupos]
+
+        # Com cota ou prioridade, ordena os grupos e deixa para depois o que não cabe na cota de hoje
+        if self.usa_agenda():
+            plano = self.agendador.planejar(
+                montar_unidades(grupos, [participante for participante, _, _ in pendentes],
+                                [self.motor.estimar_custo(pendentes[g.representante][2], triagem)
+                                 for g, triagem in zip(grupos, triagens)],
+                                novos=set(resultados) - set(self.armazem.participantes()),
+                                por_resenha=args.cota_por_resenha),
+                {d.nome: 1 / d.limitador.taxa for d in (self.analisador.gpt_zero, self.analisador.zero_gpt)}
+            )
+            self.agendador.registrar_plano(plano)
+            for unidade in plano.adiadas + plano.impossiveis:
+                for indice in unidade.itens:
+                    adiados.update(pendentes[membro][0] for membro in grupos[indice].membros)
+            grupos = [grupos[indice] for indice in plano.itens]
+            triagens = [triagens[indice] for indice in plano.itens]
+
+        # O motor informa a posição do resumo concluído, que é a do seu grupo em `grupos`
+        def registrar_grupo(indice, resultado):
+            for participante, resultado_membro in expandir_resultado(resultado, grupos[indice], pendentes):
+                journal.registrar(participante, resultado_membro)
+
+        inicio_analise = perf_counter()
+        with METRICAS.cronometro('etapa_segundos', etapa='analise'):
+            self.motor.analisar_resumos(
+                [(pendentes[g.representante][1], pendentes[g.representante][2]) for g in grupos],
+                ao_concluir=registrar_grupo, triagens=triagens
+            )
+        self.agendador.registrar_execucao(perf_counter() - inicio_analise)
+        METRICAS.incrementar('resenhas_total', len(grupos), destino='enviada')
+        METRICAS.incrementar('resenhas_total', sum(len(g.membros) - 1 for g in grupos), destino='duplicata')
+        return adiados
+
+    def gravar_participante(self, participante: str, resultados_analise: List[Dict]):
+        """
+        Grava os resultados do participante nos armazenamentos de resenhas e de sentenças
+        """
+        self.armazem.gravar_participante(participante, resultados_analise)
+        self.sentencas.gravar_participante(participante, resultados_analise)
+
+    def fechar(self):
+        if self.analisador is not None:
+            self.analisador.fechar()
+        if self.journal is not None:
+            self.journal.fechar()
+        if self.armazem is not None:
+            self.armazem.fechar()
+        if self.sentencas is not None:
+            self.sentencas.salvar()
+        if self.pretriagem is not None:
+            self.pretriagem.registrar_estatisticas()
+        if self.agendador is not None:
+            self.agendador.salvar()
+        if self.cache is not None:
+            self.cache.registrar_estatisticas()
+            METRICAS.incrementar('cache_consultas_total', self.cache.acertos, resultado='acerto')
+            METRICAS.incrementar('cache_consultas_total', self.cache.falhas, resultado='falha')
+            self.cache.fechar()
+
+def _mtime(caminho: Path) -> Optional[float]:
+    try:
+        return caminho.stat().st_mtime
+    except OSError:
+        return None
+
+class Etapa(ABC):
+    """
+    Etapa do pipeline no estilo make: para cada alvo (um participante, ou TODOS nas etapas que
+    cobrem a coorte inteira) declara as entradas e as saídas, com a data de modificação de cada
+    uma, e só é executada para os alvos cujas saídas faltam ou são mais antigas que alguma entrada.
+    `codigo` lista os módulos que definem a aparência das saídas: alterá-los também refaz a etapa,
+    e nesse caso ela é executada com forcar=True (ex.: gráficos redesenhados após mudar o estilo).
+    """
+
+    nome = ''
+    descricao = ''
+    por_participante = True
+    codigo: Tuple[str, ...] = ()
+
+    def __init__(self, pipeline: 'PipelineEtapas'):
+        self.pipeline = pipeline
+        self.logger = logging.getLogger('detector_ia')
+
+    def alvos(self) -> List[str]:
+        return self.pipeline.participantes() if self.por_participante else [TODOS]
+
+    @abstractmethod
+    def entradas(self, alvo: str) -> Dict[str, Optional[float]]:
+        """
+        Data de modificação de cada entrada do alvo (None se ausente)
+        """
+
+    @abstractmethod
+    def saidas(self, alvo: str) -> Dict[str, Optional[float]]:
+        """
+        Data de modificação de cada saída do alvo (None se ainda não gerada)
+        """
+
+    @abstractmethod
+    def executar(self, alvos: List[str], forcar: bool):
+        """
+        Refaz a etapa para os alvos desatualizados
+        """
+
+    def data_codigo(self) -> float:
+        pasta = Path(__file__).resolve().parent
+        return max((_mtime(pasta / modulo) or 0 for modulo in self.codigo), default=0)
+
+    def desatualizados(self, forcar: bool = False) -> Tuple[List[str], bool]:
+        """
+        Alvos a refazer e se algum deles está desatualizado só pelo código (refazer com forcar).
+        Alvos com entrada ausente (etapa anterior ainda não executada) são pulados com aviso.
+        """
+        codigo = self.data_codigo()
+        refazer, por_codigo = [], False
+        for alvo in self.alvos():
+            entradas = self.entradas(alvo)
+            ausentes = [descricao for descricao, data in entradas.items() if data is None]
+            if ausentes:
+                self.logger.warning(f"{self.nome}: {alvo} pulado, sem {', '.join(ausentes)} "
+                                    f"(execute as etapas anteriores)")
+                continue
+            saidas = self.saidas(alvo)
+            if forcar or not saidas or any(data is None for data in saidas.values()):
+                refazer.append(alvo)
+                continue
+            mais_antiga = min(saidas.values())
+            if max(entradas.values(), default=0) > mais_antiga:
+                refazer.append(alvo)
+            elif codigo > mais_antiga:
+                refazer.append(alvo)
+                por_codigo = True
+        return refazer, por_codigo
+
+class EtapaIngest(Etapa):
+    nome = 'ingest'
+    descricao = "Lê e normaliza os arquivos de cada participante (Resumos/Ingestao/<participante>.json)"
+
+    def entradas(self, alvo):
+        pasta = self.pipeline.pasta_base / alvo
+        # A data da pasta muda quando um arquivo é removido ou renomeado
+        entradas = {f"pasta {alvo}": _mtime(pasta)}
+        entradas.update({arquivo.name: _mtime(arquivo) for arquivo in listar_arquivos_participante(pasta)})
+        return entradas
+
+    def saidas(self, alvo):
+        return {'leitura': _mtime(self.pipeline.arquivo_ingestao(alvo))}
+
+    def executar(self, alvos, forcar):
+        resultados = ler_resumos(self.pipeline.pasta_base, alvos, workers=self.pipeline.args.workers)
+        for participante in alvos:
+            self.pipeline.gravar_ingestao(participante, resultados.get(participante, []))
+
+class EtapaScore(Etapa):
+    nome = 'score'
+    descricao = "Analisa nos detectores as resenhas lidas (Resumos/resultados.sqlite)"
+
+    def entradas(self, alvo):
+        return {'leitura': _mtime(self.pipeline.arquivo_ingestao(alvo))}
+
+    def saidas(self, alvo):
+        return {'resultados': self.pipeline.atualizacoes().get(alvo)}
+
+    def executar(self, alvos, forcar):
+        contexto = self.pipeline.contexto_analise()
+        resultados = {participante: self.pipeline.ler_ingestao(participante) for participante in alvos}
+        adiados = contexto.analisar_em_lote(resultados)
+        for participante, resumos in resultados.items():
+            if participante in adiados:
+                self.logger.info(f"{participante}: resultados ficam para quando todas as resenhas couberem na cota")
+                continue
+            contexto.gravar_participante(participante, contexto.journal.resultados_participante(
+                participante, [livro for livro, _ in resumos]))
+        self.pipeline.limpar_atualizacoes()
+
+class EtapaReport(Etapa):
+    nome = 'report'
+    descricao = "Escreve o relatório .xlsx de cada participante a partir dos resultados"
+    codigo = ('analisador_ia.py',)
+
+    def entradas(self, alvo):
+        return {'resultados': self.pipeline.atualizacoes().get(alvo)}
+
+    def saidas(self, alvo):
+        return {'relatório': _mtime(self.pipeline.pasta_relatorios / f"relatório_{alvo}.xlsx")}
+
+    def executar(self, alvos, forcar):
+        armazem = self.pipeline.armazem()
+        for participante in alvos:
+            gerar_relatorio_completo(armazem.resultados_participante(participante), self.pipeline.pasta_base,
+                                     participante)
+
+class EtapaConsolidate(Etapa):
+    nome = 'consolidate'
+    descricao = "Gera o relatório consolidado de todos os participantes"
+    por_participante = False
+    codigo = ('analisador_consolidado.py',)
+
+    def entradas(self, alvo):
+        # A coorte inteira (--participants não se aplica); sem participantes, nada a consolidar
+        return {f"resultados de {p}": data for p, data in self.pipeline.atualizacoes().items()} or {'resultados': None}
+
+    def saidas(self, alvo):
+        return {'consolidado': _mtime(self.pipeline.pasta_relatorios / 'relatorio_consolidado.xlsx')}
+
+    def executar(self, alvos, forcar):
+        arquivo = AnalisadorConsolidado(self.pipeline.pasta_relatorios,
+                                        self.pipeline.armazem()).gerar_relatorio_consolidado(forcar=forcar)
+        # Sem alteração a planilha é mantida; a data é atualizada para marcar a etapa como feita
+        if arquivo is not None and arquivo.exists():
+            os.utime(arquivo)
+
+class EtapaCharts(Etapa):
+    nome = 'charts'
+    descricao = "Desenha os gráficos individuais e consolidados"
+    por_participante = False
+    codigo = ('renderizador_graficos.py', 'gerar_graficos_extras.py')
+
+    def entradas(self, alvo):
+        return {f"resultados de {p}": data for p, data in self.pipeline.atualizacoes().items()} or {'resultados': None}
+
+    def saidas(self, alvo):
+        # O gráfico consolidado no formato pedido: trocar o formato também refaz a etapa
+        formato = self.pipeline.args.formato_graficos
+        return {'gráficos': _mtime(self.pipeline.pasta_relatorios / 'impressoes_graficos.json'),
+                f'gráfico consolidado ({formato})':
+                    _mtime(self.pipeline.pasta_relatorios / f'grafico_dispersao_consolidado.{formato}')}
+
+    def executar(self, alvos, forcar):
+        args = self.pipeline.args
+        renderizador = RenderizadorGraficos(self.pipeline.pasta_relatorios, args.workers, args.dpi,
+                                            args.formato_graficos)
+        gerar_graficos(self.pipeline.armazem(), renderizador, forcar=forcar)
+        # Grava as impressões mesmo sem gráfico novo, marcando a etapa como feita
+        renderizador.salvar()
+
+ETAPAS = [EtapaIngest, EtapaScore, EtapaReport, EtapaConsolidate, EtapaCharts]
+APELIDOS = {'ingest': ['ler'], 'score': ['analisar'], 'report': ['relatorios'],
+            'consolidate': ['consolidar'], 'charts': ['graficos'], 'all': ['tudo']}
+NOMES_ETAPAS = {nome for principal, apelidos in APELIDOS.items() for nome in [principal] + apelidos}
+
+class PipelineEtapas:
+    """
+    Executa as etapas pedidas em ordem, cada uma só para os alvos desatualizados.
+    Os recursos (armazenamento, detectores) são abertos só se alguma etapa precisar deles,
+    então refazer os gráficos não lê os arquivos nem chama as APIs.
+    """
+
+    def __init__(self, args: argparse.Namespace, chaves: Optional[Tuple[str, str]] = None):
+        self.args = args
+        self.chaves = chaves
+        self.pasta_base = Path(args.pasta)
+        self.pasta_relatorios = self.pasta_base / "Relatórios"
+        self.logger = logging.getLogger('detector_ia')
+        self._armazem: Optional[ArmazemResultados] = None
+        self._contexto: Optional[ContextoAnalise] = None
+        self._atualizacoes: Optional[Dict[str, float]] = None
+        self._participantes: Optional[List[str]] = None
+
+    def participantes(self) -> List[str]:
+        if self._participantes is None:
+            self._participantes = [pasta.name for pasta in
+                                   listar_pastas_participantes(self.pasta_base, self.args.participants)]
+        return self._participantes
+
+    def arquivo_ingestao(self, participante: str) -> Path:
+        return self.pasta_base / PASTA_INGESTAO / f"{participante}.json"
+
+    def gravar_ingestao(self, participante: str, resumos: List[Tuple[str, str]]):
+        arquivo = self.arquivo_ingestao(participante)
+        arquivo.parent.mkdir(parents=True, exist_ok=True)
+        temporario = arquivo.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'participante': participante, 'resumos': resumos}, f, ensure_ascii=False)
+        os.replace(temporario, arquivo)
+
+    def ler_ingestao(self, participante: str) -> List[Tuple[str, str]]:
+        with open(self.arquivo_ingestao(participante), encoding='utf-8') as f:
+            return [(livro, texto) for livro, texto in json.load(f)['resumos']]
+
+    def armazem(self) -> ArmazemResultados:
+        if self._contexto is not None:
+            return self._contexto.armazem
+        if self._armazem is None:
+            self._armazem = abrir_armazem(self.pasta_relatorios)
+        return self._armazem
+
+    def contexto_analise(self) -> ContextoAnalise:
+        if self._contexto is None:
+            if self.chaves is None:
+                raise RuntimeError("A etapa score precisa das chaves das APIs (config.py)")
+            if self._armazem is not None:
+                self._armazem.fechar()
+                self._armazem = None
+            self._contexto = ContextoAnalise(self.args, self.pasta_base, self.chaves)
+        return self._contexto
+
+    def atualizacoes(self) -> Dict[str, float]:
+        """
+        Data da última gravação dos resultados de cada participante
+        """
+        if self._atualizacoes is None:
+            self._atualizacoes = self.armazem().atualizacoes()
+        return self._atualizacoes
+
+    def limpar_atualizacoes(self):
+        self._atualizacoes = None
+
+    def executar(self, nomes: List[str]):
+        for classe in ETAPAS:
+            if classe.nome not in nomes:
+                continue
+            etapa = classe(self)
+            alvos, por_codigo = etapa.desatualizados(self.args.force)
+            if not alvos:
+                self.logger.info(f"{etapa.nome}: atualizado, nada a fazer")
+                METRICAS.incrementar('etapas_total', etapa=etapa.nome, situacao='atualizada')
+                continue
+            descricao = 'coorte inteira' if alvos == [TODOS] else f"{len(alvos)} participante(s)"
+            self.logger.info(f"{etapa.nome}: {descricao}{' (código alterado)' if por_codigo else ''}")
+            with METRICAS.cronometro('etapa_segundos', etapa=etapa.nome):
+                etapa.executar(alvos, forcar=self.args.force or por_codigo)
+            METRICAS.incrementar('etapas_total', etapa=etapa.nome, situacao='executada')
+
+    def fechar(self):
+        if self._contexto is not None:
+            self._contexto.fechar()
+        if self._armazem is not None:
+            self._armazem.fechar()
+
+def parse_argumentos_etapas(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description="Pipeline em etapas: cada etapa só refaz o que está desatualizado "
+                    "(saídas mais antigas que as entradas)"
+    )
+    subparsers = parser.add_subparsers(dest='etapa', required=True, metavar='ETAPA')
+    descricoes = {classe.nome: classe.descricao for classe in ETAPAS}
+    descricoes['all'] = "Executa ingest, score, report, consolidate e charts"
+    for nome, apelidos in APELIDOS.items():
+        sub = subparsers.add_parser(nome, aliases=apelidos, help=descricoes[nome], description=descricoes[nome])
+        sub.add_argument('--pasta', default='Resumos',
+                         help="Pasta com as pastas dos participantes (padrão: Resumos)")
+        sub.add_argument('--participants', '--participantes', nargs='+', default=None, metavar='NOME',
+                         help="Só estes participantes (não se aplica a consolidate e charts, que "
+                              "cobrem a coorte inteira)")
+        sub.add_argument('--force', '--forcar', action='store_true',
+                         help="Refaz a etapa mesmo com as saídas atualizadas")
+        sub.add_argument('--workers', type=int, default=1,
+                         help="Processos usados na leitura dos arquivos e no desenho dos gráficos (padrão: 1)")
+        if nome in ('score', 'all'):
+            adicionar_opcoes_analise(sub)
+        if nome in ('charts', 'all'):
+            adicionar_opcoes_graficos(sub)
+    args = parser.parse_args(argv)
+    # Apelidos em português viram o nome da etapa
+    args.etapa = next(nome for nome, apelidos in APELIDOS.items() if args.etapa in [nome] + apelidos)
+    return args
+
+def executar_etapas(args: argparse.Namespace, chaves: Optional[Tuple[str, str]] = None,
+                    nome_metricas: str = 'execucao'):
+    """
+    Executa o subcomando (uma etapa ou 'all') e grava as métricas da execução
+    """
+    logger = logging.getLogger('detector_ia')
+    nomes = [classe.nome for classe in ETAPAS] if args.etapa == 'all' else [args.etapa]
+    pipeline = PipelineEtapas(args, chaves)
+    try:
+        pipeline.executar(nomes)
+        logger.info("Etapas concluídas")
+    except KeyboardInterrupt:
+        logger.warning("Processamento interrompido. Use --resume para continuar de onde parou")
+        raise
+    except Exception as e:
+        logger.error(f"Erro no processamento: {str(e)}", exc_info=True)
+        raise
+    finally:
+        pipeline.fechar()
+        METRICAS.salvar(pipeline.pasta_base / "Metricas", nome_metricas)
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from motor_assincrono import MotorAssincrono
+
+class PipelineFluxo:
+    """
+    Pipeline em fluxo: leitura -> normalização -> análise -> relatório.
+
+    Os arquivos chegam de um gerador (ver processador_texto.ler_resumos_em_fluxo)
+    e passam por uma fila limitada até o motor de análise, então a análise começa
+    assim que o primeiro arquivo é lido. Quando a fila enche, a leitura espera
+    (backpressure). O relatório de um participante é escrito assim que todas as
+    suas resenhas terminam e seus resultados são descartados da memória, de modo
+    que o uso de memória não cresce com o tamanho da coorte.
+    """
+
+    def __init__(self, motor: MotorAssincrono,
+                 ao_concluir_participante: Callable[[str, List[Dict]], None],
+                 ao_concluir_resenha: Optional[Callable[[str, Dict], None]] = None,
+                 ja_analisado: Optional[Callable[[str, str], Optional[Dict]]] = None,
+                 max_fila: int = 16):
+        self.motor = motor
+        self.ao_concluir_participante = ao_concluir_participante
+        self.ao_concluir_resenha = ao_concluir_resenha
+        self.ja_analisado = ja_analisado
+        self.max_fila = max(1, max_fila)
+        self.logger = logging.getLogger('detector_ia')
+
+    async def _executar(self, itens: Iterator[Tuple[str, Optional[str], Optional[str]]]):
+        loop = asyncio.get_running_loop()
+        fila: asyncio.Queue = asyncio.Queue(maxsize=self.max_fila)
+        semaforo_gptzero = asyncio.Semaphore(self.motor.max_simultaneas_gptzero)
+        semaforo_zerogpt = asyncio.Semaphore(self.motor.max_simultaneas_zerogpt)
+        num_consumidores = max(self.motor.max_simultaneas_gptzero, self.motor.max_simultaneas_zerogpt)
+
+        # Estado por participante: resultados (com a posição original), lidos e total esperado
+        resultados: Dict[str, List[Tuple[int, Dict]]] = {}
+        lidos: Dict[str, int] = {}
+        esperados: Dict[str, int] = {}
+        escritas = []
+
+        # Leitura, journal e escrita de relatórios em threads próprias, fora do loop de eventos.
+        # Uma thread de escrita basta: montar as planilhas é CPU (o GIL não deixaria outras
+        # threads avançarem) e os relatórios e o manifesto são gravados um participante por vez
+        leitor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leitor')
+        gravador_journal = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+        escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='escritor')
+        detectores = ThreadPoolExecutor(
+            max_workers=self.motor.max_simultaneas_gptzero + self.motor.max_simultaneas_zerogpt,
+            thread_name_prefix='detector'
+        )
+
+        def verificar_conclusao(participante: str):
+            if participante in esperados and len(resultados.get(participante, [])) == esperados[participante]:
+                concluidos = [r for _, r in sorted(resultados.pop(participante, []), key=lambda x: x[0])]
+                del esperados[participante]
+                lidos.pop(participante, None)
+                if concluidos:
+                    escritas.append(loop.run_in_executor(
+                        escritor, self.ao_concluir_participante, participante, concluidos
+                    ))
+                else:
+                    self.logger.warning(f"Nenhum resumo encontrado para o participante: {participante}")
+
+        async def produtor():
+            sentinela = object()
+            while True:
+                item = await loop.run_in_executor(leitor, next, itens, sentinela)
+                if item is sentinela:
+                    break
+                participante, nome_livro, texto = item
+                if nome_livro is None:
+                    # Fim dos arquivos do participante
+                    esperados[participante] = lidos.get(participante, 0)
+                    verificar_conclusao(participante)
+                    continue
+
+                posicao = lidos.get(participante, 0)
+                lidos[participante] = posicao + 1
+                anterior = self.ja_analisado(participante, nome_livro) if self.ja_analisado else None
+                if anterior is not None:
+                    resultados.setdefault(participante, []).append((posicao, anterior))
+                    continue
+                await fila.put((participante, posicao, nome_livro, texto))  # espera se a fila estiver cheia
+
+            for _ in range(num_consumidores):
+                await fila.put(None)
+
+        async def consumidor():
+            while True:
+                item = await fila.get()
+                if item is None:
+                    return
+                participante, posicao, nome_livro, texto = item
+                resultado = await self.motor.analisar_resumo(
+                    nome_livro, texto, semaforo_gptzero, semaforo_zerogpt, detectores
+                )
+                if self.ao_concluir_resenha is not None:
+                    # O journal grava com fsync: espera em outra thread para não travar o loop
+                    await loop.run_in_executor(gravador_journal, self.ao_concluir_resenha, participante, resultado)
+                resultados.setdefault(participante, []).append((posicao, resultado))
+                verificar_conclusao(participante)
+
+        try:
+            await asyncio.gather(produtor(), *(consumidor() for _ in range(num_consumidores)))
+            if escritas:
+                await asyncio.gather(*escritas)
+        finally:
+            detectores.shutdown(wait=True)
+            escritor.shutdown(wait=True)
+            gravador_journal.shutdown(wait=True)
+            leitor.shutdown(wait=True)
+
+    def executar(self, itens: Iterator[Tuple[str, Optional[str], Optional[str]]]):
+        """
+        Processa todos os itens do gerador até o fim
+        """
+        self.logger.info(f"Processamento em fluxo (fila de até {self.max_fila} resenhas)")
+        asyncio.run(self._executar(itens))
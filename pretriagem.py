@@ -0,0 +1,283 @@
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from armazem_resultados import ArmazemResultados
+from metricas import METRICAS
+
+# Caminho de cada texto na pré-triagem (coluna Triagem_Caminho do relatório)
+CAMINHO_API = 'api'
+CAMINHO_LOCAL_HUMANO = 'local_humano'
+CAMINHO_LOCAL_IA = 'local_ia'
+CAMINHOS_LOCAIS = (CAMINHO_LOCAL_HUMANO, CAMINHO_LOCAL_IA)
+
+# Rótulos de treino tirados dos resultados anteriores: só resenhas em que os dois detectores concordam
+ROTULO_IA = (0.80, 80)      # GPTZero_Prob_IA >= 0.80 e ZeroGPT_Porcentagem_IA >= 80
+ROTULO_HUMANO = (0.20, 20)  # GPTZero_Prob_IA <= 0.20 e ZeroGPT_Porcentagem_IA <= 20
+
+_PALAVRAS = re.compile(r'\w+')
+_FIM_SENTENCA = re.compile(r'(?<=[.!?])\s+')
+_PONTUACAO = ',;:!?-"()'
+_JANELA_TTR = 200     # type/token ratio medido nas primeiras palavras (depende do tamanho do texto)
+_MAX_EXEMPLOS = 2000  # por classe, para o treino continuar rápido com muitos resultados gravados
+_DOBRAS = 5
+
+def caracteristicas_estilo(texto: str) -> List[float]:
+    """
+    Características estilométricas baratas: variação do tamanho das sentenças (burstiness),
+    tamanho médio das sentenças, type/token ratio, frequência de cada sinal de pontuação
+    por palavra e log do número de palavras
+    """
+    palavras = _PALAVRAS.findall(texto.lower())
+    total_palavras = max(1, len(palavras))
+    tamanhos = [n for n in (len(_PALAVRAS.findall(s)) for s in _FIM_SENTENCA.split(texto)) if n > 0]
+    media = float(np.mean(tamanhos)) if tamanhos else 0.0
+    burstiness = float(np.std(tamanhos)) / media if media else 0.0
+    amostra = palavras[:_JANELA_TTR]
+    ttr = len(set(amostra)) / len(amostra) if amostra else 0.0
+    pontuacao = [texto.count(sinal) / total_palavras for sinal in _PONTUACAO]
+    return [burstiness, media, ttr] + pontuacao + [math.log(total_palavras)]
+
+def _preparar(texto: str) -> str:
+    # Só letras/dígitos e um espaço entre palavras: a pontuação já entra nas características
+    return ' ' + ' '.join(_PALAVRAS.findall(texto.lower())) + ' '
+
+def _contar_trigramas(texto: str) -> Tuple[Counter, Counter]:
+    texto = _preparar(texto)
+    trigramas = Counter(texto[i:i + 3] for i in range(len(texto) - 2))
+    contextos = Counter(texto[i:i + 2] for i in range(len(texto) - 2))
+    return trigramas, contextos
+
+class ModeloTrigramas:
+    """
+    Modelo de linguagem de trigramas de caracteres com suavização add-k,
+    usado para medir a perplexidade de um texto em relação a uma classe
+    """
+
+    def __init__(self, trigramas: Counter, contextos: Counter, alfabeto: int, k: float = 0.5):
+        self.trigramas = trigramas
+        self.contextos = contextos
+        self.alfabeto = alfabeto
+        self.k = k
+
+    def log_perplexidade(self, texto: str) -> float:
+        texto = _preparar(texto)
+        total = len(texto) - 2
+        if total <= 0:
+            return 0.0
+        soma = 0.0
+        for i in range(total):
+            trigrama = texto[i:i + 3]
+            soma += math.log((self.trigramas[trigrama] + self.k) /
+                             (self.contextos[trigrama[:2]] + self.k * self.alfabeto))
+        return -soma / total
+
+def _ajustar_logistica(X: np.ndarray, y: np.ndarray, pesos: np.ndarray, l2: float = 1.0,
+                       iteracoes: int = 25) -> np.ndarray:
+    """
+    Regressão logística com regularização L2 pelo método de Newton (a última coluna de X é o intercepto)
+    """
+    w = np.zeros(X.shape[1])
+    regularizacao = np.full(X.shape[1], l2)
+    regularizacao[-1] = 0.0
+    for _ in range(iteracoes):
+        p = 1 / (1 + np.exp(-np.clip(X @ w, -30, 30)))
+        gradiente = X.T @ (pesos * (p - y)) + regularizacao * w
+        hessiana = (X * (pesos * p * (1 - p))[:, None]).T @ X + np.diag(regularizacao)
+        passo = np.linalg.solve(hessiana, gradiente)
+        w -= passo
+        if np.abs(passo).max() < 1e-6:
+            break
+    return w
+
+class PreTriagem:
+    """
+    Pontuador local (só CPU) aplicado antes dos detectores.
+
+    Estima a probabilidade de IA a partir de características estilométricas e da diferença
+    de perplexidade entre modelos de trigramas treinados com resenhas humanas e de IA dos
+    nossos próprios resultados anteriores. Textos com probabilidade <= limiar_humano ou
+    >= limiar_ia são resolvidos localmente; só os da faixa incerta seguem para as APIs.
+    """
+
+    def __init__(self, limiar_humano: float = 0.05, limiar_ia: float = 0.95):
+        if not 0 <= limiar_humano < limiar_ia <= 1:
+            raise ValueError(f"Limiares da pré-triagem inválidos: humano={limiar_humano}, ia={limiar_ia} "
+                             f"(use 0 <= humano < ia <= 1)")
+        self.limiar_humano = limiar_humano
+        self.limiar_ia = limiar_ia
+        self.logger = logging.getLogger('detector_ia')
+        self.modelo_humano: Optional[ModeloTrigramas] = None
+        self.modelo_ia: Optional[ModeloTrigramas] = None
+        self._media = self._desvio = self._pesos = None
+        self.contagens = Counter()
+
+    def _matriz(self, estilo: np.ndarray, perplexidades: np.ndarray) -> np.ndarray:
+        X = np.column_stack([estilo, perplexidades])
+        X = (X - self._media) / self._desvio
+        return np.column_stack([X, np.ones(len(X))])
+
+    def treinar(self, textos: List[str], rotulos: List[int]):
+        """
+        Treina com textos rotulados (1 = IA, 0 = humano). A diferença de perplexidade de cada
+        exemplo é calculada com modelos que não o viram (validação cruzada em dobras), para
+        a regressão não aprender a confiar demais nela.
+        """
+        y = np.asarray(rotulos, dtype=float)
+        contagens = [_contar_trigramas(texto) for texto in textos]
+        alfabeto = len({c for texto in textos for c in _preparar(texto)}) + 1
+        dobras = np.arange(len(textos)) % _DOBRAS
+
+        def somar(indices) -> Tuple[Counter, Counter]:
+            trigramas, contextos = Counter(), Counter()
+            for i in indices:
+                trigramas.update(contagens[i][0])
+                contextos.update(contagens[i][1])
+            return trigramas, contextos
+
+        # Contagens por (classe, dobra); o modelo de uma dobra é o total menos a própria dobra
+        por_dobra = {(classe, dobra): somar(np.flatnonzero((y == classe) & (dobras == dobra)))
+                     for classe in (0, 1) for dobra in range(_DOBRAS)}
+        totais = {classe: somar(np.flatnonzero(y == classe)) for classe in (0, 1)}
+        perplexidades = np.zeros(len(textos))
+        for dobra in range(_DOBRAS):
+            modelos = {
+                classe: ModeloTrigramas(totais[classe][0] - por_dobra[classe, dobra][0],
+                                        totais[classe][1] - por_dobra[classe, dobra][1], alfabeto)
+                for classe in (0, 1)
+            }
+            for i in np.flatnonzero(dobras == dobra):
+                perplexidades[i] = (modelos[0].log_perplexidade(textos[i]) -
+                                    modelos[1].log_perplexidade(textos[i]))
+
+        self.modelo_humano = ModeloTrigramas(*totais[0], alfabeto)
+        self.modelo_ia = ModeloTrigramas(*totais[1], alfabeto)
+
+        estilo = np.array([caracteristicas_estilo(texto) for texto in textos])
+        X = np.column_stack([estilo, perplexidades])
+        self._media = X.mean(axis=0)
+        self._desvio = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        # Classes com o mesmo peso total, mesmo que haja muito mais resenhas humanas
+        pesos = np.where(y == 1, len(y) / (2 * y.sum()), len(y) / (2 * (len(y) - y.sum())))
+        self._pesos = _ajustar_logistica(self._matriz(estilo, perplexidades), y, pesos)
+
+        p = 1 / (1 + np.exp(-self._matriz(estilo, perplexidades) @ self._pesos))
+        locais = (p <= self.limiar_humano) | (p >= self.limiar_ia)
+        erros = locais & ((p >= self.limiar_ia) != (y == 1))
+        self.logger.info(
+            f"Pré-triagem treinada com {int(len(y) - y.sum())} resenhas humanas e {int(y.sum())} de IA: "
+            f"{locais.mean() * 100:.1f}% delas seriam resolvidas localmente, com {int(erros.sum())} erros"
+        )
+
+    def probabilidade_ia(self, texto: str) -> float:
+        perplexidade = self.modelo_humano.log_perplexidade(texto) - self.modelo_ia.log_perplexidade(texto)
+        X = self._matriz(np.array([caracteristicas_estilo(texto)]), np.array([perplexidade]))
+        return float(1 / (1 + np.exp(-np.clip(X @ self._pesos, -30, 30)))[0])
+
+    def avaliar(self, texto: str) -> Dict:
+        """
+        Colunas Triagem_* do texto, sem entrar nas contagens (ver contabilizar). Usado quando a triagem
+        é feita antes do planejamento da cota e só os textos admitidos são contabilizados.
+        """
+        probabilidade = self.probabilidade_ia(texto)
+        if probabilidade <= self.limiar_humano:
+            caminho = CAMINHO_LOCAL_HUMANO
+        elif probabilidade >= self.limiar_ia:
+            caminho = CAMINHO_LOCAL_IA
+        else:
+            caminho = CAMINHO_API
+        return {'Triagem_Caminho': caminho, 'Triagem_Prob_IA': round(probabilidade, 4)}
+
+    def contabilizar(self, triagem: Dict) -> Dict:
+        """
+        Conta o caminho seguido por um texto avaliado e devolve a própria triagem
+        """
+        caminho = triagem['Triagem_Caminho']
+        self.contagens[caminho] += 1
+        METRICAS.incrementar('pretriagem_textos_total', caminho=caminho)
+        return triagem
+
+    def classificar(self, texto: str) -> Dict:
+        """
+        Colunas Triagem_* do texto: caminho seguido e probabilidade de IA estimada localmente
+        """
+        return self.contabilizar(self.avaliar(texto))
+
+    @staticmethod
+    def resultado_local(nome_livro: str, texto: str, triagem: Dict) -> Dict:
+        """
+        Resultado de um texto resolvido localmente, com as mesmas colunas do resultado das APIs.
+        As colunas dos detectores ficam com os valores de resultado ausente: a estimativa local
+        aparece só nas colunas Triagem_*, para não ser contada como pontuação de um detector.
+        """
+        mensagem = f"Não enviado às APIs: pré-triagem local ({triagem['Triagem_Caminho']})"
+        resultado = {
+            'Livro': nome_livro,
+            'Texto_Normalizado': texto,
+            'GPTZero_Versao': None,
+            'GPTZero_ScanID': None,
+            'GPTZero_Prob_Media_IA': -1,
+            'GPTZero_Prob_IA': -1,
+            'GPTZero_Prob_Humano': -1,
+            'GPTZero_Prob_Misto': -1,
+            'GPTZero_Categoria_Confianca': None,
+            'GPTZero_Pontuacao_Confianca': -1,
+            'GPTZero_Classe_Prevista': None,
+            'GPTZero_Classificacao': None,
+            'GPTZero_Mensagem': mensagem,
+            'GPTZero_Sentencas_Destacadas': None,
+            'Sentencas_GPTZero': [],
+            'ZeroGPT_Sucesso': None,
+            'ZeroGPT_Total_Palavras': None,
+            'ZeroGPT_Palavras_IA': None,
+            'ZeroGPT_Porcentagem_IA': None,
+            'ZeroGPT_Sentencas_IA': None,
+            'ZeroGPT_Feedback': None,
+            'ZeroGPT_Mensagem': mensagem,
+            'Sentencas_ZeroGPT': [],
+        }
+        resultado.update(triagem)
+        return resultado
+
+    def registrar_estatisticas(self):
+        total = sum(self.contagens.values())
+        if total:
+            self.logger.info(
+                f"Pré-triagem: {total - self.contagens[CAMINHO_API]} de {total} textos resolvidos localmente "
+                f"({self.contagens[CAMINHO_LOCAL_HUMANO]} humanos, {self.contagens[CAMINHO_LOCAL_IA]} IA), "
+                f"{self.contagens[CAMINHO_API]} enviados às APIs"
+            )
+
+def treinar_pretriagem(armazem: ArmazemResultados, limiar_humano: float, limiar_ia: float,
+                       min_exemplos: int = 50, semente: int = 0) -> Optional[PreTriagem]:
+    """
+    Treina a pré-triagem com os resultados gravados no armazenamento. Só entram resenhas
+    analisadas pelas APIs em que os dois detectores concordam (ROTULO_IA / ROTULO_HUMANO).
+    Retorna None (tudo vai às APIs) se alguma classe tiver menos de `min_exemplos` resenhas.
+    """
+    logger = logging.getLogger('detector_ia')
+    pretriagem = PreTriagem(limiar_humano, limiar_ia)
+    min_exemplos = max(min_exemplos, _DOBRAS)
+    df = armazem.carregar(['Texto_Normalizado', 'GPTZero_Prob_IA', 'ZeroGPT_Porcentagem_IA', 'Triagem_Caminho'])
+    df = df[~df['Triagem_Caminho'].isin(CAMINHOS_LOCAIS) & df['Texto_Normalizado'].notna()]
+    df = df.drop_duplicates('Texto_Normalizado')
+    gptzero, zerogpt = df['GPTZero_Prob_IA'], df['ZeroGPT_Porcentagem_IA']
+    ia = df[(gptzero >= ROTULO_IA[0]) & (zerogpt >= ROTULO_IA[1])]
+    humano = df[(gptzero >= 0) & (gptzero <= ROTULO_HUMANO[0]) & (zerogpt <= ROTULO_HUMANO[1])]
+    if min(len(ia), len(humano)) < min_exemplos:
+        logger.warning(
+            f"Pré-triagem desativada: {len(humano)} resenhas humanas e {len(ia)} de IA nos resultados "
+            f"anteriores (mínimo de {min_exemplos} de cada); todos os textos vão às APIs"
+        )
+        return None
+
+    ia = ia.sample(min(len(ia), _MAX_EXEMPLOS), random_state=semente)
+    humano = humano.sample(min(len(humano), _MAX_EXEMPLOS), random_state=semente)
+    textos = list(humano['Texto_Normalizado']) + list(ia['Texto_Normalizado'])
+    rotulos = [0] * len(humano) + [1] * len(ia)
+    ordem = np.random.default_rng(semente).permutation(len(textos))
+
+    pretriagem.treinar([textos[i] for i in ordem], [rotulos[i] for i in ordem])
+    return pretriagem
@@ -5,39 +5,13 @@ import re
 import unicodedata
 import docx
 import logging
-from datetime import datetime
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from metricas import METRICAS, etapa
 
-def configurar_logging():
-    """
-    Configura o sistema de logging para arquivo e console
-    """
-    # Cria pasta de logs se não existir
-    Path('logs').mkdir(exist_ok=True)
-    
-    # Nome do arquivo de log com timestamp
-    log_file = f"logs/detector_ia_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    
-    # Configura o formato do log
-    formato = logging.Formatter(
-        '%(asctime)s [%(levelname)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Handler para arquivo
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setFormatter(formato)
-    
-    # Handler para console
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formato)
-    
-    # Configura o logger
-    logger = logging.getLogger('detector_ia')
-    logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
+# Pastas criadas pelo próprio programa dentro de Resumos (não são participantes)
+PASTAS_INTERNAS = {"Relatórios", "Metricas", "Ingestao"}
 
 def corrigir_palavras_bugadas(texto):
     """
@@ -73,77 +47,210 @@ def ler_arquivo_docx(caminho):
         texto_completo.append(paragrafo.text)
     return '\n'.join(texto_completo)
 
+# Padrões pré-compilados de normalizar_texto (mesma ordem de corrigir_palavras_bugadas)
+_PADRAO_ASPAS_BUGADAS = re.compile(r'\?([^\?]+)\?')
+_SEQUENCIAS_BUGADAS = {
+    'â€™': "'",    # apóstrofo bugado
+    'â€"': "-",    # hífen bugado
+    'â€œ': '"',    # aspas de abertura bugadas
+    'â€': '"',     # aspas de fechamento bugadas (por último: é prefixo das anteriores)
+}
+_PADRAO_SEQUENCIAS_BUGADAS = re.compile('|'.join(re.escape(s) for s in _SEQUENCIAS_BUGADAS))
+_PADRAO_ESPACOS = re.compile(' {2,}')
+_PADRAO_QUEBRAS = re.compile('\n{2,}')
+
+class _TabelaCaracteres(dict):
+    """
+    Tabela caractere -> substituição usada por normalizar_texto: correções de
+    caracteres isolados e remoção de caracteres de controle (categoria C*,
+    exceto \n e \t). Caracteres mantidos mapeiam para None. A categoria
+    Unicode de cada caractere é consultada uma única vez e memorizada.
+    """
+
+    def __missing__(self, char):
+        if unicodedata.category(char).startswith('C') and char not in '\n\t':
+            valor = ''  # remove o caractere
+        else:
+            valor = None  # mantém o caractere
+        self[char] = valor
+        return valor
+
+_TABELA_CARACTERES = _TabelaCaracteres()
+for _codigo in range(256):  # pré-carrega ASCII/Latin-1, os casos mais comuns
+    _TABELA_CARACTERES[chr(_codigo)]
+# Correções de caracteres isolados (feitas antes da remoção dos caracteres de controle)
+_TABELA_CARACTERES.update({
+    '\x96': '-',    # hífen especial
+    '\x93': '"',    # aspas especiais
+    '\x94': '"',    # aspas especiais
+    '…': '...',     # reticências
+})
+
 def normalizar_texto(texto):
     """
-    Normaliza o texto preservando acentuação e formatação básica
+    Normaliza o texto preservando acentuação e formatação básica.
+    Produz exatamente o mesmo resultado da implementação original caractere a
+    caractere (normalizar_texto_referencia, em benchmark_normalizacao.py), mas
+    consulta a tabela só uma vez por caractere distinto do texto e pula as
+    etapas cujo padrão não aparece nele.
     """
-    texto = corrigir_palavras_bugadas(texto)
-    texto = ''.join(char for char in texto if not unicodedata.category(char).startswith('C') 
-                    or char in ['\n', '\t'])
-    texto = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]', '', texto)
-    texto = re.sub(r' +', ' ', texto)
-    texto = re.sub(r'\n+', '\n', texto)
+    if '?' in texto:
+        texto = _PADRAO_ASPAS_BUGADAS.sub(r'"\1"', texto)
+    if 'â€' in texto:
+        texto = _PADRAO_SEQUENCIAS_BUGADAS.sub(lambda m: _SEQUENCIAS_BUGADAS[m.group()], texto)
+    
+    # As substituições não produzem caracteres especiais, então a ordem entre elas não importa
+    for char in set(texto):
+        substituto = _TABELA_CARACTERES[char]
+        if substituto is not None:
+            texto = texto.replace(char, substituto)
+    
+    if '  ' in texto:
+        texto = _PADRAO_ESPACOS.sub(' ', texto)
+    if '\n\n' in texto:
+        texto = _PADRAO_QUEBRAS.sub('\n', texto)
     return texto.strip()
 
-def ler_resumos(pasta_base, participante_filtro=None):
+def processar_arquivo(arquivo):
     """
-    Lê os resumos de cada participante das pastas existentes
-    Retorna: dict com {participante: [(nome_livro, texto_normalizado)]}
+    Lê e normaliza um arquivo de resumo (.txt ou .docx), com fallback para latin-1.
+    Pode rodar em outro processo, por isso devolve as mensagens de log e os tempos de leitura
+    e de normalização em vez de registrá-los.
+    Retorna: ((nome_livro, texto_normalizado) ou None, [(nível, mensagem)], {etapa: segundos})
+    """
+    mensagens = [(logging.INFO, f"Processando arquivo: {arquivo}")]
+    tempos = {}
+    try:
+        inicio = perf_counter()
+        if arquivo.suffix.lower() == '.txt':
+            with open(arquivo, 'r', encoding='utf-8') as f:
+                texto = f.read()
+        else:  # .docx
+            texto = ler_arquivo_docx(arquivo)
+        tempos['ler_arquivo'] = perf_counter() - inicio
+        
+        inicio = perf_counter()
+        texto_normalizado = normalizar_texto(texto)
+        tempos['normalizar_texto'] = perf_counter() - inicio
+        mensagens.append((logging.INFO, f"Arquivo processado com sucesso: {arquivo}"))
+        return (arquivo.stem, texto_normalizado), mensagens, tempos
+        
+    except UnicodeDecodeError as e:
+        mensagens.append((logging.ERROR, f"Erro de encoding ao ler {arquivo}: {str(e)}"))
+        try:
+            with open(arquivo, 'r', encoding='latin-1') as f:
+                texto = f.read()
+            texto_normalizado = normalizar_texto(texto)
+            mensagens.append((logging.INFO, f"Arquivo recuperado com encoding alternativo: {arquivo}"))
+            return (arquivo.stem, texto_normalizado), mensagens, tempos
+        except Exception as e2:
+            mensagens.append((logging.ERROR, f"Falha na recuperação com encoding alternativo: {str(e2)}"))
+    
+    except Exception as e:
+        mensagens.append((logging.ERROR, f"Erro ao processar {arquivo}: {str(e)}\n{traceback.format_exc()}"))
+    
+    return None, mensagens, tempos
+
+def registrar_tempos(tempos):
+    """
+    Registra nas métricas da execução os tempos devolvidos por processar_arquivo
+    """
+    for nome_etapa, segundos in tempos.items():
+        METRICAS.observar('etapa_segundos', segundos, etapa=nome_etapa)
+
+def listar_arquivos_participante(pasta_participante):
+    """
+    Arquivos de resumo do participante em ordem determinística (.txt e depois .docx, por nome)
+    """
+    arquivos = []
+    for extensao in ['*.txt', '*.docx']:
+        arquivos.extend(sorted(pasta_participante.glob(extensao)))
+    return arquivos
+
+def listar_pastas_participantes(pasta_base, participante_filtro=None):
+    """
+    Pastas de participantes a processar, em ordem alfabética (ignora as pastas geradas, PASTAS_INTERNAS).
+    participante_filtro pode ser um nome ou uma lista de nomes; participantes sem pasta são
+    registrados como erro e ficam de fora. Retorna lista vazia se a pasta base não existir.
     """
     logger = logging.getLogger('detector_ia')
-    resultados = {}
     pasta_base = Path(pasta_base)
     
     if not pasta_base.exists():
         logger.error(f"Pasta base '{pasta_base}' não encontrada")
-        return resultados
+        return []
     
     logger.info(f"Iniciando processamento da pasta: {pasta_base}")
     
     if participante_filtro:
-        pasta_participante = pasta_base / participante_filtro
-        if not pasta_participante.exists() or not pasta_participante.is_dir():
-            logger.error(f"Pasta do participante '{participante_filtro}' não encontrada")
-            return resultados
-        pastas_para_processar = [pasta_participante]
+        nomes = [participante_filtro] if isinstance(participante_filtro, str) else participante_filtro
+        pastas = []
+        for nome in nomes:
+            pasta_participante = pasta_base / nome
+            if not pasta_participante.exists() or not pasta_participante.is_dir():
+                logger.error(f"Pasta do participante '{nome}' não encontrada")
+                continue
+            pastas.append(pasta_participante)
+        return pastas
+    
+    return sorted(p for p in pasta_base.iterdir() 
+                  if p.is_dir() and p.name not in PASTAS_INTERNAS)
+
+def selecionar_arquivos(pasta_participante, filtro_arquivos=None):
+    """
+    Arquivos do participante que passam no filtro (todos, se não houver filtro)
+    """
+    arquivos = listar_arquivos_participante(pasta_participante)
+    if filtro_arquivos is None:
+        return arquivos
+    selecionados = [arquivo for arquivo in arquivos if filtro_arquivos(arquivo)]
+    logging.getLogger('detector_ia').info(
+        f"Participante {pasta_participante.name}: {len(selecionados)} de {len(arquivos)} arquivos novos ou alterados"
+    )
+    return selecionados
+
+@etapa('ler_resumos')
+def ler_resumos(pasta_base, participante_filtro=None, workers=1, filtro_arquivos=None):
+    """
+    Lê os resumos de cada participante das pastas existentes.
+    Com workers > 1, leitura, extração de .docx e normalização rodam em um pool de processos.
+    Com filtro_arquivos (ex.: ManifestoIngestao.alterado), só os arquivos aceitos pelo filtro
+    são lidos, e participantes sem nenhum arquivo aceito ficam de fora.
+    Retorna: dict com {participante: [(nome_livro, texto_normalizado)]}
+    """
+    logger = logging.getLogger('detector_ia')
+    resultados = {}
+    pastas_para_processar = listar_pastas_participantes(pasta_base, participante_filtro)
+    
+    arquivos_por_participante = [
+        (pasta_participante.name, selecionar_arquivos(pasta_participante, filtro_arquivos))
+        for pasta_participante in pastas_para_processar
+    ]
+    if filtro_arquivos is not None:
+        arquivos_por_participante = [(nome, arquivos) for nome, arquivos in arquivos_por_participante if arquivos]
+    todos_arquivos = [arquivo for _, arquivos in arquivos_por_participante for arquivo in arquivos]
+    
+    if workers > 1 and len(todos_arquivos) > 1:
+        logger.info(f"Lendo {len(todos_arquivos)} arquivos com {workers} processos")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map preserva a ordem de entrada, então o resultado é determinístico
+            processados = list(executor.map(processar_arquivo, todos_arquivos,
+                                            chunksize=max(1, len(todos_arquivos) // (workers * 4))))
     else:
-        pastas_para_processar = [p for p in pasta_base.iterdir() 
-                                if p.is_dir() and p.name != "Relatórios"]
+        processados = [processar_arquivo(arquivo) for arquivo in todos_arquivos]
     
-    for pasta_participante in pastas_para_processar:
-        nome_participante = pasta_participante.name
+    posicao = 0
+    for nome_participante, arquivos in arquivos_por_participante:
         logger.info(f"Processando participante: {nome_participante}")
         resumos = []
         
-        for extensao in ['*.txt', '*.docx']:
-            for arquivo in pasta_participante.glob(extensao):
-                logger.info(f"Processando arquivo: {arquivo}")
-                try:
-                    if arquivo.suffix.lower() == '.txt':
-                        with open(arquivo, 'r', encoding='utf-8') as f:
-                            texto = f.read()
-                    else:  # .docx
-                        texto = ler_arquivo_docx(arquivo)
-                    
-                    texto_normalizado = normalizar_texto(texto)
-                    nome_livro = arquivo.stem
-                    resumos.append((nome_livro, texto_normalizado))
-                    logger.info(f"Arquivo processado com sucesso: {arquivo}")
-                    
-                except UnicodeDecodeError as e:
-                    logger.error(f"Erro de encoding ao ler {arquivo}: {str(e)}")
-                    try:
-                        with open(arquivo, 'r', encoding='latin-1') as f:
-                            texto = f.read()
-                        texto_normalizado = normalizar_texto(texto)
-                        nome_livro = arquivo.stem
-                        resumos.append((nome_livro, texto_normalizado))
-                        logger.info(f"Arquivo recuperado com encoding alternativo: {arquivo}")
-                    except Exception as e2:
-                        logger.error(f"Falha na recuperação com encoding alternativo: {str(e2)}")
-                
-                except Exception as e:
-                    logger.error(f"Erro ao processar {arquivo}: {str(e)}", exc_info=True)
+        for resumo, mensagens, tempos in processados[posicao:posicao + len(arquivos)]:
+            for nivel, mensagem in mensagens:
+                logger.log(nivel, mensagem)
+            registrar_tempos(tempos)
+            if resumo is not None:
+                resumos.append(resumo)
+        posicao += len(arquivos)
         
         if resumos:
             resultados[nome_participante] = resumos
@@ -153,6 +260,33 @@ def ler_resumos(pasta_base, participante_filtro=None):
     
     return resultados
 
+def ler_resumos_em_fluxo(pasta_base, participante_filtro=None, filtro_arquivos=None):
+    """
+    Versão em fluxo de ler_resumos: lê e normaliza um arquivo por vez, sem carregar
+    a coorte inteira na memória.
+    Gera (participante, nome_livro, texto_normalizado) para cada arquivo lido e
+    (participante, None, None) quando todos os arquivos do participante foram lidos.
+    """
+    logger = logging.getLogger('detector_ia')
+    
+    for pasta_participante in listar_pastas_participantes(pasta_base, participante_filtro):
+        nome_participante = pasta_participante.name
+        arquivos = selecionar_arquivos(pasta_participante, filtro_arquivos)
+        if filtro_arquivos is not None and not arquivos:
+            continue
+        logger.info(f"Processando participante: {nome_participante}")
+        
+        for arquivo in arquivos:
+            resumo, mensagens, tempos = processar_arquivo(arquivo)
+            for nivel, mensagem in mensagens:
+                logger.log(nivel, mensagem)
+            registrar_tempos(tempos)
+            if resumo is not None:
+                nome_livro, texto_normalizado = resumo
+                yield nome_participante, nome_livro, texto_normalizado
+        
+        yield nome_participante, None, None
+
 def gerar_relatório_excel(resultados, pasta_base):
     """
     Gera relatório Excel para cada participante
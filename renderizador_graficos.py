@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+from metricas import METRICAS, etapa
+
+FORMATOS = ('png', 'svg')
+
+def desenhar_barras(fig, ax, dados: Dict, titulo: str):
+    bars = ax.bar(dados['participantes'], dados['valores'])
+
+    # Adiciona rótulos nas barras
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{height:.1f}%',
+                ha='center', va='bottom')
+
+    ax.tick_params(axis='x', labelrotation=45)
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_horizontalalignment('right')
+    ax.set_xlabel('Participante')
+    ax.set_ylabel('% de Resenhas Marcadas como IA')
+    ax.set_title(titulo)
+    fig.tight_layout()
+
+def desenhar_barras_absoluto(fig, ax, dados: Dict, titulo: str):
+    bars = ax.bar(dados['participantes'], dados['valores'])
+
+    # Adiciona rótulos nas barras
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(height)}',  # Valor inteiro para contagem absoluta
+                ha='center', va='bottom')
+
+    ax.tick_params(axis='x', labelrotation=45)
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_horizontalalignment('right')
+    ax.set_xlabel('Participante')
+    ax.set_ylabel('Número de Resenhas Marcadas como IA')
+    ax.set_title(titulo)
+    fig.tight_layout()
+
+def desenhar_dispersao_consolidado(fig, ax, dados: Dict, titulo: str):
+    # Normaliza ZeroGPT para escala 0-1
+    x = [valor / 100 for valor in dados['zerogpt']]
+    ax.scatter(x, dados['gptzero'])
+
+    # Adiciona rótulos para cada ponto
+    for participante, xi, yi in zip(dados['participantes'], x, dados['gptzero']):
+        ax.annotate(participante, (xi, yi))
+
+    ax.set_xlabel('ZeroGPT_Porcentagem_IA (normalizado 0-1)')
+    ax.set_ylabel('GPTZero_Prob_IA')
+    ax.set_title(titulo)
+    ax.grid(True)
+
+def desenhar_dispersao_absoluto(fig, ax, dados: Dict, titulo: str):
+    # Plota o gráfico com eixos invertidos
+    ax.scatter(dados['zerogpt'], dados['gptzero'])
+
+    # Adiciona rótulos para cada ponto
+    for participante, xi, yi in zip(dados['participantes'], dados['zerogpt'], dados['gptzero']):
+        ax.annotate(participante, (xi, yi))
+
+    ax.set_xlabel('Número de Resenhas com ZeroGPT_Porcentagem_IA >= 40')
+    ax.set_ylabel('Número de Resenhas com GPTZero_Prob_IA >= 0.40')
+    ax.set_title(titulo)
+    ax.grid(True)
+
+    # Força o uso de números inteiros nos eixos
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+def desenhar_dispersao_individual(fig, ax, dados: Dict, titulo: str):
+    # Normaliza ZeroGPT para escala 0-1
+    x = [valor / 100 for valor in dados['zerogpt']]
+    ax.scatter(x, dados['gptzero'])
+
+    # Adiciona rótulos para cada ponto
+    for livro, xi, yi in zip(dados['livros'], x, dados['gptzero']):
+        ax.annotate(livro, (xi, yi), fontsize=8)
+
+    ax.set_xlabel('ZeroGPT_Porcentagem_IA (normalizado 0-1)')
+    ax.set_ylabel('GPTZero_Prob_IA')
+    ax.set_title(titulo)
+    ax.grid(True)
+
+    # Define limites fixos para os eixos (agora ambos 0-1)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+
+# Tipo de gráfico: (função de desenho, tamanho da figura, dpi padrão, argumentos do savefig)
+TIPOS_GRAFICO = {
+    'barras': (desenhar_barras, (12, 6), 100, {}),
+    'barras_absoluto': (desenhar_barras_absoluto, (12, 6), 100, {}),
+    'dispersao_consolidado': (desenhar_dispersao_consolidado, (10, 8), 100, {}),
+    'dispersao_absoluto': (desenhar_dispersao_absoluto, (10, 8), 100, {}),
+    'dispersao_individual': (desenhar_dispersao_individual, (10, 8), 300, {'bbox_inches': 'tight'}),
+}
+
+class TarefaGrafico:
+    """
+    Um gráfico a desenhar: tipo (chave de TIPOS_GRAFICO), dados já extraídos dos
+    DataFrames (listas simples, baratas de enviar a outro processo), título e nome
+    do arquivo sem extensão
+    """
+
+    def __init__(self, tipo: str, nome: str, titulo: str, dados: Dict):
+        self.tipo = tipo
+        self.nome = nome
+        self.titulo = titulo
+        self.dados = dados
+
+    def impressao(self, dpi: int, formato: str) -> str:
+        """
+        Hash de tudo o que determina a imagem; se não mudou, o arquivo existente é mantido
+        """
+        conteudo = json.dumps([self.tipo, self.titulo, self.dados, dpi, formato],
+                              sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+# Figuras reaproveitadas entre gráficos do mesmo tipo dentro de cada processo
+_modelos: Dict[str, Tuple[Figure, object]] = {}
+
+def _modelo(tipo: str):
+    if tipo not in _modelos:
+        _, tamanho, _, _ = TIPOS_GRAFICO[tipo]
+        fig = Figure(figsize=tamanho)
+        FigureCanvasAgg(fig)
+        _modelos[tipo] = (fig, fig.add_subplot())
+    fig, ax = _modelos[tipo]
+    ax.clear()
+    return fig, ax
+
+def _renderizar_tarefa(tarefa: TarefaGrafico, arquivo: Path, dpi: int, formato: str):
+    """
+    Desenha a tarefa na figura modelo do seu tipo (usado também nos processos do pool)
+    """
+    desenhar, _, _, opcoes = TIPOS_GRAFICO[tarefa.tipo]
+    fig, ax = _modelo(tarefa.tipo)
+    desenhar(fig, ax, tarefa.dados, tarefa.titulo)
+    fig.savefig(arquivo, dpi=dpi, format=formato, **opcoes)
+
+class RenderizadorGraficos:
+    """
+    Etapa de desenho dos gráficos: backend Agg pela API orientada a objetos (sem pyplot),
+    uma figura modelo por tipo de gráfico em cada processo, pool de processos com
+    workers > 1 e gráficos pulados quando os dados não mudaram desde a última execução
+    (impressões em <pasta>/impressoes_graficos.json).
+    """
+
+    VERSAO = 1
+
+    def __init__(self, pasta_saida: Path, workers: int = 1, dpi: Optional[int] = None, formato: str = 'png'):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de gráfico não suportado: {formato} (use {', '.join(FORMATOS)})")
+        self.pasta_saida = Path(pasta_saida)
+        self.workers = workers
+        self.dpi = dpi  # None: resolução padrão de cada tipo de gráfico
+        self.formato = formato
+        self.logger = logging.getLogger('detector_ia')
+        self.caminho_impressoes = self.pasta_saida / 'impressoes_graficos.json'
+        self._impressoes: Dict[str, str] = {}
+
+        if self.caminho_impressoes.exists():
+            try:
+                with open(self.caminho_impressoes, 'r', encoding='utf-8') as f:
+                    dados = json.load(f)
+                if dados.get('versao') == self.VERSAO:
+                    self._impressoes = dados.get('graficos', {})
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Impressões dos gráficos ignoradas (ilegíveis): {str(e)}")
+
+    def arquivo(self, tarefa: TarefaGrafico) -> Path:
+        return self.pasta_saida / f"{tarefa.nome}.{self.formato}"
+
+    @etapa('graficos')
+    def renderizar(self, tarefas: List[TarefaGrafico], forcar: bool = False) -> List[Path]:
+        """
+        Desenha os gráficos cujos dados mudaram (ou cujo arquivo não existe); com forcar, todos
+        (ex.: depois de alterar o estilo dos gráficos). Retorna os arquivos gerados.
+        """
+        self.pasta_saida.mkdir(parents=True, exist_ok=True)
+        pendentes = []
+        for tarefa in tarefas:
+            dpi = self.dpi or TIPOS_GRAFICO[tarefa.tipo][2]
+            arquivo = self.arquivo(tarefa)
+            impressao = tarefa.impressao(dpi, self.formato)
+            if not forcar and arquivo.exists() and self._impressoes.get(arquivo.name) == impressao:
+                continue
+            pendentes.append((tarefa, arquivo, dpi, impressao))
+
+        if self.workers > 1 and len(pendentes) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(_renderizar_tarefa,
+                                  [tarefa for tarefa, _, _, _ in pendentes],
+                                  [arquivo for _, arquivo, _, _ in pendentes],
+                                  [dpi for _, _, dpi, _ in pendentes],
+                                  repeat(self.formato),
+                                  chunksize=max(1, len(pendentes) // (self.workers * 4))))
+        else:
+            for tarefa, arquivo, dpi, _ in pendentes:
+                _renderizar_tarefa(tarefa, arquivo, dpi, self.formato)
+
+        for _, arquivo, _, impressao in pendentes:
+            self._impressoes[arquivo.name] = impressao
+        if pendentes:
+            self.salvar()
+        self.logger.info(
+            f"Gráficos: {len(pendentes)} gerados, {len(tarefas) - len(pendentes)} sem alteração"
+        )
+        METRICAS.incrementar('graficos_total', len(pendentes), situacao='gerado')
+        METRICAS.incrementar('graficos_total', len(tarefas) - len(pendentes), situacao='sem_alteracao')
+        return [arquivo for _, arquivo, _, _ in pendentes]
+
+    def salvar(self):
+        """
+        Grava as impressões de forma atômica (arquivo temporário + rename)
+        """
+        temporario = self.caminho_impressoes.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': self.VERSAO, 'graficos': self._impressoes}, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho_impressoes)
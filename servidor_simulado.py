@@ -0,0 +1,305 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+from typing import Dict, List, Tuple
+
+CAMINHO_GPTZERO = '/v2/predict/text'
+CAMINHO_ZEROGPT = '/api/detect/detectText'
+
+class ConfiguracaoSimulacao:
+    """
+    Parâmetros de latência e de falhas do servidor simulado.
+
+    - distribuicao: 'fixa', 'uniforme' ou 'lognormal' (latência em segundos)
+    - prob_429 / rajada_429: probabilidade de iniciar uma rajada de 429 e quantas
+      respostas seguidas a rajada dura; retry_after é enviado no cabeçalho Retry-After
+    - prob_5xx: probabilidade de responder 500/502/503
+    - prob_vazio: probabilidade de responder 200 com corpo vazio
+    - prob_timeout: probabilidade de segurar a resposta por duracao_timeout segundos
+    """
+
+    def __init__(self, latencia_media: float = 0.2, latencia_desvio: float = 0.1,
+                 distribuicao: str = 'lognormal', prob_429: float = 0.0, rajada_429: int = 5,
+                 retry_after: float = 1.0, prob_5xx: float = 0.0, prob_vazio: float = 0.0,
+                 prob_timeout: float = 0.0, duracao_timeout: float = 30.0, semente: int = None):
+        self.latencia_media = latencia_media
+        self.latencia_desvio = latencia_desvio
+        self.distribuicao = distribuicao
+        self.prob_429 = prob_429
+        self.rajada_429 = rajada_429
+        self.retry_after = retry_after
+        self.prob_5xx = prob_5xx
+        self.prob_vazio = prob_vazio
+        self.prob_timeout = prob_timeout
+        self.duracao_timeout = duracao_timeout
+        self.semente = semente
+
+
+class EstadoSimulacao:
+    """
+    Estado compartilhado entre as threads do servidor: sorteios, rajadas de 429 e estatísticas
+    """
+
+    def __init__(self, config: ConfiguracaoSimulacao):
+        self.config = config
+        self.random = random.Random(config.semente)
+        self.lock = threading.Lock()
+        self.rajada_restante = 0
+        self.latencias: List[Tuple[str, int, float]] = []  # (caminho, status, segundos)
+        self.contagem_status: Dict[int, int] = {}
+
+    def sortear_latencia(self) -> float:
+        c = self.config
+        with self.lock:
+            if c.distribuicao == 'fixa':
+                return c.latencia_media
+            if c.distribuicao == 'uniforme':
+                return self.random.uniform(max(0.0, c.latencia_media - c.latencia_desvio),
+                                           c.latencia_media + c.latencia_desvio)
+            if c.latencia_media <= 0:
+                return 0.0
+            # lognormal com a média e o desvio informados
+            variancia = c.latencia_desvio ** 2
+            sigma2 = math.log(1 + variancia / c.latencia_media ** 2)
+            mu = math.log(c.latencia_media) - sigma2 / 2
+            return self.random.lognormvariate(mu, sigma2 ** 0.5)
+
+    def sortear_falha(self) -> str:
+        """
+        Retorna '429', '5xx', 'vazio', 'timeout' ou '' (sem falha)
+        """
+        c = self.config
+        with self.lock:
+            if self.rajada_restante > 0:
+                self.rajada_restante -= 1
+                return '429'
+            if self.random.random() < c.prob_429:
+                self.rajada_restante = max(0, c.rajada_429 - 1)
+                return '429'
+            sorteio = self.random.random()
+            if sorteio < c.prob_5xx:
+                return '5xx'
+            sorteio -= c.prob_5xx
+            if sorteio < c.prob_vazio:
+                return 'vazio'
+            sorteio -= c.prob_vazio
+            if sorteio < c.prob_timeout:
+                return 'timeout'
+            return ''
+
+    def registrar(self, caminho: str, status: int, segundos: float):
+        with self.lock:
+            self.latencias.append((caminho, status, segundos))
+            self.contagem_status[status] = self.contagem_status.get(status, 0) + 1
+
+    def estatisticas(self) -> Dict:
+        with self.lock:
+            return {
+                'requisicoes': len(self.latencias),
+                'status': dict(self.contagem_status),
+                'latencias': [segundos for _, _, segundos in self.latencias],
+            }
+
+
+def _pontuacao(texto: str) -> float:
+    """
+    Pontuação determinística (0-1) derivada do texto, para respostas estáveis entre execuções
+    """
+    digest = hashlib.sha256(texto.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF
+
+
+def _sentencas(texto: str) -> List[str]:
+    return [s.strip() for s in texto.replace('!', '.').replace('?', '.').split('.') if s.strip()]
+
+
+def resposta_gptzero(payload: Dict) -> Dict:
+    textos = payload.get('documents')
+    if not isinstance(textos, list):
+        textos = [payload.get('document', '')]
+
+    documentos = []
+    for texto in textos:
+        prob_ia = _pontuacao(texto)
+        prob_misto = (1 - prob_ia) * 0.2
+        prob_humano = 1 - prob_ia - prob_misto
+        classes = {'ai': prob_ia, 'human': prob_humano, 'mixed': prob_misto}
+        classe = max(classes, key=classes.get)
+        documentos.append({
+            'average_generated_prob': prob_ia,
+            'class_probabilities': classes,
+            'confidence_category': 'high' if abs(prob_ia - 0.5) > 0.35 else 'medium' if abs(prob_ia - 0.5) > 0.15 else 'low',
+            'confidence_score': abs(prob_ia - 0.5) * 2,
+            'predicted_class': classe,
+            'document_classification': {'ai': 'AI_ONLY', 'human': 'HUMAN_ONLY', 'mixed': 'MIXED'}[classe],
+            'result_message': f'Resultado simulado ({classe})',
+            'sentences': [
+                {
+                    'sentence': sentenca,
+                    'generated_prob': _pontuacao(sentenca),
+                    'perplexity': 10 + _pontuacao(sentenca[::-1]) * 90,
+                    'highlight_sentence_for_ai': _pontuacao(sentenca) > 0.7,
+                }
+                for sentenca in _sentencas(texto)
+            ],
+        })
+    return {'version': 'simulado', 'scanId': str(uuid.uuid4()), 'documents': documentos}
+
+
+def resposta_zerogpt(payload: Dict) -> Dict:
+    texto = payload.get('input_text', '')
+    palavras = len(texto.split())
+    porcentagem = round(_pontuacao(texto) * 100, 2)
+    sentencas = _sentencas(texto)
+    if porcentagem >= 60:
+        feedback = 'Your Text is AI/GPT Generated'
+    elif porcentagem >= 20:
+        feedback = 'Your Text is Most Likely Human written, may include parts generated by AI/GPT'
+    else:
+        feedback = 'Your Text is Human written'
+    return {
+        'success': True,
+        'message': 'detection complete',
+        'data': {
+            'input_text': texto,
+            'textWords': palavras,
+            'aiWords': int(palavras * porcentagem / 100),
+            'fakePercentage': porcentagem,
+            'sentences': sentencas,
+            'h': [s for s in sentencas if _pontuacao(s) > 0.7],
+            'feedback': feedback,
+        },
+    }
+
+
+class ManipuladorSimulado(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como as APIs reais
+    estado: EstadoSimulacao = None
+
+    def log_message(self, formato, *args):
+        logging.getLogger('servidor_simulado').debug(formato % args)
+
+    def _responder(self, status: int, corpo: bytes, cabecalhos: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path == '/estatisticas':
+            self._responder(200, json.dumps(self.estado.estatisticas()).encode('utf-8'))
+        else:
+            self._responder(404, b'{}')
+
+    def do_POST(self):
+        inicio = monotonic()
+        tamanho = int(self.headers.get('Content-Length', 0))
+        corpo = self.rfile.read(tamanho) if tamanho else b''
+
+        if self.path not in (CAMINHO_GPTZERO, CAMINHO_ZEROGPT):
+            self._responder(404, b'{"error": "not found"}')
+            return
+
+        sleep(self.estado.sortear_latencia())
+        falha = self.estado.sortear_falha()
+        config = self.estado.config
+
+        if falha == 'timeout':
+            sleep(config.duracao_timeout)
+        if falha == '429':
+            status = 429
+            self._responder(status, b'{"error": "rate limit"}', {'Retry-After': str(config.retry_after)})
+        elif falha == '5xx':
+            status = self.estado.random.choice([500, 502, 503])
+            self._responder(status, b'{"error": "server error"}')
+        elif falha == 'vazio':
+            status = 200
+            self._responder(status, b'')
+        else:
+            try:
+                payload = json.loads(corpo or b'{}')
+            except json.JSONDecodeError:
+                status = 400
+                self._responder(status, b'{"error": "invalid json"}')
+            else:
+                status = 200
+                if self.path == CAMINHO_GPTZERO:
+                    resposta = resposta_gptzero(payload)
+                else:
+                    resposta = resposta_zerogpt(payload)
+                self._responder(status, json.dumps(resposta).encode('utf-8'))
+
+        self.estado.registrar(self.path, status, monotonic() - inicio)
+
+
+def iniciar_servidor(config: ConfiguracaoSimulacao, host: str = '127.0.0.1',
+                     porta: int = 0) -> Tuple[ThreadingHTTPServer, EstadoSimulacao]:
+    """
+    Inicia o servidor em uma thread em segundo plano. Com porta=0, o sistema escolhe uma porta livre
+    (disponível em servidor.server_address[1]).
+    """
+    estado = EstadoSimulacao(config)
+    manipulador = type('Manipulador', (ManipuladorSimulado,), {'estado': estado})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, estado
+
+
+def adicionar_argumentos_simulacao(parser: argparse.ArgumentParser):
+    parser.add_argument('--latencia-media', type=float, default=0.2, help="Latência média em segundos")
+    parser.add_argument('--latencia-desvio', type=float, default=0.1, help="Desvio da latência em segundos")
+    parser.add_argument('--distribuicao', choices=['fixa', 'uniforme', 'lognormal'], default='lognormal')
+    parser.add_argument('--prob-429', type=float, default=0.0, help="Probabilidade de iniciar uma rajada de 429")
+    parser.add_argument('--rajada-429', type=int, default=5, help="Respostas 429 seguidas em cada rajada")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Valor do cabeçalho Retry-After")
+    parser.add_argument('--prob-5xx', type=float, default=0.0, help="Probabilidade de erro 5xx")
+    parser.add_argument('--prob-vazio', type=float, default=0.0, help="Probabilidade de corpo vazio")
+    parser.add_argument('--prob-timeout', type=float, default=0.0, help="Probabilidade de timeout")
+    parser.add_argument('--duracao-timeout', type=float, default=30.0, help="Segundos segurando a resposta no timeout")
+    parser.add_argument('--semente', type=int, default=None, help="Semente dos sorteios")
+
+
+def configuracao_dos_argumentos(args) -> ConfiguracaoSimulacao:
+    return ConfiguracaoSimulacao(
+        latencia_media=args.latencia_media,
+        latencia_desvio=args.latencia_desvio,
+        distribuicao=args.distribuicao,
+        prob_429=args.prob_429,
+        rajada_429=args.rajada_429,
+        retry_after=args.retry_after,
+        prob_5xx=args.prob_5xx,
+        prob_vazio=args.prob_vazio,
+        prob_timeout=args.prob_timeout,
+        duracao_timeout=args.duracao_timeout,
+        semente=args.semente,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que simula as APIs GPTZero e ZeroGPT")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    adicionar_argumentos_simulacao(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    servidor, _ = iniciar_servidor(configuracao_dos_argumentos(args), args.host, args.porta)
+    logging.info(f"Servidor simulado em http://{args.host}:{servidor.server_address[1]} (Ctrl-C para sair)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+from datetime import date, datetime
+import pytest
+import agendador_cota
+from agendador_cota import (
+    AgendadorCota,
+    CotaDetector,
+    UnidadeAgenda,
+    interpretar_limite,
+    interpretar_prioridade,
+    montar_unidades
+)
+from deduplicacao import GrupoDuplicatas
+
+
+def fixar_agora(monkeypatch, agora: datetime):
+    class AgoraFixo(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.combine(agora.date(), agora.time())
+    monkeypatch.setattr(agendador_cota, 'datetime', AgoraFixo)
+
+
+def unidade(nome: str, palavras: float, ordem: int, nova: bool = False) -> UnidadeAgenda:
+    return UnidadeAgenda(nome, [ordem], {'GPTZero': (palavras, 1)}, nova, ordem)
+
+
+def agendador_com_limites(tmp_path, prioridade=None, ritmo='livre', **limites) -> AgendadorCota:
+    agendador = AgendadorCota(tmp_path / 'cotas.json', prioridade, ritmo)
+    for limite, valor in limites.items():
+        agendador.definir_limite('GPTZero', limite, valor)
+    return agendador
+
+
+def test_interpretar_limite():
+    assert interpretar_limite('gptzero:palavras_mes=300000') == ('GPTZero', 'palavras_mes', 300000.0)
+    assert interpretar_limite('ZeroGPT:requisicoes_dia=nenhum') == ('ZeroGPT', 'requisicoes_dia', None)
+    for invalido in ('gptzero=10', 'outro:palavras_dia=1', 'gptzero:horas=1', 'gptzero:palavras_dia=-1',
+                     'gptzero:palavras_dia=muito'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            interpretar_limite(invalido)
+
+
+def test_interpretar_prioridade():
+    assert interpretar_prioridade('novos, menores') == ['novos', 'menores']
+    with pytest.raises(argparse.ArgumentTypeError):
+        interpretar_prioridade('novos,rapidos')
+
+
+def test_contadores_zeram_na_virada_do_dia_e_do_mes():
+    cota = CotaDetector('GPTZero', consumo={'dia': '2025-01-31', 'mes': '2025-01',
+                                            'palavras_dia': 40, 'palavras_mes': 900,
+                                            'requisicoes_dia': 2, 'requisicoes_mes': 30})
+    assert cota.estado(date(2025, 1, 31))['palavras_dia'] == 40
+    mesmo_mes = CotaDetector('GPTZero', consumo=cota.para_dict()['consumo']).estado(date(2025, 1, 31))
+    assert mesmo_mes == {'palavras_dia': 40, 'palavras_mes': 900, 'requisicoes_dia': 2, 'requisicoes_mes': 30}
+
+    cota = CotaDetector('GPTZero', consumo={'dia': '2025-01-30', 'mes': '2025-01', 'palavras_dia': 40,
+                                            'palavras_mes': 900})
+    assert cota.estado(date(2025, 1, 31))['palavras_dia'] == 0
+    assert cota.estado(date(2025, 1, 31))['palavras_mes'] == 900
+    assert cota.estado(date(2025, 2, 1))['palavras_mes'] == 0
+
+
+def test_orcamento_livre_e_uniforme():
+    cota = CotaDetector('GPTZero', {'palavras_dia': 300, 'palavras_mes': 1000, 'requisicoes_mes': 50})
+    usado = {'palavras_dia': 0, 'palavras_mes': 500, 'requisicoes_dia': 0, 'requisicoes_mes': 45}
+    assert cota.orcamento(date(2025, 1, 22), usado) == (300, 5)
+    # Uniforme: 500 palavras restantes divididas pelos 10 dias que faltam (22 a 31)
+    assert cota.orcamento(date(2025, 1, 22), usado, 'uniforme') == (pytest.approx(50), pytest.approx(0.5))
+    # O que já foi gasto hoje sai da parte do dia
+    usado_hoje = dict(usado, palavras_dia=20, palavras_mes=520)
+    assert cota.orcamento(date(2025, 1, 22), usado_hoje, 'uniforme')[0] == pytest.approx(30)
+    assert CotaDetector('GPTZero').orcamento(date(2025, 1, 22), usado) == (None, None)
+
+
+def test_cabe_em_um_periodo():
+    cota = CotaDetector('GPTZero', {'palavras_dia': 100, 'requisicoes_mes': 3})
+    assert cota.cabe_em_um_periodo((100, 3))
+    assert not cota.cabe_em_um_periodo((101, 1))
+    assert not cota.cabe_em_um_periodo((10, 4))
+
+
+def test_participantes_com_duplicatas_em_comum_formam_uma_unidade():
+    participantes = ['Ana', 'Ana', 'Bruno', 'Carla', 'Bruno', 'Davi']
+    grupos = [GrupoDuplicatas(0, 0), GrupoDuplicatas(1, 1), GrupoDuplicatas(2, 3), GrupoDuplicatas(3, 5)]
+    grupos[0].adicionar(2, 1.0)  # Ana e Bruno dividem uma resenha
+    grupos[1].adicionar(4, 1.0)
+    custos = [{'GPTZero': (10, 1)}, {'GPTZero': (20, 1)}, {'GPTZero': (5, 1)}, {'GPTZero': (7, 2)}]
+
+    unidades = montar_unidades(grupos, participantes, custos, novos={'Carla'})
+    assert [(u.nome, u.itens, u.custos, u.nova) for u in unidades] == [
+        ('Ana, Bruno', [0, 1], {'GPTZero': (30, 2)}, False),
+        ('Carla', [2], {'GPTZero': (5, 1)}, True),
+        ('Davi', [3], {'GPTZero': (7, 2)}, False),
+    ]
+
+    por_resenha = montar_unidades(grupos, participantes, custos, novos={'Bruno'}, por_resenha=True)
+    assert [(u.nome, u.itens, u.nova) for u in por_resenha] == [
+        ('Ana', [0], True), ('Ana', [1], True), ('Carla', [2], False), ('Davi', [3], False)
+    ]
+
+
+def test_admite_o_que_cabe_hoje_e_projeta_os_dias_seguintes(monkeypatch, tmp_path):
+    fixar_agora(monkeypatch, datetime(2025, 1, 10, 9, 0))
+    agendador = agendador_com_limites(tmp_path, palavras_dia=100)
+    unidades = [unidade('A', 60, 0), unidade('B', 60, 1), unidade('C', 30, 2)]
+
+    plano = agendador.planejar(unidades, {'GPTZero': 2.0})
+    assert [u.nome for u in plano.admitidas] == ['A', 'C']
+    assert [u.nome for u in plano.adiadas] == ['B']
+    assert plano.itens == [0, 2]
+    assert plano.custo_admitido == {'GPTZero': (90, 2)}
+    assert plano.duracao_segundos == 4.0
+    assert plano.dias_adicionais == 1
+    assert plano.conclusao == datetime(2025, 1, 11, 0, 0, 2)
+
+
+def test_cota_mensal_so_renova_na_virada_do_mes(monkeypatch, tmp_path):
+    fixar_agora(monkeypatch, datetime(2025, 1, 30, 9, 0))
+    agendador = agendador_com_limites(tmp_path, palavras_mes=100)
+    plano = agendador.planejar([unidade('A', 60, 0), unidade('B', 60, 1)])
+    assert [u.nome for u in plano.admitidas] == ['A']
+    assert plano.dias_adicionais == 2  # 31/01 sem cota; B entra em 01/02
+    assert plano.conclusao.date() == date(2025, 2, 1)
+
+
+def test_unidade_maior_que_a_cota_nunca_e_admitida(monkeypatch, tmp_path):
+    fixar_agora(monkeypatch, datetime(2025, 1, 10, 9, 0))
+    agendador = agendador_com_limites(tmp_path, palavras_dia=100)
+    plano = agendador.planejar([unidade('A', 50, 0), unidade('Grande', 150, 1)])
+    assert [u.nome for u in plano.admitidas] == ['A']
+    assert [u.nome for u in plano.impossiveis] == ['Grande']
+    assert plano.adiadas == []
+    assert plano.conclusao is None
+
+
+@pytest.mark.parametrize('prioridade, esperado', [
+    (['ordem'], ['A', 'B']),
+    (['menores'], ['C', 'A']),
+    (['maiores'], ['B', 'A']),
+    (['novos', 'menores'], ['B', 'C']),
+])
+def test_prioridade_define_quem_entra_primeiro(monkeypatch, tmp_path, prioridade, esperado):
+    fixar_agora(monkeypatch, datetime(2025, 1, 10, 9, 0))
+    agendador = agendador_com_limites(tmp_path, prioridade, requisicoes_dia=2)
+    unidades = [unidade('A', 30, 0), unidade('B', 50, 1, nova=True), unidade('C', 10, 2)]
+    assert [u.nome for u in agendador.planejar(unidades).admitidas] == esperado
+
+
+def test_consumo_e_vazao_persistem_entre_execucoes(tmp_path):
+    agendador = agendador_com_limites(tmp_path, palavras_dia=1000)
+    agendador.cota('GPTZero').consumir(120, 2)
+    agendador.registrar_execucao(10.0)   # 5 s por requisição
+    agendador.cota('GPTZero').requisicoes_execucao = 2
+    agendador.registrar_execucao(2.0)    # 1 s por requisição: média móvel
+    agendador.salvar()
+
+    recarregado = AgendadorCota(tmp_path / 'cotas.json')
+    assert recarregado.cota('GPTZero').limites['palavras_dia'] == 1000
+    assert recarregado.cota('GPTZero').estado(date.today())['palavras_dia'] == 120
+    assert recarregado.segundos_por_requisicao['GPTZero'] == pytest.approx(0.3 * 1 + 0.7 * 5)
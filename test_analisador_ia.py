@@ -0,0 +1,42 @@
+import pytest
+import requests
+import analisador_ia
+from analisador_ia import AnalisadorIA
+from limitador_taxa import LimiteTaxaExcedido
+
+
+def erro_http(status: int) -> requests.exceptions.HTTPError:
+    resposta = requests.Response()
+    resposta.status_code = status
+    return requests.exceptions.HTTPError(response=resposta)
+
+
+@pytest.fixture
+def analisador(monkeypatch):
+    monkeypatch.setattr(analisador_ia, 'sleep', lambda segundos: None)
+    analisador = AnalisadorIA('chave', 'chave')
+    yield analisador
+    analisador.fechar()
+
+
+@pytest.mark.parametrize('erro, chamadas_esperadas', [
+    (requests.exceptions.ConnectionError(), 1),  # já repetido pelo transporte
+    (requests.exceptions.Timeout(), 1),
+    (erro_http(503), 1),
+    (LimiteTaxaExcedido('429'), 1),  # já repetido pelo limitador
+    (erro_http(400), 3),
+    (ValueError('resposta inválida'), 3),
+])
+def test_so_repete_falhas_que_ninguem_repetiu(analisador, erro, chamadas_esperadas):
+    chamadas = []
+
+    def falhar(texto):
+        chamadas.append(texto)
+        raise erro
+    analisador.gpt_zero.analisar_texto = falhar
+    analisador.zero_gpt.analisar_texto = falhar
+
+    assert analisador.analisar_gptzero('Livro', 'texto')['GPTZero_Prob_IA'] == -1
+    assert len(chamadas) == chamadas_esperadas
+    assert analisador.analisar_zerogpt('Livro', 'texto')['ZeroGPT_Porcentagem_IA'] is None
+    assert len(chamadas) == 2 * chamadas_esperadas
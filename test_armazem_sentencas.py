@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+from armazem_sentencas import ArmazemSentencas, _localizar
+
+
+def resultado(livro: str, gptzero: list, zerogpt: list = ()) -> dict:
+    """
+    Resultado de um livro com o texto montado a partir das sentenças do GPTZero.
+    gptzero: [(sentenca, prob_ia, destacada)]; zerogpt: [(sentenca, destacada)]
+    """
+    return {
+        'Livro': livro,
+        'Texto_Normalizado': ' '.join(sentenca for sentenca, _, _ in gptzero),
+        'Sentencas_GPTZero': [[sentenca, prob, 10.0, destacada] for sentenca, prob, destacada in gptzero],
+        'Sentencas_ZeroGPT': [[sentenca, destacada] for sentenca, destacada in zerogpt],
+    }
+
+
+def resumo(df: pd.DataFrame) -> list:
+    return [tuple(linha) for linha in df[['Participante', 'Livro', 'Detector', 'Inicio', 'Prob_IA']]
+            .fillna(-1).itertuples(index=False)]
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    armazem = ArmazemSentencas(tmp_path / 'sentencas.npz')
+    armazem.gravar_participante('Bruno', [
+        resultado('B1', [('Um.', 0.1, False), ('Dois.', 0.9, True)], [('Dois.', True)]),
+        resultado('B2', [('Três.', 0.8, True)], [('Três.', False)]),
+    ])
+    armazem.gravar_participante('Ana', [
+        resultado('A1', [('Quatro.', 0.7, True), ('Cinco.', 0.2, False)], [('Quatro.', True)]),
+        {'Livro': 'A2', 'Texto_Normalizado': 'Sem sentenças.', 'Sentencas_GPTZero': [], 'Sentencas_ZeroGPT': []},
+        resultado('A3', [('Seis.', 0.95, True)]),
+    ])
+    return armazem
+
+
+def test_localizar_sentencas_fora_de_ordem_repetidas_e_ausentes():
+    texto = 'Primeira. Segunda. Primeira.'
+    assert _localizar(texto, ['Segunda.', 'Primeira.']) == ([10, 19], [18, 28])
+    # Fora de ordem: volta ao início do texto; repetida: a próxima ocorrência
+    assert _localizar(texto, ['Primeira.', 'Segunda.', 'Primeira.']) == ([0, 10, 19], [9, 18, 28])
+    assert _localizar(texto, ['Segunda.', 'Primeira.', 'Primeira.']) == ([10, 19, 0], [18, 28, 9])
+    assert _localizar(texto, [' Segunda. ', 'Nenhuma.', '']) == ([10, -1, -1], [18, -1, -1])
+
+
+def test_salvar_e_carregar_preserva_todas_as_sentencas(armazem, tmp_path):
+    antes = armazem.carregar()
+    armazem.salvar()
+
+    recarregado = ArmazemSentencas(tmp_path / 'sentencas.npz')
+    assert recarregado.participantes() == ['Ana', 'Bruno']
+    depois = recarregado.carregar()
+    pd.testing.assert_frame_equal(antes, depois)
+    assert resumo(depois) == [
+        ('Ana', 'A1', 'GPTZero', 0, pytest.approx(0.7)), ('Ana', 'A1', 'GPTZero', 8, pytest.approx(0.2)),
+        ('Ana', 'A1', 'ZeroGPT', 0, -1), ('Ana', 'A3', 'GPTZero', 0, pytest.approx(0.95)),
+        ('Bruno', 'B1', 'GPTZero', 0, pytest.approx(0.1)), ('Bruno', 'B1', 'GPTZero', 4, pytest.approx(0.9)),
+        ('Bruno', 'B1', 'ZeroGPT', 4, -1), ('Bruno', 'B2', 'GPTZero', 0, pytest.approx(0.8)),
+        ('Bruno', 'B2', 'ZeroGPT', 0, -1),
+    ]
+    # Os livros sem sentenças continuam no bloco do participante
+    assert recarregado._blocos['Ana'].livros == ['A1', 'A2', 'A3']
+
+
+def test_regravar_substitui_so_os_livros_reanalisados(armazem, tmp_path):
+    armazem.salvar()
+    recarregado = ArmazemSentencas(tmp_path / 'sentencas.npz')
+    recarregado.gravar_participante('Ana', [
+        {'Livro': 'A1', 'Texto_Normalizado': 'Quatro. Cinco.'},  # de um relatório anterior: mantém
+        resultado('A3', [('Sete.', 0.3, False), ('Oito.', 0.6, True)]),  # reanalisado: substitui
+        # A2 ausente dos resultados: removido
+    ])
+    ana = recarregado.carregar().query("Participante == 'Ana'")
+    assert recarregado._blocos['Ana'].livros == ['A1', 'A3']
+    assert resumo(ana) == [
+        ('Ana', 'A1', 'GPTZero', 0, pytest.approx(0.7)), ('Ana', 'A1', 'GPTZero', 8, pytest.approx(0.2)),
+        ('Ana', 'A1', 'ZeroGPT', 0, -1),
+        ('Ana', 'A3', 'GPTZero', 0, pytest.approx(0.3)), ('Ana', 'A3', 'GPTZero', 6, pytest.approx(0.6)),
+    ]
+    # Os índices de resenha continuam válidos para o outro participante
+    assert resumo(recarregado.carregar().query("Participante == 'Bruno'")) == resumo(
+        armazem.carregar().query("Participante == 'Bruno'"))
+
+
+def test_falha_na_reanalise_apaga_as_sentencas_antigas(armazem):
+    armazem.gravar_participante('Bruno', [
+        {'Livro': 'B1', 'Texto_Normalizado': 'Um. Dois.', 'Sentencas_GPTZero': [], 'Sentencas_ZeroGPT': []},
+        {'Livro': 'B2', 'Texto_Normalizado': 'Três.'},
+    ])
+    assert sorted(set(armazem.carregar().query("Participante == 'Bruno'")['Livro'])) == ['B2']
+
+
+def test_mais_provaveis_ia_por_participante(armazem):
+    df = armazem.mais_provaveis_ia(k=2)
+    assert list(zip(df['Participante'], df['Livro'], df['Prob_IA'].astype(float).round(2))) == [
+        ('Ana', 'A3', 0.95), ('Ana', 'A1', 0.7), ('Bruno', 'B1', 0.9), ('Bruno', 'B2', 0.8),
+    ]
+    assert (df['Detector'] == 'GPTZero').all()
+    assert armazem.mais_provaveis_ia(k=10)['Participante'].value_counts().to_dict() == {'Ana': 3, 'Bruno': 3}
+
+
+def test_destacadas_por_ambos_exige_mesma_resenha_e_posicao(armazem):
+    df = armazem.destacadas_por_ambos()
+    # A3 e B2 são destacadas pelo GPTZero na posição 0, como A1 no ZeroGPT: a chave inclui a resenha
+    assert list(zip(df['Participante'], df['Livro'], df['Inicio'])) == [('Ana', 'A1', 0), ('Bruno', 'B1', 4)]
+    textos = pd.DataFrame({'Participante': ['Ana', 'Bruno'], 'Livro': ['A1', 'B1'],
+                           'Texto_Normalizado': ['Quatro. Cinco.', 'Um. Dois.']})
+    assert list(ArmazemSentencas.adicionar_textos(df, textos)['Sentenca']) == ['Quatro.', 'Dois.']
+
+
+def test_arquivo_ilegivel_e_ignorado(tmp_path):
+    caminho = tmp_path / 'sentencas.npz'
+    caminho.write_bytes(b'corrompido')
+    armazem = ArmazemSentencas(caminho)
+    assert armazem.participantes() == []
+    assert len(armazem.carregar()) == 0
+    assert armazem.mais_provaveis_ia().shape == (0, 8)
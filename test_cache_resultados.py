@@ -0,0 +1,56 @@
+import sqlite3
+import pytest
+import cache_resultados
+from cache_resultados import CacheResultados
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache_resultados, 'time', lambda: agora[0])
+    return agora
+
+
+def ultimos_acessos(caminho) -> dict:
+    with sqlite3.connect(str(caminho)) as conexao:
+        return dict(conexao.execute("SELECT resultado, ultimo_acesso FROM resultados"))
+
+
+def test_acerto_sem_limite_de_entradas_nao_grava_o_acesso(tmp_path, relogio):
+    cache = CacheResultados(tmp_path / 'cache.sqlite')
+    cache.guardar('GPTZero', 'v2', 'texto', {'prob': 0.5})
+    relogio[0] = 2000.0
+    assert cache.obter('GPTZero', 'v2', 'texto') == {'prob': 0.5}
+    cache.fechar()
+    assert ultimos_acessos(tmp_path / 'cache.sqlite') == {'{"prob": 0.5}': 1000.0}
+
+
+def test_acessos_acumulados_decidem_o_despejo(tmp_path, relogio):
+    cache = CacheResultados(tmp_path / 'cache.sqlite', max_entradas=2)
+    cache.guardar('GPTZero', 'v2', 'a', {'texto': 'a'})
+    relogio[0] += 1
+    cache.guardar('GPTZero', 'v2', 'b', {'texto': 'b'})
+    relogio[0] += 1
+    assert cache.obter('GPTZero', 'v2', 'a') == {'texto': 'a'}  # 'a' passa a ser a mais recente
+    relogio[0] += 1
+    cache.guardar('GPTZero', 'v2', 'c', {'texto': 'c'})
+    assert cache.contem('GPTZero', 'v2', 'a') and cache.contem('GPTZero', 'v2', 'c')
+    assert not cache.contem('GPTZero', 'v2', 'b')
+    cache.fechar()
+
+
+def test_acessos_gravados_em_lote_e_ao_fechar(tmp_path, relogio, monkeypatch):
+    monkeypatch.setattr(CacheResultados, 'ACESSOS_POR_GRAVACAO', 2)
+    caminho = tmp_path / 'cache.sqlite'
+    cache = CacheResultados(caminho, max_entradas=10)
+    for texto in 'abc':
+        cache.guardar('ZeroGPT', 'v1', texto, texto)
+    relogio[0] = 2000.0
+    cache.obter('ZeroGPT', 'v1', 'a')
+    assert ultimos_acessos(caminho)['"a"'] == 1000.0  # ainda em memória
+    cache.obter('ZeroGPT', 'v1', 'b')
+    assert ultimos_acessos(caminho) == {'"a"': 2000.0, '"b"': 2000.0, '"c"': 1000.0}
+    relogio[0] = 3000.0
+    cache.obter('ZeroGPT', 'v1', 'c')
+    cache.fechar()
+    assert ultimos_acessos(caminho)['"c"'] == 3000.0
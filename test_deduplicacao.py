@@ -0,0 +1,104 @@
+import random
+import time
+import pytest
+from analisador_ia import AnalisadorIA
+from deduplicacao import DeduplicadorResenhas, expandir_resultado
+from motor_assincrono import MotorAssincrono
+
+VOCABULARIO = ['livro', 'autora', 'personagem', 'capítulo', 'enredo', 'narrativa', 'memória', 'tempo',
+               'família', 'história', 'leitura', 'cidade', 'infância', 'conflito', 'final', 'estilo',
+               'linguagem', 'tema', 'relação', 'mundo', 'voz', 'olhar', 'silêncio', 'viagem']
+
+
+def texto_aleatorio(semente: int, palavras: int = 200) -> str:
+    rng = random.Random(semente)
+    return ' '.join(rng.choice(VOCABULARIO) for _ in range(palavras))
+
+
+def trocar_palavras(texto: str, quantidade: int) -> str:
+    palavras = texto.split()
+    for i in range(quantidade):
+        palavras[len(palavras) - 1 - i * 7] = f'troca{i}'
+    return ' '.join(palavras)
+
+
+def test_textos_identicos_formam_um_grupo():
+    texto = texto_aleatorio(1)
+    grupos = DeduplicadorResenhas().agrupar([texto, texto_aleatorio(2), texto])
+    assert [g.membros for g in grupos] == [[0, 2], [1]]
+    assert grupos[0].representante == 0
+    assert grupos[0].similaridades == {0: 1.0, 2: 1.0}
+
+
+def test_quase_duplicata_entra_no_grupo_com_a_similaridade_real():
+    original = texto_aleatorio(3)
+    parecido = trocar_palavras(original, 1)
+    deduplicador = DeduplicadorResenhas(limiar=0.9)
+    grupos = deduplicador.agrupar([original, parecido])
+    assert [g.membros for g in grupos] == [[0, 1]]
+    esperado = deduplicador.jaccard(deduplicador.shingles(original), deduplicador.shingles(parecido))
+    assert 0.9 <= grupos[0].similaridades[1] == esperado < 1.0
+
+
+def test_texto_abaixo_do_limiar_fica_separado():
+    original = texto_aleatorio(4)
+    diferente = trocar_palavras(original, 10)  # ~25% dos shingles mudam
+    deduplicador = DeduplicadorResenhas(limiar=0.9)
+    similaridade = deduplicador.jaccard(deduplicador.shingles(original), deduplicador.shingles(diferente))
+    assert similaridade < 0.9
+    assert [g.membros for g in deduplicador.agrupar([original, diferente])] == [[0], [1]]
+
+
+def test_rotulos_so_nos_grupos_com_duplicatas():
+    a, b, c = texto_aleatorio(5), texto_aleatorio(6), texto_aleatorio(7)
+    grupos = DeduplicadorResenhas().agrupar([a, b, c, c, a])
+    assert [(g.membros, g.rotulo) for g in grupos] == [([0, 4], 1), ([1], None), ([2, 3], 2)]
+
+
+def test_agrupamento_deterministico():
+    textos = [texto_aleatorio(s % 4) if s % 3 else trocar_palavras(texto_aleatorio(s % 4), 1) for s in range(12)]
+    primeira = [g.membros for g in DeduplicadorResenhas(semente=9).agrupar(textos)]
+    segunda = [g.membros for g in DeduplicadorResenhas(semente=9).agrupar(textos)]
+    assert primeira == segunda
+    assert sorted(m for membros in primeira for m in membros) == list(range(12))
+
+
+def test_bandas_devem_dividir_as_permutacoes():
+    with pytest.raises(ValueError):
+        DeduplicadorResenhas(num_permutacoes=64, bandas=10)
+
+
+def test_expandir_resultado_replica_para_cada_membro():
+    texto = texto_aleatorio(8)
+    itens = [('Ana', 'Livro A', texto), ('Bruno', 'Livro B', texto_aleatorio(9)), ('Carla', 'Livro C', texto)]
+    grupos = DeduplicadorResenhas().agrupar([t for _, _, t in itens])
+    resultado = {'Livro': 'Livro A', 'Texto_Normalizado': texto, 'GPTZero_Prob_IA': 0.7}
+
+    expandidos = expandir_resultado(resultado, grupos[0], itens)
+    assert [(p, r['Livro'], r['GPTZero_Prob_IA']) for p, r in expandidos] == [
+        ('Ana', 'Livro A', 0.7), ('Carla', 'Livro C', 0.7)
+    ]
+    carla = expandidos[1][1]
+    assert carla['Duplicata_Grupo'] == 1
+    assert carla['Duplicata_Representante'] == 'Ana/Livro A'
+    assert carla['Duplicata_Outros_Membros'] == 'Ana/Livro A'
+    assert carla['Duplicata_Similaridade'] == 1.0
+
+    sozinho = expandir_resultado({'Livro': 'Livro B', 'GPTZero_Prob_IA': 0.1}, grupos[1], itens)
+    assert sozinho == [('Bruno', {'Livro': 'Livro B', 'Texto_Normalizado': itens[1][2], 'GPTZero_Prob_IA': 0.1})]
+
+
+def test_motor_informa_a_posicao_de_cada_resumo_concluido():
+    # Textos idênticos enviados separadamente (sem deduplicação) terminam fora de ordem
+    atrasos = {'Livro A': 0.05, 'Livro B': 0.0}
+    analisador = AnalisadorIA('chave', 'chave')
+    analisador.analisar_gptzero = lambda livro, texto: time.sleep(atrasos[livro]) or {'GPTZero_ScanID': livro}
+    analisador.analisar_zerogpt = lambda livro, texto: {}
+    concluidos = []
+
+    MotorAssincrono(analisador).analisar_resumos(
+        [('Livro A', 'mesmo texto'), ('Livro B', 'mesmo texto')],
+        ao_concluir=lambda indice, resultado: concluidos.append((indice, resultado['GPTZero_ScanID']))
+    )
+    assert concluidos == [(1, 'Livro B'), (0, 'Livro A')]
+    analisador.fechar()
@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from divisao_trechos import analisar_em_trechos, contar_palavras, dividir_em_trechos, media_ponderada
+from detector_gpt_zero import GPTZeroDetector
+from detector_zero_gpt import ZeroGPTDetector
+
+
+def sentenca(numero: int, palavras: int) -> str:
+    return ' '.join(f's{numero}p{i}' for i in range(palavras)) + '.'
+
+
+def conferir_trechos(texto: str, trechos: list, max_palavras: int):
+    # Todas as palavras, na ordem, cada trecho recortado do original e dentro do limite
+    assert ' '.join(trechos).split() == texto.split()
+    assert all(trecho in texto for trecho in trechos)
+    assert all(contar_palavras(trecho) <= max_palavras for trecho in trechos)
+
+
+@pytest.mark.parametrize('max_palavras', [None, 0, 50])
+def test_texto_inteiro_sem_limite_ou_dentro_dele(max_palavras):
+    texto = ' '.join(sentenca(n, 5) for n in range(4))
+    assert dividir_em_trechos(texto, max_palavras) == [texto]
+
+
+def test_corta_em_fins_de_sentenca_com_tamanhos_parecidos():
+    texto = ' '.join(sentenca(n, 5) for n in range(6))  # 30 palavras
+    trechos = dividir_em_trechos(texto, 20)
+    conferir_trechos(texto, trechos, 20)
+    assert [contar_palavras(trecho) for trecho in trechos] == [15, 15]
+    assert all(trecho.endswith('.') for trecho in trechos)
+
+
+def test_texto_sem_fim_de_sentenca_e_cortado_entre_palavras():
+    texto = ' '.join(f'p{i}' for i in range(25))
+    trechos = dividir_em_trechos(texto, 10)
+    conferir_trechos(texto, trechos, 10)
+    assert [contar_palavras(trecho) for trecho in trechos] == [9, 9, 7]
+
+
+def test_sentenca_maior_que_o_limite_e_cortada_entre_palavras():
+    texto = ' '.join([sentenca(0, 4), sentenca(1, 30), sentenca(2, 4)])
+    trechos = dividir_em_trechos(texto, 10)
+    conferir_trechos(texto, trechos, 10)
+    assert trechos[0].startswith('s0p0')
+    assert trechos[-1].endswith('s2p3.')
+
+
+def test_preserva_quebras_de_linha_e_aspas_depois_do_ponto():
+    texto = 'Ela disse "chega." Ele saiu.\nNo dia seguinte voltou cedo.\nE ficou calado por horas.'
+    trechos = dividir_em_trechos(texto, 6)
+    conferir_trechos(texto, trechos, 6)
+    assert trechos[0] == 'Ela disse "chega." Ele saiu.'
+    assert '\n' not in trechos[0] and all(trecho.strip() == trecho for trecho in trechos)
+
+
+def test_media_ponderada_pelo_numero_de_palavras():
+    assert media_ponderada([10.0, 40.0], [30, 10]) == pytest.approx(17.5)
+    assert media_ponderada([0.2], [7]) == pytest.approx(0.2)
+
+
+@pytest.mark.parametrize('max_workers', [None, 2])
+def test_analisar_em_trechos_mantem_a_ordem_e_propaga_falhas(max_workers):
+    executor = ThreadPoolExecutor(max_workers) if max_workers else None
+    assert analisar_em_trechos(str.upper, ['a', 'b', 'c'], executor) == ['A', 'B', 'C']
+
+    def falhar(trecho):
+        raise RuntimeError(trecho)
+    with pytest.raises(RuntimeError):
+        analisar_em_trechos(falhar, ['a', 'b'], executor)
+    if executor is not None:
+        executor.shutdown()
+
+
+def test_executor_compartilhado_limita_os_trechos_de_todos_os_textos():
+    trava = threading.Lock()
+    em_andamento = [0, 0]  # atual, máximo
+
+    def analisar(trecho):
+        with trava:
+            em_andamento[0] += 1
+            em_andamento[1] = max(em_andamento)
+        time.sleep(0.01)
+        with trava:
+            em_andamento[0] -= 1
+        return trecho
+
+    with ThreadPoolExecutor(2) as executor, ThreadPoolExecutor(4) as textos:
+        # Quatro textos longos ao mesmo tempo, como no pool de threads do motor
+        tarefas = [textos.submit(analisar_em_trechos, analisar, [f't{i}p{j}' for j in range(4)], executor)
+                   for i in range(4)]
+        assert [tarefa.result() for tarefa in tarefas] == [[f't{i}p{j}' for j in range(4)] for i in range(4)]
+    assert em_andamento[1] == 2
+
+
+def resposta_zerogpt(texto: str, porcentagem: float, sucesso: bool = True) -> dict:
+    palavras = contar_palavras(texto)
+    return {
+        'success': sucesso, 'input_text': texto, 'total_palavras': palavras,
+        'palavras_ia': round(palavras * porcentagem / 100), 'porcentagem_ia': porcentagem,
+        'sentencas': [texto], 'sentencas_ia': [texto] if porcentagem >= 50 else [],
+        'feedback': 'AI' if porcentagem >= 50 else 'Human', 'mensagem': None
+    }
+
+
+def test_zerogpt_combina_trechos_pela_media_ponderada(monkeypatch):
+    detector = ZeroGPTDetector('chave')
+    detector.max_palavras_trecho = 10
+    texto = sentenca(0, 8) + ' ' + sentenca(1, 4)  # trechos de 8 e 4 palavras
+    porcentagens = {sentenca(0, 8): 90.0, sentenca(1, 4): 30.0}
+    monkeypatch.setattr(detector, '_consultar_api', lambda trecho: resposta_zerogpt(trecho, porcentagens[trecho]))
+
+    resultado = detector.analisar_texto(texto)
+    assert resultado['success'] is True
+    assert resultado['porcentagem_ia'] == pytest.approx((90 * 8 + 30 * 4) / 12)
+    assert resultado['total_palavras'] == 12
+    assert resultado['sentencas'] == [sentenca(0, 8), sentenca(1, 4)]
+    assert resultado['sentencas_ia'] == [sentenca(0, 8)]
+    assert resultado['feedback'] == 'AI | Human'
+    assert detector.estimar_custo(texto) == (12, 2)
+
+
+def test_zerogpt_trecho_com_falha_vale_para_o_texto_inteiro(monkeypatch):
+    detector = ZeroGPTDetector('chave')
+    detector.max_palavras_trecho = 10
+    texto = sentenca(0, 8) + ' ' + sentenca(1, 4)
+    monkeypatch.setattr(detector, '_consultar_api',
+                        lambda trecho: resposta_zerogpt(trecho, 10.0, sucesso=trecho != sentenca(1, 4)))
+
+    resultado = detector.analisar_texto(texto)
+    assert resultado['success'] is False
+    assert resultado['input_text'] == texto
+
+
+def resposta_gptzero(trecho: str, classificacao: str, confianca: str, prob_ia: float) -> dict:
+    return {
+        'version': '2025-01', 'scan_id': f'scan-{trecho[:4]}',
+        'documento': {
+            'prob_media_ia': prob_ia,
+            'prob_classes': {'ai': prob_ia, 'human': 1 - prob_ia, 'mixed': 0.0},
+            'categoria_confianca': confianca, 'pontuacao_confianca': prob_ia,
+            'classe_prevista': 'ai' if prob_ia >= 0.5 else 'human',
+            'classificacao_documento': classificacao, 'mensagem_resultado': ''
+        },
+        'sentencas': [{'texto': trecho, 'prob_ia': prob_ia, 'perplexidade': 10, 'destacar_ia': prob_ia >= 0.5}]
+    }
+
+
+def test_gptzero_combina_trechos(monkeypatch):
+    detector = GPTZeroDetector('chave')
+    detector.max_palavras_trecho = 10
+    texto = sentenca(0, 8) + ' ' + sentenca(1, 4)
+    respostas = {sentenca(0, 8): ('AI_ONLY', 'high', 0.9), sentenca(1, 4): ('HUMAN_ONLY', 'medium', 0.3)}
+    monkeypatch.setattr(detector, '_consultar_api', lambda trecho: resposta_gptzero(trecho, *respostas[trecho]))
+
+    resultado = detector.analisar_texto(texto)
+    documento = resultado['documento']
+    assert documento['prob_media_ia'] == pytest.approx((0.9 * 8 + 0.3 * 4) / 12)
+    assert documento['prob_classes']['human'] == pytest.approx((0.1 * 8 + 0.7 * 4) / 12)
+    assert documento['categoria_confianca'] == 'medium'  # a menor entre os trechos
+    assert documento['classificacao_documento'] == 'MIXED'  # trechos discordam
+    assert documento['classe_prevista'] == 'ai'
+    assert resultado['scan_id'] == 'scan-s0p0,scan-s1p0'
+    assert [s['texto'] for s in resultado['sentencas']] == [sentenca(0, 8), sentenca(1, 4)]
+
+
+def test_gptzero_trechos_concordantes_mantem_a_classificacao(monkeypatch):
+    detector = GPTZeroDetector('chave')
+    detector.max_palavras_trecho = 10
+    texto = sentenca(0, 8) + ' ' + sentenca(1, 4)
+    monkeypatch.setattr(detector, '_consultar_api', lambda trecho: resposta_gptzero(trecho, 'AI_ONLY', 'high', 0.95))
+    documento = detector.analisar_texto(texto)['documento']
+    assert documento['classificacao_documento'] == 'AI_ONLY'
+    assert documento['categoria_confianca'] == 'high'
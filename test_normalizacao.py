@@ -0,0 +1,29 @@
+import random
+import pytest
+from processador_texto import normalizar_texto
+from benchmark_normalizacao import gerar_texto_aleatorio, normalizar_texto_referencia
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_equivalente_a_referencia_em_textos_aleatorios(semente):
+    rng = random.Random(semente)
+    for _ in range(2000):
+        texto = gerar_texto_aleatorio(rng, rng.randint(0, 200))
+        assert normalizar_texto(texto) == normalizar_texto_referencia(texto), repr(texto)
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('', ''),
+    ('  Resenha   do  livro  ', 'Resenha do livro'),
+    ('linha 1\n\n\nlinha 2', 'linha 1\nlinha 2'),
+    ('ele disse ?olá? e saiu', 'ele disse "olá" e saiu'),
+    ('â€œaspasâ€ e itâ€™s', '"aspas" e it\'s'),
+    ('fim…', 'fim...'),
+    ('a\x96b \x93c\x94', 'a-b "c"'),
+    ('sem\x00 controle\x7f​', 'sem controle'),
+    ('tab\tmantido', 'tab\tmantido'),
+    ('ação naïve 中文 😀', 'ação naïve 中文 😀'),
+])
+def test_casos_conhecidos(texto, esperado):
+    assert normalizar_texto(texto) == esperado
+    assert normalizar_texto_referencia(texto) == esperado
@@ -0,0 +1,147 @@
+import random
+import numpy as np
+import pytest
+from analisador_ia import AnalisadorIA
+from armazem_resultados import ArmazemResultados
+from motor_assincrono import MotorAssincrono
+from pretriagem import (
+    CAMINHO_API,
+    CAMINHO_LOCAL_HUMANO,
+    CAMINHO_LOCAL_IA,
+    PreTriagem,
+    _ajustar_logistica,
+    treinar_pretriagem
+)
+
+PALAVRAS_HUMANO = ['eu', 'achei', 'livro', 'chato', 'mas', 'gostei', 'final', 'nossa', 'demais', 'né',
+                   'sei', 'lá', 'personagem', 'ruim', 'legal']
+PALAVRAS_IA = ['obra', 'apresenta', 'narrativa', 'envolvente', 'explora', 'temas', 'profundos', 'como',
+               'identidade', 'resiliência', 'através', 'perspectiva', 'única', 'autor', 'constrói']
+
+
+def resenha_humana(rng: random.Random) -> str:
+    # Sentenças de tamanhos bem diferentes e muita pontuação
+    sentencas = []
+    for _ in range(rng.randint(4, 8)):
+        palavras = [rng.choice(PALAVRAS_HUMANO) for _ in range(rng.choice([2, 3, 15, 25]))]
+        sentencas.append(', '.join(palavras[:2]) + ' ' + ' '.join(palavras[2:]) + rng.choice(['!', '?', '...']))
+    return ' '.join(sentencas)
+
+
+def resenha_ia(rng: random.Random) -> str:
+    # Sentenças de tamanho uniforme, sem pontuação interna
+    return ' '.join(' '.join(rng.choice(PALAVRAS_IA) for _ in range(12)) + '.' for _ in range(rng.randint(5, 7)))
+
+
+def gravar_exemplos(armazem: ArmazemResultados, humanos: int, ias: int, semente: int = 0):
+    rng = random.Random(semente)
+    resultados = [
+        {'Livro': f'h{i}', 'Texto_Normalizado': resenha_humana(rng),
+         'GPTZero_Prob_IA': 0.05, 'ZeroGPT_Porcentagem_IA': 5.0}
+        for i in range(humanos)
+    ] + [
+        {'Livro': f'ia{i}', 'Texto_Normalizado': resenha_ia(rng),
+         'GPTZero_Prob_IA': 0.95, 'ZeroGPT_Porcentagem_IA': 95.0}
+        for i in range(ias)
+    ]
+    armazem.gravar_participante('Turma', resultados)
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    armazem = ArmazemResultados(tmp_path / 'resultados.sqlite')
+    yield armazem
+    armazem.fechar()
+
+
+def test_ajuste_logistico_zera_o_gradiente_regularizado():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(size=(200, 3)), np.ones(200)])
+    y = (X[:, 0] - 0.5 * X[:, 1] + rng.normal(scale=0.5, size=200) > 0).astype(float)
+    pesos = np.where(y == 1, 2.0, 1.0)
+
+    w = _ajustar_logistica(X, y, pesos, l2=1.0)
+    p = 1 / (1 + np.exp(-X @ w))
+    regularizacao = np.array([1.0, 1.0, 1.0, 0.0])  # o intercepto não é regularizado
+    gradiente = X.T @ (pesos * (p - y)) + regularizacao * w
+    assert np.abs(gradiente).max() < 1e-6
+    assert w[0] > 0 > w[1]
+    assert ((p >= 0.5) == (y == 1)).mean() > 0.8
+
+
+@pytest.mark.parametrize('probabilidade, caminho', [
+    (0.0, CAMINHO_LOCAL_HUMANO),
+    (0.05, CAMINHO_LOCAL_HUMANO),  # o limiar entra na faixa local
+    (0.0501, CAMINHO_API),
+    (0.5, CAMINHO_API),
+    (0.9499, CAMINHO_API),
+    (0.95, CAMINHO_LOCAL_IA),
+    (1.0, CAMINHO_LOCAL_IA),
+])
+def test_classificar_segue_os_limiares(monkeypatch, probabilidade, caminho):
+    pretriagem = PreTriagem(limiar_humano=0.05, limiar_ia=0.95)
+    monkeypatch.setattr(pretriagem, 'probabilidade_ia', lambda texto: probabilidade)
+    triagem = {'Triagem_Caminho': caminho, 'Triagem_Prob_IA': probabilidade}
+    assert pretriagem.avaliar('texto') == triagem
+    assert not pretriagem.contagens  # avaliar não contabiliza
+    assert pretriagem.classificar('texto') == triagem
+    assert pretriagem.contagens == {caminho: 1}
+
+
+def test_motor_usa_a_triagem_do_planejamento(monkeypatch):
+    pretriagem = PreTriagem(limiar_humano=0.05, limiar_ia=0.95)
+    chamadas = []
+    monkeypatch.setattr(pretriagem, 'probabilidade_ia', lambda texto: chamadas.append(texto) or 0.99)
+    analisador = AnalisadorIA('chave', 'chave')
+    motor = MotorAssincrono(analisador, pretriagem=pretriagem)
+    resumos = [('A', 'texto a'), ('B', 'texto b')]
+
+    triagens = [motor.avaliar_triagem(texto) for _, texto in resumos]
+    assert [motor.estimar_custo(texto, triagem) for (_, texto), triagem in zip(resumos, triagens)] == [{}, {}]
+    resultados = motor.analisar_resumos(resumos, triagens=triagens)
+    assert chamadas == ['texto a', 'texto b']  # cada texto pontuado uma vez só
+    assert [r['Triagem_Caminho'] for r in resultados] == [CAMINHO_LOCAL_IA, CAMINHO_LOCAL_IA]
+    assert pretriagem.contagens == {CAMINHO_LOCAL_IA: 2}
+    analisador.fechar()
+
+
+@pytest.mark.parametrize('limiar_humano, limiar_ia', [(0.5, 0.5), (0.6, 0.4), (-0.1, 0.9), (0.1, 1.1)])
+def test_limiares_invalidos(limiar_humano, limiar_ia):
+    with pytest.raises(ValueError):
+        PreTriagem(limiar_humano, limiar_ia)
+
+
+def test_resultado_local_nao_preenche_os_detectores():
+    triagem = {'Triagem_Caminho': CAMINHO_LOCAL_IA, 'Triagem_Prob_IA': 0.99}
+    resultado = PreTriagem.resultado_local('Livro', 'texto', triagem)
+    assert resultado['GPTZero_Prob_IA'] == -1
+    assert resultado['ZeroGPT_Porcentagem_IA'] is None
+    assert resultado['Sentencas_GPTZero'] == resultado['Sentencas_ZeroGPT'] == []
+    assert resultado['Triagem_Caminho'] == CAMINHO_LOCAL_IA
+    assert resultado['Triagem_Prob_IA'] == 0.99
+
+
+def test_sem_exemplos_suficientes_nao_treina(armazem):
+    gravar_exemplos(armazem, humanos=60, ias=9)
+    assert treinar_pretriagem(armazem, 0.05, 0.95, min_exemplos=10) is None
+
+
+def test_resenhas_resolvidas_localmente_nao_entram_no_treino(armazem):
+    gravar_exemplos(armazem, humanos=12, ias=12)
+    resultados = armazem.resultados_participante('Turma')
+    for resultado in resultados[-4:]:
+        resultado['Triagem_Caminho'] = CAMINHO_LOCAL_IA
+    armazem.gravar_participante('Turma', resultados)
+    assert treinar_pretriagem(armazem, 0.05, 0.95, min_exemplos=10) is None
+
+
+def test_treino_separa_as_classes(armazem):
+    gravar_exemplos(armazem, humanos=60, ias=60)
+    pretriagem = treinar_pretriagem(armazem, 0.05, 0.95, min_exemplos=50)
+    assert pretriagem is not None
+
+    rng = random.Random(123)  # textos novos, fora do treino
+    assert all(pretriagem.classificar(resenha_humana(rng))['Triagem_Caminho'] == CAMINHO_LOCAL_HUMANO
+               for _ in range(10))
+    assert all(pretriagem.classificar(resenha_ia(rng))['Triagem_Caminho'] == CAMINHO_LOCAL_IA
+               for _ in range(10))
@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+from time import perf_counter, sleep
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from limitador_taxa import calcular_backoff
+from metricas import METRICAS
+
+# Status HTTP que indicam falha passageira do servidor (vale tentar de novo)
+STATUS_TRANSITORIOS = {500, 502, 503, 504}
+
+# Exceções de rede que indicam falha passageira
+ERROS_TRANSITORIOS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+class TransporteHTTP:
+    """
+    Camada de transporte HTTP usada pelos detectores.
+
+    - Mantém uma Session com pool de conexões keep-alive (evita um novo
+      handshake TLS por requisição)
+    - Aplica timeouts de conexão e de leitura, para que um socket travado
+      não segure a execução para sempre
+    - Classifica erros como transitórios (rede, timeout, 5xx) e repete a
+      requisição com backoff exponencial; 429 fica a cargo do limitador de taxa
+    - Contabiliza requisições e bytes enviados/recebidos, também nas métricas da execução
+      (rótulo detector=nome): latência, status de cada resposta e tentativas repetidas
+    - A URL base pode apontar para um servidor local (testes/benchmarks)
+    """
+
+    def __init__(self, base_url: str, timeout_conexao: float = 10, timeout_leitura: float = 120,
+                 max_conexoes: int = 16, max_tentativas: int = 3, nome: str = 'http'):
+        self.base_url = base_url.rstrip('/')
+        self.nome = nome
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.max_tentativas = max(1, max_tentativas)
+        self.logger = logging.getLogger('detector_ia')
+
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max_conexoes, max_retries=0)
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+
+    def url(self, caminho: str) -> str:
+        return f"{self.base_url}/{caminho.lstrip('/')}"
+
+    @staticmethod
+    def erro_transitorio(erro: Optional[BaseException] = None, status: Optional[int] = None) -> bool:
+        """
+        True se a falha (exceção ou status HTTP) é passageira e a requisição pode ser repetida.
+        Um HTTPError (raise_for_status) é classificado pelo status da resposta.
+        """
+        if isinstance(erro, requests.exceptions.HTTPError) and erro.response is not None:
+            return erro.response.status_code in STATUS_TRANSITORIOS
+        if erro is not None:
+            return isinstance(erro, ERROS_TRANSITORIOS)
+        return status in STATUS_TRANSITORIOS
+
+    def _contabilizar(self, enviados: int, recebidos: int, segundos: float, status):
+        with self._lock:
+            self.requisicoes += 1
+            self.bytes_enviados += enviados
+            self.bytes_recebidos += recebidos
+        METRICAS.observar('http_requisicao_segundos', segundos, detector=self.nome)
+        METRICAS.incrementar('http_respostas_total', detector=self.nome, status=status)
+        METRICAS.incrementar('http_bytes_enviados_total', enviados, detector=self.nome)
+        METRICAS.incrementar('http_bytes_recebidos_total', recebidos, detector=self.nome)
+
+    def post_json(self, caminho: str, payload: Dict[str, Any], headers: Dict[str, str]) -> requests.Response:
+        """
+        Envia um POST com corpo JSON, repetindo falhas transitórias.
+        Retorna a última resposta recebida; o chamador decide como tratar o status.
+        """
+        url = self.url(caminho)
+        corpo = json.dumps(payload).encode('utf-8')
+
+        for tentativa in range(self.max_tentativas):
+            ultima_tentativa = tentativa == self.max_tentativas - 1
+            inicio = perf_counter()
+            try:
+                response = self.session.post(url, data=corpo, headers=headers, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                self._contabilizar(len(corpo), 0, perf_counter() - inicio, type(e).__name__)
+                if not self.erro_transitorio(e) or ultima_tentativa:
+                    raise
+                METRICAS.incrementar('http_retentativas_total', detector=self.nome)
+                espera = calcular_backoff(tentativa)
+                self.logger.warning("Falha transitória em %s (%s), nova tentativa em %.1fs", url, type(e).__name__, espera)
+                sleep(espera)
+                continue
+
+            self._contabilizar(len(corpo), len(response.content), perf_counter() - inicio, response.status_code)
+            if self.erro_transitorio(status=response.status_code) and not ultima_tentativa:
+                METRICAS.incrementar('http_retentativas_total', detector=self.nome)
+                espera = calcular_backoff(tentativa)
+                self.logger.warning("Status %s em %s, nova tentativa em %.1fs", response.status_code, url, espera)
+                sleep(espera)
+                continue
+            return response
+
+    def registrar_estatisticas(self, nome: str):
+        """
+        Registra no log o volume trafegado pelo transporte
+        """
+        self.logger.info(
+            f"{nome}: {self.requisicoes} requisições, {self.bytes_enviados} bytes enviados, "
+            f"{self.bytes_recebidos} bytes recebidos"
+        )
+
+    def fechar(self):
+        self.session.close()